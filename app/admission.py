@@ -0,0 +1,160 @@
+import logging
+import math
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from functools import partial
+from threading import Lock
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.celery_app import PRIORITY_SEP, PRIORITY_STEPS
+from app.config import settings
+from app.schemas import PRIORITIES
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBuckets:
+    # One bucket per client, refilled at `rate` tokens/s up to `burst`; least recently
+    # seen clients are forgotten beyond `max_clients`.
+    def __init__(self, rate: float, burst: float, max_clients: int = 100_000) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, client: str, cost: float = 1) -> float:
+        # Returns 0 when admitted, else the seconds until `cost` tokens are available.
+        cost = min(cost, self._burst)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self._burst, now))
+            tokens = min(self._burst, tokens + (now - last) * self._rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self._rate
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self._max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class LoadMonitor:
+    # Broker queue depth and in-flight job count per priority lane, sampled at most once
+    # per refresh interval so admission adds no I/O to most requests. Each lane is judged
+    # on its own backlog, so queued bulk work never sheds realtime submissions. The drain
+    # rate (jobs leaving a lane's in-flight set per second) is an EWMA over the samples
+    # and sizes Retry-After.
+    def __init__(
+        self,
+        *,
+        max_queue_depth: int,
+        max_in_flight: int,
+        refresh_seconds: float,
+        max_retry_after_seconds: int,
+        read_queue_depths: Callable[[], Awaitable[dict[str, int] | None]],
+    ) -> None:
+        self._max_queue_depth = max_queue_depth
+        self._max_in_flight = max_in_flight
+        self._refresh_seconds = refresh_seconds
+        self._max_retry_after = max_retry_after_seconds
+        self._read_queue_depths = read_queue_depths
+        self.queue_depths: dict[str, int] = {}
+        self.in_flight: dict[str, int] | None = None
+        self.drain_rates: dict[str, float] = {}
+        self._admitted_since_sample: Counter[str] = Counter()
+        self._sampled_at = -math.inf
+        self._refreshing = False
+
+    def note_admitted(self, lane: str, count: int = 1) -> None:
+        self._admitted_since_sample[lane] += count
+
+    async def refresh(self, read_in_flight: Callable[[], Awaitable[dict[str, int]]]) -> None:
+        now = time.monotonic()
+        # Concurrent requests keep using the last sample while one of them refreshes.
+        if self._refreshing or now - self._sampled_at < self._refresh_seconds:
+            return
+        self._refreshing = True
+        try:
+            queue_depths = await self._read_queue_depths()
+            in_flight = await read_in_flight()
+        finally:
+            self._refreshing = False
+
+        if self.in_flight is not None:
+            for lane in self.in_flight.keys() | in_flight.keys() | self._admitted_since_sample.keys():
+                before = self.in_flight.get(lane, 0) + self._admitted_since_sample[lane]
+                sample = max(0, before - in_flight.get(lane, 0)) / (now - self._sampled_at)
+                previous = self.drain_rates.get(lane)
+                self.drain_rates[lane] = sample if previous is None else 0.7 * previous + 0.3 * sample
+        self.queue_depths = queue_depths or {}
+        self.in_flight = in_flight
+        self._admitted_since_sample.clear()
+        self._sampled_at = now
+
+    def retry_after(self, lane: str) -> int | None:
+        # None while the lane is under both thresholds, else seconds until its backlog
+        # should have drained back under them at the observed rate.
+        excess = max(
+            self.queue_depths.get(lane, 0) - self._max_queue_depth,
+            (self.in_flight or {}).get(lane, 0) - self._max_in_flight,
+        )
+        if excess <= 0:
+            return None
+        drain_rate = self.drain_rates.get(lane)
+        if not drain_rate:
+            return self._max_retry_after
+        return max(1, min(self._max_retry_after, math.ceil(excess / drain_rate)))
+
+
+class BrokerQueues:
+    def __init__(self, broker_url: str, priority_steps: Iterable[int] = ()) -> None:
+        self._broker_url = broker_url
+        self._suffixes = [""] + [f"{PRIORITY_SEP}{step}" for step in priority_steps if step]
+        self._client: Redis | None = None
+
+    async def depths(self, queue_names: Iterable[str]) -> dict[str, int] | None:
+        # Celery's Redis transport keeps each queue as a list; other brokers report nothing.
+        if not self._broker_url.startswith(("redis://", "rediss://")):
+            return None
+        if self._client is None:
+            self._client = Redis.from_url(self._broker_url)
+        names = list(queue_names)
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for name in names:
+                    for suffix in self._suffixes:
+                        pipe.llen(name + suffix)
+                lengths = await pipe.execute()
+        except RedisError:
+            logger.warning("broker_queue_depth_unavailable")
+            return None
+        # A queue with priority steps is the sum of its per-step lists.
+        per_queue = len(self._suffixes)
+        return {name: sum(lengths[i * per_queue : (i + 1) * per_queue]) for i, name in enumerate(names)}
+
+
+broker_queues = BrokerQueues(settings.celery_broker_url, PRIORITY_STEPS)
+
+client_buckets = (
+    TokenBuckets(settings.admission_client_rate, settings.admission_client_burst)
+    if settings.admission_enabled and settings.admission_client_rate > 0
+    else None
+)
+
+load_monitor = (
+    LoadMonitor(
+        max_queue_depth=settings.admission_max_queue_depth,
+        max_in_flight=settings.admission_max_in_flight,
+        refresh_seconds=settings.admission_refresh_ms / 1000,
+        max_retry_after_seconds=settings.admission_max_retry_after_seconds,
+        read_queue_depths=partial(broker_queues.depths, PRIORITIES),
+    )
+    if settings.admission_enabled
+    else None
+)
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.job_store import update_jobs_started, update_jobs_succeeded
+from app.model import Prediction
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    prediction: Prediction
+    # False when the row had already finished another way (expired, or failed by a timed-out task).
+    stored: bool
+    # The batch's state writes, attributed in full to each of its jobs.
+    db_seconds: float
+
+
+@dataclass
+class _PendingJob:
+    job_id: str
+    text: str
+    retry_count: int
+    enqueued_at: datetime | None = None
+    queued_at: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future)
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        predict_batch: Callable[[list[str]], list[Prediction]],
+        session_factory: Callable[[], Session],
+        max_batch_size: int,
+        max_wait_ms: int,
+    ) -> None:
+        self._predict_batch = predict_batch
+        self._session_factory = session_factory
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._pending: list[_PendingJob] = []
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, job_id: str, text: str, retry_count: int, enqueued_at: datetime | None = None) -> Future:
+        job = _PendingJob(job_id=job_id, text=text, retry_count=retry_count, enqueued_at=enqueued_at)
+        with self._cond:
+            # Started lazily so each prefork child gets its own flusher thread.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+            self._pending.append(job)
+            self._cond.notify()
+        return job.future
+
+    def _run(self) -> None:
+        while True:
+            self._flush(self._next_batch())
+
+    def _next_batch(self) -> list[_PendingJob]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0].queued_at + self._max_wait
+            while len(self._pending) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[: self._max_batch_size]
+            del self._pending[: self._max_batch_size]
+        return batch
+
+    def _flush(self, batch: list[_PendingJob]) -> None:
+        # Jobs whose task already gave up are dropped here.
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        db = self._session_factory()
+        try:
+            started = time.perf_counter()
+            update_jobs_started(db, [(job.job_id, job.retry_count, job.enqueued_at) for job in batch])
+            db_seconds = time.perf_counter() - started
+            inference_started_at = datetime.now(timezone.utc)
+            outcomes = self._predict_all([job.text for job in batch])
+            inference_finished_at = datetime.now(timezone.utc)
+            results = [
+                Prediction(label=outcome.label, score=round(outcome.score, 4))
+                if isinstance(outcome, Prediction)
+                else outcome
+                for outcome in outcomes
+            ]
+            started = time.perf_counter()
+            stored = update_jobs_succeeded(
+                db,
+                [
+                    (job.job_id, result.label, result.score)
+                    for job, result in zip(batch, results)
+                    if isinstance(result, Prediction)
+                ],
+                inference_started_at=inference_started_at,
+                inference_finished_at=inference_finished_at,
+            )
+            db_seconds += time.perf_counter() - started
+        except Exception as exc:
+            for job in batch:
+                job.future.set_exception(exc)
+            return
+        finally:
+            db.close()
+
+        for job, result in zip(batch, results):
+            if isinstance(result, Prediction):
+                job.future.set_result(BatchResult(result, job.job_id in stored, db_seconds))
+            else:
+                job.future.set_exception(result)
+
+    def _predict_all(self, texts: list[str]) -> list[Prediction | Exception]:
+        try:
+            return list(self._predict_batch(texts))
+        except Exception as exc:
+            if len(texts) == 1:
+                return [exc]
+
+        # Re-run one by one so a bad text only fails (and retries) its own job.
+        outcomes: list[Prediction | Exception] = []
+        for text in texts:
+            try:
+                outcomes.append(self._predict_batch([text])[0])
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO
+from uuid import uuid4
+
+import orjson
+
+from app.config import settings
+from app.database import SessionLocal, engine, init_db
+from app.job_store import insert_missing_jobs
+from app.registry import loader_for, model_registry
+
+# Per-process state, set by _init_worker.
+_model_version = settings.model_version
+_text_field = "text"
+_id_field: str | None = None
+_persist = False
+
+
+def _init_worker(
+    model_version: str, model_spec: str | None, text_field: str, id_field: str | None, persist: bool
+) -> None:
+    global _model_version, _text_field, _id_field, _persist
+    _model_version, _text_field, _id_field, _persist = model_version, text_field, id_field, persist
+    if model_spec:
+        model_registry.register(model_version, loader_for(model_spec))
+    # Load before the first chunk so no chunk pays for it.
+    model_registry.get(model_version)
+    if persist:
+        # Pooled connections inherited over fork belong to the parent.
+        engine.dispose(close=False)
+
+
+def score_chunk(first_line: int, lines: list[bytes]) -> tuple[bytes, int, int]:
+    # Parses, scores and serializes one chunk; returns NDJSON output, scored and error counts.
+    # Unparseable lines become error records so output stays aligned with the input.
+    outputs: list[dict] = []
+    texts: list[str] = []
+    scored: list[dict] = []
+    for line_number, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+            text = record[_text_field]
+            if not isinstance(text, str):
+                raise TypeError(f"{_text_field!r} is not a string")
+        except (orjson.JSONDecodeError, KeyError, TypeError) as exc:
+            outputs.append({"id": line_number, "error": str(exc) or type(exc).__name__})
+            continue
+        output = {"id": record.get(_id_field, line_number) if _id_field else line_number}
+        outputs.append(output)
+        texts.append(text)
+        scored.append(output)
+
+    predictions = model_registry.get(_model_version).predict_batch(texts)
+    for output, prediction in zip(scored, predictions):
+        output.update(label=prediction.label, score=round(prediction.score, 4), model_version=_model_version)
+    if _persist and scored:
+        for output in scored:
+            output["job_id"] = str(uuid4())
+        _store(scored, texts)
+
+    return b"".join(orjson.dumps(output) + b"\n" for output in outputs), len(scored), len(outputs) - len(scored)
+
+
+def _store(scored: list[dict], texts: list[str]) -> None:
+    # One multi-row insert per chunk, as finished bulk-lane jobs.
+    rows = [
+        {
+            "job_id": output["job_id"],
+            "input_text": text,
+            "model_version": _model_version,
+            "priority": "bulk",
+            "status": "succeeded",
+            "result_label": output["label"],
+            "result_score": output["score"],
+        }
+        for output, text in zip(scored, texts)
+    ]
+    db = SessionLocal()
+    try:
+        insert_missing_jobs(db, rows)
+    finally:
+        db.close()
+
+
+def _chunks(source: BinaryIO, chunk_size: int) -> Iterator[tuple[int, list[bytes]]]:
+    chunk: list[bytes] = []
+    first_line = 1
+    for line in source:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield first_line, chunk
+            first_line += len(chunk)
+            chunk = []
+    if chunk:
+        yield first_line, chunk
+
+
+def score_stream(
+    source: BinaryIO,
+    sink: BinaryIO,
+    *,
+    workers: int,
+    chunk_size: int = 1000,
+    model_version: str = settings.model_version,
+    model_spec: str | None = None,
+    text_field: str = "text",
+    id_field: str | None = None,
+    persist: bool = False,
+) -> dict:
+    # Chunks go to the pool as they are read and come back in submission order. At most
+    # two chunks per worker are in flight, so memory stays flat however long the input.
+    started = time.perf_counter()
+    texts = errors = 0
+    if persist:
+        init_db()
+    initargs = (model_version, model_spec, text_field, id_field, persist)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending: deque[Future] = deque()
+
+        def write_oldest() -> None:
+            nonlocal texts, errors
+            output, scored, failed = pending.popleft().result()
+            sink.write(output)
+            texts += scored
+            errors += failed
+
+        for first_line, chunk in _chunks(source, chunk_size):
+            pending.append(pool.submit(score_chunk, first_line, chunk))
+            if len(pending) >= 2 * workers:
+                write_oldest()
+        while pending:
+            write_oldest()
+    sink.flush()
+
+    seconds = time.perf_counter() - started
+    # Error records are not counted as texts, so the rate reflects scoring alone.
+    return {
+        "texts": texts,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "texts_per_second": round(texts / seconds) if seconds else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score an NDJSON file of texts offline, bypassing the queue")
+    parser.add_argument("input", help='NDJSON with one {"text": ...} object per line; "-" reads stdin')
+    parser.add_argument("-o", "--output", default="-", help="NDJSON results in input order; default stdout")
+    parser.add_argument("--text-field", default="text", help="e.g. body for requests.jsonl")
+    parser.add_argument("--id-field", default=None, help="copied to each result; default is the line number")
+    parser.add_argument("--model-version", default=settings.model_version)
+    parser.add_argument("--model", default=None, help="model spec for --model-version, e.g. hashed:/models/v2.bin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--persist", action="store_true", help="also insert each result as a succeeded job")
+    args = parser.parse_args()
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    sink = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        report = score_stream(
+            source,
+            sink,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            model_version=args.model_version,
+            model_spec=args.model,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            persist=args.persist,
+        )
+    finally:
+        for stream in (source, sink):
+            if stream not in (sys.stdin.buffer, sys.stdout.buffer):
+                stream.close()
+    print(json.dumps(report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
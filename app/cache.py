@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Any
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.metrics import metrics
+from app.redis_pool import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        on_evict: Callable[[], None] | None = None,
+    ) -> None:
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._on_evict = on_evict
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._evicted()
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evicted()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evicted(self) -> None:
+        if self._on_evict:
+            self._on_evict()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl_seconds: int, use_redis: bool = False) -> None:
+        self._local = TTLCache(max_entries, ttl_seconds, on_evict=metrics.inc_cache_eviction)
+        self._ttl_seconds = ttl_seconds
+        self._use_redis = use_redis
+        self._redis = Redis.from_url(settings.redis_url) if use_redis else None
+
+    @staticmethod
+    def key(text: str, model_version: str) -> str:
+        # Models only ever see lowercased text, so case and edge whitespace do not matter.
+        normalized = text.strip().lower()
+        digest = hashlib.sha256(f"{model_version}\0{normalized}".encode()).hexdigest()
+        return f"inferflow:result:{digest}"
+
+    async def aget_many(self, texts: list[str], model_version: str) -> list[dict | None]:
+        keys = [self.key(text, model_version) for text in texts]
+        results = [self._local.get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing and self._use_redis:
+            try:
+                raw_values = await get_async_redis().mget([keys[index] for index in missing])
+            except RedisError:
+                logger.warning("result_cache_unavailable")
+                raw_values = [None] * len(missing)
+            for index, raw in zip(missing, raw_values):
+                if raw is not None:
+                    results[index] = json.loads(raw)
+                    self._local.set(keys[index], results[index])
+
+        for result in results:
+            if result is None:
+                metrics.inc_cache_miss()
+            else:
+                metrics.inc_cache_hit()
+        return results
+
+    async def aget(self, text: str, model_version: str) -> dict | None:
+        return (await self.aget_many([text], model_version))[0]
+
+    def set(self, text: str, model_version: str, label: str, score: float) -> None:
+        key, result = self._store_local(text, model_version, label, score)
+        if self._redis is not None:
+            try:
+                self._redis.set(key, json.dumps(result), ex=self._ttl_seconds)
+            except RedisError:
+                logger.warning("result_cache_unavailable")
+
+    async def aset(self, text: str, model_version: str, label: str, score: float) -> None:
+        key, result = self._store_local(text, model_version, label, score)
+        if self._use_redis:
+            try:
+                await get_async_redis().set(key, json.dumps(result), ex=self._ttl_seconds)
+            except RedisError:
+                logger.warning("result_cache_unavailable")
+
+    def _store_local(self, text: str, model_version: str, label: str, score: float) -> tuple[str, dict]:
+        key = self.key(text, model_version)
+        result = {"label": label, "score": score}
+        self._local.set(key, result)
+        return key, result
+
+
+class IdempotencyKeyCache:
+    def __init__(self, max_entries: int, ttl_seconds: int, use_redis: bool = False) -> None:
+        self._local = TTLCache(max_entries, ttl_seconds)
+        self._ttl_seconds = ttl_seconds
+        self._use_redis = use_redis
+
+    @staticmethod
+    def key(idempotency_key: str) -> str:
+        return f"inferflow:idempotency:{idempotency_key}"
+
+    async def aget(self, idempotency_key: str) -> dict | None:
+        key = self.key(idempotency_key)
+        seen = self._local.get(key)
+        if seen is None and self._use_redis:
+            try:
+                raw = await get_async_redis().get(key)
+            except RedisError:
+                logger.warning("idempotency_cache_unavailable")
+                raw = None
+            if raw is not None:
+                seen = json.loads(raw)
+                self._local.set(key, seen)
+        if seen is not None:
+            metrics.inc_idempotency_hit()
+        return seen
+
+    async def aset(self, idempotency_key: str, job_id: str, status: str) -> None:
+        key = self.key(idempotency_key)
+        # Status is as of submission; clients read the live state from /v1/jobs.
+        seen = {"job_id": job_id, "status": status}
+        self._local.set(key, seen)
+        if self._use_redis:
+            try:
+                await get_async_redis().set(key, json.dumps(seen), ex=self._ttl_seconds)
+            except RedisError:
+                logger.warning("idempotency_cache_unavailable")
+
+
+class StatusCache:
+    # Serialized status responses of finished jobs, whose rows are written once (see
+    # job_store._transition); each entry carries its ETag so a matching If-None-Match is
+    # answered without re-hashing. Rows do disappear when retention purges them, so a job
+    # is only cached if its entry expires before the purge can delete the row.
+    def __init__(self, max_entries: int, ttl_seconds: int, use_redis: bool = False, retention_days: int = 0) -> None:
+        self._local = TTLCache(max_entries, ttl_seconds)
+        self._ttl_seconds = ttl_seconds
+        self._use_redis = use_redis
+        self._redis = Redis.from_url(settings.redis_url) if use_redis else None
+        self._retention = timedelta(days=retention_days)
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"inferflow:status:{job_id}"
+
+    @staticmethod
+    def etag(body: str) -> str:
+        return f'"{hashlib.blake2b(body.encode(), digest_size=12).hexdigest()}"'
+
+    async def aget(self, job_id: str) -> tuple[str, str] | None:
+        key = self.key(job_id)
+        entry = self._local.get(key)
+        if entry is None and self._use_redis:
+            try:
+                raw = await get_async_redis().get(key)
+            except RedisError:
+                logger.warning("status_cache_unavailable")
+                raw = None
+            if raw is not None:
+                body = raw.decode()
+                entry = (body, self.etag(body))
+                self._local.set(key, entry)
+        if entry is not None:
+            metrics.inc_status_cache_hit()
+        return entry
+
+    def admits(self, created_at: datetime) -> bool:
+        if not self._retention:
+            return True
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        purge_from = created_at + self._retention
+        return purge_from > datetime.now(timezone.utc) + timedelta(seconds=self._ttl_seconds)
+
+    async def aset(self, job_id: str, body: str, created_at: datetime | None = None) -> tuple[str, str] | None:
+        if created_at is not None and not self.admits(created_at):
+            return None
+        key = self.key(job_id)
+        entry = (body, self.etag(body))
+        self._local.set(key, entry)
+        if self._use_redis:
+            try:
+                await get_async_redis().set(key, body, ex=self._ttl_seconds)
+            except RedisError:
+                logger.warning("status_cache_unavailable")
+        return entry
+
+    def evict(self, job_ids: list[str]) -> None:
+        # Called by the purge; other processes' local entries are covered by `admits`.
+        keys = [self.key(job_id) for job_id in job_ids]
+        for key in keys:
+            self._local.delete(key)
+        if self._redis is not None and keys:
+            try:
+                self._redis.delete(*keys)
+            except RedisError:
+                logger.warning("status_cache_unavailable")
+
+
+result_cache = (
+    ResultCache(
+        settings.result_cache_max_entries,
+        settings.result_cache_ttl_seconds,
+        use_redis=settings.result_cache_redis_enabled,
+    )
+    if settings.result_cache_enabled
+    else None
+)
+
+idempotency_cache = (
+    IdempotencyKeyCache(
+        settings.idempotency_cache_max_entries,
+        settings.idempotency_cache_ttl_seconds,
+        use_redis=settings.idempotency_cache_redis_enabled,
+    )
+    if settings.idempotency_cache_enabled
+    else None
+)
+
+status_cache = (
+    StatusCache(
+        settings.status_cache_max_entries,
+        settings.status_cache_ttl_seconds,
+        use_redis=settings.status_cache_redis_enabled,
+        retention_days=settings.job_retention_days,
+    )
+    if settings.status_cache_enabled
+    else None
+)
@@ -1,8 +1,25 @@
 from celery import Celery
+from kombu import Queue
 
 from app.config import settings
+from app.profiling import register_worker_profiler
+from app.schemas import PRIORITIES
 
 
+def parse_slack_buckets(spec: str) -> tuple[float, ...]:
+    # "5,30,300" -> (5.0, 30.0, 300.0): upper bounds in seconds of the deadline slack per priority.
+    buckets = tuple(sorted(float(bound) for bound in spec.split(",") if bound.strip()))
+    if any(bound <= 0 for bound in buckets):
+        raise ValueError(f"slack buckets must be positive: {spec!r}")
+    return buckets
+
+
+EDF_SLACK_BUCKETS = parse_slack_buckets(settings.edf_slack_buckets)
+# Redis keeps one list per queue and priority step; steps past 0 are named "<queue>:<step>".
+# One step per slack bucket, plus a last one for jobs without a deadline.
+PRIORITY_STEPS = tuple(range(len(EDF_SLACK_BUCKETS) + 1)) if EDF_SLACK_BUCKETS else ()
+PRIORITY_SEP = ":"
+
 celery = Celery(
     "ml_inference",
     broker=settings.celery_broker_url,
@@ -11,10 +28,14 @@ celery = Celery(
 )
 
 celery.conf.update(
-    task_serializer="json",
-    result_serializer="json",
-    accept_content=["json"],
-    task_track_started=True,
+    # msgpack is the compact option; both are always accepted so the setting can be
+    # changed without draining queues first.
+    task_serializer=settings.celery_serializer,
+    result_serializer=settings.celery_serializer,
+    accept_content=["json", "msgpack"],
+    # Without a backend nothing reads task state or return values, so none is sent.
+    task_ignore_result=settings.celery_result_backend is None,
+    task_track_started=settings.celery_result_backend is not None,
     task_always_eager=settings.celery_task_always_eager,
     task_eager_propagates=settings.celery_task_eager_propagates,
     task_store_eager_result=True,
@@ -22,4 +43,24 @@ celery.conf.update(
     task_soft_time_limit=settings.inference_timeout_seconds,
     task_acks_late=True,
     worker_prefetch_multiplier=1,
+    # One queue per priority lane; `celery worker -Q realtime` dedicates a pool to a lane.
+    task_queues=tuple(Queue(name) for name in PRIORITIES),
+    task_default_queue="default",
+    task_routes={"app.tasks.purge_expired_jobs": {"queue": "bulk"}},
 )
+
+if PRIORITY_STEPS:
+    # Workers poll a queue's steps in order, so within a queue the tightest deadlines go first.
+    celery.conf.broker_transport_options = {"priority_steps": list(PRIORITY_STEPS), "sep": PRIORITY_SEP}
+
+if settings.job_retention_days > 0:
+    # Run with `celery beat`; one purge per interval keeps each pass small.
+    celery.conf.beat_schedule = {
+        "purge-expired-jobs": {
+            "task": "app.tasks.purge_expired_jobs",
+            "schedule": settings.job_purge_interval_seconds,
+        },
+    }
+
+if settings.admin_token:
+    register_worker_profiler()
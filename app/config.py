@@ -14,15 +14,75 @@ class Settings:
     api_port: int = int(os.getenv("API_PORT", "8000"))
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     celery_broker_url: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
-    celery_result_backend: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
+    # Empty disables the result backend; job state is read from the jobs table either way.
+    celery_result_backend: str | None = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1") or None
+    celery_serializer: str = os.getenv("CELERY_SERIALIZER", "json")
+    task_payload_mode: str = os.getenv("TASK_PAYLOAD_MODE", "inline")
+    task_compression: str | None = os.getenv("TASK_COMPRESSION") or None
+    task_compression_min_chars: int = int(os.getenv("TASK_COMPRESSION_MIN_CHARS", "1024"))
     model_version: str = os.getenv("MODEL_VERSION", "v1")
+    model_versions: str = os.getenv("MODEL_VERSIONS", "")
+    model_memory_budget_mb: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "512"))
+    model_preload: bool = os.getenv("MODEL_PRELOAD", "true").lower() == "true"
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    async_database_url: str | None = os.getenv("ASYNC_DATABASE_URL")
+    enqueue_max_workers: int = int(os.getenv("ENQUEUE_MAX_WORKERS", "8"))
     inference_timeout_seconds: int = int(os.getenv("INFERENCE_TIMEOUT_SECONDS", "15"))
     max_retries: int = int(os.getenv("MAX_RETRIES", "3"))
     retry_backoff_seconds: int = int(os.getenv("RETRY_BACKOFF_SECONDS", "2"))
     celery_task_always_eager: bool = os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true"
     celery_task_eager_propagates: bool = os.getenv("CELERY_TASK_EAGER_PROPAGATES", "false").lower() == "true"
+    metrics_dir: str | None = os.getenv("METRICS_DIR") or None
+    metrics_flush_interval_seconds: float = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "5"))
+    admin_token: str | None = os.getenv("ADMIN_TOKEN") or None
+    profile_max_seconds: float = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+    profile_interval_ms: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    log_sample_rates: str = os.getenv("LOG_SAMPLE_RATES", "")
+    batch_max_items: int = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+    inference_batch_size: int = int(os.getenv("INFERENCE_BATCH_SIZE", "1"))
+    inference_batch_wait_ms: int = int(os.getenv("INFERENCE_BATCH_WAIT_MS", "10"))
+    write_behind_enabled: bool = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    write_behind_max_delay_ms: int = int(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "200"))
+    write_behind_max_pending: int = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "500"))
+    result_cache_enabled: bool = os.getenv("RESULT_CACHE_ENABLED", "false").lower() == "true"
+    result_cache_max_entries: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+    result_cache_ttl_seconds: int = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    job_events_backend: str = os.getenv("JOB_EVENTS_BACKEND", "redis")
+    job_wait_max_seconds: int = int(os.getenv("JOB_WAIT_MAX_SECONDS", "30"))
+    job_stream_max_seconds: int = int(os.getenv("JOB_STREAM_MAX_SECONDS", "300"))
+    idempotency_cache_enabled: bool = os.getenv("IDEMPOTENCY_CACHE_ENABLED", "false").lower() == "true"
+    idempotency_cache_max_entries: int = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", "100000"))
+    idempotency_cache_ttl_seconds: int = int(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "600"))
+    idempotency_cache_redis_enabled: bool = os.getenv("IDEMPOTENCY_CACHE_REDIS_ENABLED", "false").lower() == "true"
+    job_list_max_limit: int = int(os.getenv("JOB_LIST_MAX_LIMIT", "500"))
+    job_retention_days: int = int(os.getenv("JOB_RETENTION_DAYS", "0"))
+    job_purge_batch_size: int = int(os.getenv("JOB_PURGE_BATCH_SIZE", "1000"))
+    job_purge_interval_seconds: int = int(os.getenv("JOB_PURGE_INTERVAL_SECONDS", "3600"))
+    job_archive_dir: str | None = os.getenv("JOB_ARCHIVE_DIR") or None
+    admission_enabled: bool = os.getenv("ADMISSION_ENABLED", "false").lower() == "true"
+    admission_max_queue_depth: int = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "10000"))
+    admission_max_in_flight: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "20000"))
+    admission_refresh_ms: int = int(os.getenv("ADMISSION_REFRESH_MS", "500"))
+    admission_max_retry_after_seconds: int = int(os.getenv("ADMISSION_MAX_RETRY_AFTER_SECONDS", "60"))
+    admission_client_rate: float = float(os.getenv("ADMISSION_CLIENT_RATE", "0"))
+    admission_client_burst: float = float(os.getenv("ADMISSION_CLIENT_BURST", "100"))
+    admission_client_header: str = os.getenv("ADMISSION_CLIENT_HEADER", "X-API-Key")
+    sync_max_concurrency: int = int(os.getenv("SYNC_MAX_CONCURRENCY", "4"))
+    sync_default_timeout_ms: int = int(os.getenv("SYNC_DEFAULT_TIMEOUT_MS", "50"))
+    sync_max_timeout_ms: int = int(os.getenv("SYNC_MAX_TIMEOUT_MS", "1000"))
+    result_cache_redis_enabled: bool = os.getenv("RESULT_CACHE_REDIS_ENABLED", "false").lower() == "true"
+    status_cache_enabled: bool = os.getenv("STATUS_CACHE_ENABLED", "false").lower() == "true"
+    status_cache_max_entries: int = int(os.getenv("STATUS_CACHE_MAX_ENTRIES", "100000"))
+    status_cache_ttl_seconds: int = int(os.getenv("STATUS_CACHE_TTL_SECONDS", "3600"))
+    status_cache_redis_enabled: bool = os.getenv("STATUS_CACHE_REDIS_ENABLED", "false").lower() == "true"
+    journal_enabled: bool = os.getenv("JOURNAL_ENABLED", "false").lower() == "true"
+    journal_flush_batch_size: int = int(os.getenv("JOURNAL_FLUSH_BATCH_SIZE", "500"))
+    journal_flush_interval_ms: int = int(os.getenv("JOURNAL_FLUSH_INTERVAL_MS", "50"))
+    journal_claim_idle_ms: int = int(os.getenv("JOURNAL_CLAIM_IDLE_MS", "30000"))
+    job_max_age_seconds: float = float(os.getenv("JOB_MAX_AGE_SECONDS", "0"))
+    edf_slack_buckets: str = os.getenv("EDF_SLACK_BUCKETS", "")
 
 
 settings = Settings()
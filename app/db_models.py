@@ -1,26 +1,50 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, func
+from sqlalchemy import DateTime, Float, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class JobRecord(Base):
     __tablename__ = "jobs"
+    # Keyset listing walks (created_at, job_id), optionally behind an equality filter.
+    __table_args__ = (
+        Index("ix_jobs_created_at_job_id", "created_at", "job_id"),
+        Index("ix_jobs_status_created_at_job_id", "status", "created_at", "job_id"),
+        Index("ix_jobs_model_version_created_at_job_id", "model_version", "created_at", "job_id"),
+    )
 
     job_id: Mapped[str] = mapped_column(String(64), primary_key=True)
     idempotency_key: Mapped[str | None] = mapped_column(String(128), index=True, unique=True, nullable=True)
     input_text: Mapped[str] = mapped_column(Text, nullable=False)
     model_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Latency class, which is also the Celery queue the job was routed to.
+    priority: Mapped[str] = mapped_column(String(16), nullable=False, default="default", server_default="default")
 
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="queued")
+    # Past this the job is marked expired instead of run.
+    deadline: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     result_label: Mapped[str | None] = mapped_column(String(32), nullable=True)
     result_score: Mapped[float | None] = mapped_column(Float, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
     retry_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Stage timestamps: broker enqueue, worker pickup, model start/finish, terminal write.
+    enqueued_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    inference_started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    inference_finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    persisted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Set client-side so every dialect stores microseconds and cursors compare exactly.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now()
+    )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
     )
@@ -0,0 +1,202 @@
+import argparse
+import json
+import random
+import re
+import struct
+from collections.abc import Iterable
+from itertools import chain
+from pathlib import Path
+from zlib import crc32
+
+import numpy as np
+
+from app.model import Prediction
+
+# File layout: magic, little-endian u32 header length, JSON header, zero padding to a
+# 64-byte boundary, then 2**bits little-endian float32 weights. The weights are mapped
+# read-only, so every process on a host shares the page cache's single copy.
+_MAGIC = b"IFHASHLR"
+_ALIGN = 64
+_TOKEN = re.compile(r"[a-z0-9']+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+_NGRAM_MULTIPLIER = np.uint64(0x01000193)
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    # murmur3's 32-bit finalizer, so every output bit depends on every input bit.
+    hashes = hashes ^ (hashes >> np.uint64(16))
+    hashes = (hashes * np.uint64(0x85EBCA6B)) & _MASK32
+    hashes = hashes ^ (hashes >> np.uint64(13))
+    hashes = (hashes * np.uint64(0xC2B2AE35)) & _MASK32
+    return hashes ^ (hashes >> np.uint64(16))
+
+
+def _featurize(texts: list[str], bits: int, ngrams: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Sparse rows as flat (row, column, sign) arrays. Only distinct tokens are hashed in
+    # Python (crc32, as hash() is salted per process); n-gram hashes are combined from
+    # them in NumPy, skipping windows that would span two texts. The top hash bit picks
+    # the sign so colliding features tend to cancel instead of piling up.
+    token_lists = [_TOKEN.findall(text.lower()) for text in texts]
+    lengths = np.fromiter(map(len, token_lists), dtype=np.intp, count=len(texts))
+    flat = list(chain.from_iterable(token_lists))
+    distinct = {token: index for index, token in enumerate(dict.fromkeys(flat))}
+    distinct_hashes = np.fromiter(map(crc32, map(str.encode, distinct)), dtype=np.uint64, count=len(distinct))
+    tokens = distinct_hashes[np.fromiter(map(distinct.__getitem__, flat), dtype=np.intp, count=len(flat))]
+    token_rows = np.repeat(np.arange(len(texts)), lengths)
+
+    hashes, rows = [tokens], [token_rows]
+    window = tokens
+    for n in range(2, ngrams + 1):
+        window = (window[:-1] * _NGRAM_MULTIPLIER + tokens[n - 1 :]) & _MASK32
+        same_text = token_rows[: len(window)] == token_rows[n - 1 :]
+        hashes.append(window[same_text])
+        rows.append(token_rows[: len(window)][same_text])
+
+    mixed = _mix(np.concatenate(hashes))
+    columns = (mixed & np.uint64((1 << bits) - 1)).astype(np.intp)
+    signs = np.where(mixed >> np.uint64(31), np.float32(1.0), np.float32(-1.0))
+    return np.concatenate(rows), columns, signs
+
+
+class HashedLinearModel:
+    # Logistic regression over hashed word uni- to n-grams.
+    def __init__(self, weights: np.ndarray, *, bias: float, ngrams: int, labels: tuple[str, str]) -> None:
+        bits = int(weights.shape[0]).bit_length() - 1
+        if weights.ndim != 1 or weights.shape[0] != 1 << bits:
+            raise ValueError("weights must be a 1-D array with a power-of-two length")
+        self.weights = weights
+        self.bits = bits
+        self.bias = bias
+        self.ngrams = ngrams
+        self.labels = labels
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.weights.nbytes
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HashedLinearModel":
+        with open(path, "rb") as handle:
+            magic = handle.read(len(_MAGIC))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a hashed linear model file")
+            (header_length,) = struct.unpack("<I", handle.read(4))
+            header = json.loads(handle.read(header_length))
+        offset = _data_offset(header_length)
+        weights = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(1 << header["bits"],))
+        return cls(weights, bias=header["bias"], ngrams=header["ngrams"], labels=tuple(header["labels"]))
+
+    def save(self, path: str | Path) -> None:
+        header = json.dumps(
+            {"bits": self.bits, "bias": self.bias, "ngrams": self.ngrams, "labels": list(self.labels)}
+        ).encode()
+        padding = _data_offset(len(header)) - len(_MAGIC) - 4 - len(header)
+        with open(path, "wb") as handle:
+            handle.write(_MAGIC + struct.pack("<I", len(header)) + header + b"\0" * padding)
+            handle.write(np.ascontiguousarray(self.weights, dtype="<f4").tobytes())
+
+    def probabilities(self, texts: list[str]) -> np.ndarray:
+        rows, columns, signs = _featurize(texts, self.bits, self.ngrams)
+        logits = np.bincount(rows, weights=self.weights[columns] * signs, minlength=len(texts)) + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def predict(self, text: str) -> Prediction:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str]) -> list[Prediction]:
+        if not texts:
+            return []
+        negative, positive = self.labels
+        return [
+            Prediction(label=positive, score=p) if p >= 0.5 else Prediction(label=negative, score=1.0 - p)
+            for p in self.probabilities(texts).tolist()
+        ]
+
+
+def _data_offset(header_length: int) -> int:
+    size = len(_MAGIC) + 4 + header_length
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def train(
+    texts: list[str],
+    targets: list[int],
+    *,
+    bits: int = 20,
+    ngrams: int = 2,
+    epochs: int = 5,
+    batch_size: int = 256,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+    labels: tuple[str, str] = ("ham", "spam"),
+    seed: int = 0,
+) -> HashedLinearModel:
+    # Mini-batch gradient descent on log loss; `targets` are 1 for labels[1].
+    weights = np.zeros(1 << bits, dtype=np.float64)
+    bias = 0.0
+    order = list(range(len(texts)))
+    y = np.asarray(targets, dtype=np.float64)
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        step = learning_rate / (1 + epoch) ** 0.5
+        for start in range(0, len(order), batch_size):
+            batch = order[start : start + batch_size]
+            rows, columns, signs = _featurize([texts[i] for i in batch], bits, ngrams)
+            logits = np.bincount(rows, weights=weights[columns] * signs, minlength=len(batch)) + bias
+            errors = 1.0 / (1.0 + np.exp(-logits)) - y[batch]
+            gradient = np.bincount(columns, weights=errors[rows] * signs, minlength=weights.shape[0])
+            weights -= step * (gradient / len(batch) + l2 * weights)
+            bias -= step * float(errors.mean())
+    return HashedLinearModel(weights.astype(np.float32), bias=bias, ngrams=ngrams, labels=labels)
+
+
+def _read_examples(path: Path) -> Iterable[tuple[str, str]]:
+    # JSON lines: {"text": "...", "label": "spam"}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                example = json.loads(line)
+                yield example["text"], example["label"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and export a hashed n-gram logistic model")
+    parser.add_argument("input", type=Path, help='JSON lines of {"text": ..., "label": ...}')
+    parser.add_argument("output", type=Path, help="model file to write (load with MODEL_VERSIONS=vN=hashed:PATH)")
+    parser.add_argument("--positive-label", default="spam")
+    parser.add_argument("--negative-label", default="ham")
+    parser.add_argument("--bits", type=int, default=20, help="2**bits weights")
+    parser.add_argument("--ngrams", type=int, default=2)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    texts, targets = [], []
+    for text, label in _read_examples(args.input):
+        if label not in (args.positive_label, args.negative_label):
+            raise SystemExit(f"unexpected label {label!r}")
+        texts.append(text)
+        targets.append(int(label == args.positive_label))
+
+    model = train(
+        texts,
+        targets,
+        bits=args.bits,
+        ngrams=args.ngrams,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+        labels=(args.negative_label, args.positive_label),
+    )
+    model.save(args.output)
+    predicted = [int(p >= 0.5) for p in model.probabilities(texts).tolist()]
+    accuracy = sum(p == t for p, t in zip(predicted, targets)) / len(targets) if targets else 0.0
+    print(json.dumps({"examples": len(texts), "train_accuracy": round(accuracy, 4), "output": str(args.output)}))
+
+
+if __name__ == "__main__":
+    main()
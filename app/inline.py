@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+from app.config import settings
+from app.model import Prediction
+from app.registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+
+def _predict(text: str, model_version: str) -> Prediction:
+    return model_registry.get(model_version).predict(text)
+
+
+class InlineInference:
+    def __init__(self, max_concurrency: int, predict: Callable[[str, str], Prediction] = _predict) -> None:
+        self._predict = predict
+        self._slots = BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="inline-inference")
+            if max_concurrency > 0
+            else None
+        )
+
+    async def predict(self, text: str, model_version: str, timeout_seconds: float) -> Prediction | None:
+        # None tells the caller to fall back to the queue.
+        if self._executor is None or not self._slots.acquire(blocking=False):
+            return None
+
+        future = self._executor.submit(self._predict, text, model_version)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout_seconds)
+        except TimeoutError:
+            return None
+        except Exception:
+            logger.exception("inline_inference_failed")
+            return None
+
+
+inline_inference = InlineInference(settings.sync_max_concurrency)
@@ -1,19 +1,103 @@
-from sqlalchemy import select
+from datetime import datetime, timezone
+
+from sqlalchemy import Row, and_, bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.db_models import JobRecord
 
+TERMINAL_STATUSES = frozenset({"succeeded", "failed", "expired"})
+
 
 def get_job(db: Session, job_id: str) -> JobRecord | None:
     return db.get(JobRecord, job_id)
 
 
+def _status_columns() -> list:
+    # Everything a status response shows; leaves out the potentially large input_text.
+    return [column for column in JobRecord.__table__.c if column.name not in ("input_text", "idempotency_key")]
+
+
+def get_job_status_row(db: Session, job_id: str) -> Row | None:
+    table = JobRecord.__table__
+    return db.execute(select(*_status_columns()).where(table.c.job_id == job_id)).first()
+
+
+def get_job_status_rows(db: Session, job_ids: list[str]) -> list[Row]:
+    if not job_ids:
+        return []
+    table = JobRecord.__table__
+    return list(db.execute(select(*_status_columns()).where(table.c.job_id.in_(job_ids))))
+
+
+def get_input_text(db: Session, job_id: str) -> str | None:
+    table = JobRecord.__table__
+    return db.execute(select(table.c.input_text).where(table.c.job_id == job_id)).scalar_one_or_none()
+
+
 def get_job_by_idempotency_key(db: Session, idempotency_key: str) -> JobRecord | None:
     stmt = select(JobRecord).where(JobRecord.idempotency_key == idempotency_key)
     return db.execute(stmt).scalar_one_or_none()
 
 
+def get_jobs_by_idempotency_keys(db: Session, idempotency_keys: list[str]) -> dict[str, JobRecord]:
+    if not idempotency_keys:
+        return {}
+    stmt = select(JobRecord).where(JobRecord.idempotency_key.in_(idempotency_keys))
+    return {record.idempotency_key: record for record in db.execute(stmt).scalars()}
+
+
+def count_in_flight_jobs(db: Session) -> dict[str, int]:
+    # Queued and started jobs per priority lane.
+    table = JobRecord.__table__
+    stmt = (
+        select(table.c.priority, func.count())
+        .where(table.c.status.in_(("queued", "started")))
+        .group_by(table.c.priority)
+    )
+    return {priority: count for priority, count in db.execute(stmt)}
+
+
+def list_jobs(
+    db: Session,
+    *,
+    limit: int,
+    status: str | None = None,
+    model_version: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    after: tuple[datetime, str] | None = None,
+    include_input: bool = False,
+) -> list[dict]:
+    # Newest first. Paging seeks past the last (created_at, job_id) seen instead of using
+    # OFFSET, so every page is one index range scan of `limit` rows.
+    table = JobRecord.__table__
+    columns = [column for column in table.c if include_input or column.name != "input_text"]
+    stmt = select(*columns).order_by(table.c.created_at.desc(), table.c.job_id.desc()).limit(limit)
+    if status is not None:
+        stmt = stmt.where(table.c.status == status)
+    if model_version is not None:
+        stmt = stmt.where(table.c.model_version == model_version)
+    if created_after is not None:
+        stmt = stmt.where(table.c.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(table.c.created_at < created_before)
+    if after is not None:
+        stmt = stmt.where(tuple_(table.c.created_at, table.c.job_id) < tuple_(*after))
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+def _upsert_insert(db: Session):
+    # Dialects with INSERT ... ON CONFLICT DO NOTHING ... RETURNING.
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
 def create_job(
     db: Session,
     *,
@@ -21,21 +105,52 @@ def create_job(
     input_text: str,
     model_version: str,
     idempotency_key: str | None,
+    priority: str = "default",
+    status: str = "queued",
+    result_label: str | None = None,
+    result_score: float | None = None,
+    deadline: datetime | None = None,
 ) -> JobRecord:
-    record = JobRecord(
-        job_id=job_id,
-        input_text=input_text,
-        model_version=model_version,
-        idempotency_key=idempotency_key,
-        status="queued",
-    )
+    values = {
+        "job_id": job_id,
+        "input_text": input_text,
+        "model_version": model_version,
+        "idempotency_key": idempotency_key,
+        "priority": priority,
+        "status": status,
+        "result_label": result_label,
+        "result_score": result_score,
+        "deadline": deadline,
+    }
+    dialect_insert = _upsert_insert(db)
+    if dialect_insert is None:
+        return _create_job_with_retry(db, values)
+
+    # One round trip returns the new row; a taken key costs one extra lookup.
+    table = JobRecord.__table__
+    stmt = dialect_insert(table).values(**values).returning(*table.c)
+    if idempotency_key:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.idempotency_key])
+    row = db.execute(stmt).mappings().first()
+    db.commit()
+    if row is not None:
+        return JobRecord(**row)
+
+    existing = get_job_by_idempotency_key(db, idempotency_key)
+    if existing is None:
+        raise RuntimeError(f"idempotency key {idempotency_key!r} conflicted but no job owns it")
+    return existing
+
+
+def _create_job_with_retry(db: Session, values: dict) -> JobRecord:
+    record = JobRecord(**values)
     db.add(record)
     try:
         db.commit()
     except IntegrityError:
         db.rollback()
-        if idempotency_key:
-            existing = get_job_by_idempotency_key(db, idempotency_key)
+        if values["idempotency_key"]:
+            existing = get_job_by_idempotency_key(db, values["idempotency_key"])
             if existing:
                 return existing
         raise
@@ -43,34 +158,268 @@ def create_job(
     return record
 
 
-def update_job_started(db: Session, job_id: str, retry_count: int) -> None:
-    record = get_job(db, job_id)
-    if not record:
-        return
+def create_jobs(db: Session, jobs: list[dict]) -> list[tuple[str, str]]:
+    # One multi-row INSERT for the whole batch; returns (job_id, status) in input order,
+    # pointing at the existing job wherever an idempotency key was already taken.
+    rows = [
+        {"priority": "default", "status": "queued", "result_label": None, "result_score": None, "deadline": None, **job}
+        for job in jobs
+    ]
+    dialect_insert = _upsert_insert(db)
+    if dialect_insert is None:
+        try:
+            db.execute(insert(JobRecord).values(rows))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            # A concurrent submission claimed one of the keys; resolve row by row.
+            records = [_create_job_with_retry(db, row) for row in rows]
+            return [(record.job_id, record.status) for record in records]
+        return [(row["job_id"], row["status"]) for row in rows]
+
+    table = JobRecord.__table__
+    stmt = (
+        dialect_insert(table)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[table.c.idempotency_key])
+        .returning(table.c.job_id)
+    )
+    inserted = set(db.execute(stmt).scalars())
+    db.commit()
+
+    winners = get_jobs_by_idempotency_keys(
+        db, [row["idempotency_key"] for row in rows if row["job_id"] not in inserted]
+    )
+    results = []
+    for row in rows:
+        if row["job_id"] in inserted:
+            results.append((row["job_id"], row["status"]))
+        else:
+            winner = winners[row["idempotency_key"]]
+            results.append((winner.job_id, winner.status))
+    return results
+
+
+def insert_missing_jobs(db: Session, jobs: list[dict]) -> int:
+    # Inserts journaled jobs in one commit, skipping job ids already stored, so replaying
+    # a journal entry (or racing a worker that materialized it first) changes nothing.
+    defaults = {"priority": "default", "status": "queued", "result_label": None, "result_score": None, "deadline": None}
+    rows = list({job["job_id"]: {**defaults, **job} for job in jobs}.values())
+    if not rows:
+        return 0
+    table = JobRecord.__table__
+    dialect_insert = _upsert_insert(db)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(rows).on_conflict_do_nothing(index_elements=[table.c.job_id])
+        inserted = db.execute(stmt.returning(table.c.job_id)).all()
+        db.commit()
+        return len(inserted)
+
+    stmt = select(table.c.job_id).where(table.c.job_id.in_([row["job_id"] for row in rows]))
+    existing = set(db.execute(stmt).scalars())
+    missing = [row for row in rows if row["job_id"] not in existing]
+    if missing:
+        db.execute(insert(table).values(missing))
+    db.commit()
+    return len(missing)
+
 
-    record.status = "started"
-    record.retry_count = retry_count
+def _unfinished():
+    # Plain comparisons rather than NOT IN, whose expanding parameter executemany rejects.
+    return and_(*(JobRecord.__table__.c.status != status for status in sorted(TERMINAL_STATUSES)))
+
+
+def _transition(db: Session, job_id: str, **values) -> bool:
+    # One UPDATE per transition; no SELECT and no ORM identity-map load. Finished rows are
+    # written once: a redelivered task cannot move them back to started or change the outcome.
+    table = JobRecord.__table__
+    stmt = (
+        update(table)
+        .where(table.c.job_id == job_id, _unfinished())
+        .values(**values)
+    )
+    if db.get_bind().dialect.update_returning:
+        found = db.execute(stmt.returning(table.c.job_id)).first() is not None
+    else:
+        found = db.execute(stmt).rowcount > 0
     db.commit()
+    return found
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def update_job_started(
+    db: Session,
+    job_id: str,
+    retry_count: int,
+    *,
+    enqueued_at: datetime | None = None,
+    started_at: datetime | None = None,
+) -> bool:
+    return _transition(
+        db,
+        job_id,
+        status="started",
+        retry_count=retry_count,
+        enqueued_at=enqueued_at,
+        started_at=started_at or _utcnow(),
+    )
+
+
+def update_job_succeeded(
+    db: Session,
+    job_id: str,
+    label: str,
+    score: float,
+    *,
+    inference_started_at: datetime | None = None,
+    inference_finished_at: datetime | None = None,
+) -> bool:
+    return _transition(
+        db,
+        job_id,
+        status="succeeded",
+        result_label=label,
+        result_score=score,
+        error=None,
+        inference_started_at=inference_started_at,
+        inference_finished_at=inference_finished_at,
+        persisted_at=_utcnow(),
+    )
 
 
-def update_job_succeeded(db: Session, job_id: str, label: str, score: float) -> None:
-    record = get_job(db, job_id)
-    if not record:
+def update_job_failed(
+    db: Session,
+    job_id: str,
+    error: str,
+    retry_count: int,
+    *,
+    inference_started_at: datetime | None = None,
+    inference_finished_at: datetime | None = None,
+) -> bool:
+    return _transition(
+        db,
+        job_id,
+        status="failed",
+        error=error,
+        retry_count=retry_count,
+        inference_started_at=inference_started_at,
+        inference_finished_at=inference_finished_at,
+        persisted_at=_utcnow(),
+    )
+
+
+def update_job_expired(db: Session, job_id: str, error: str, retry_count: int) -> bool:
+    return _transition(db, job_id, status="expired", error=error, retry_count=retry_count, persisted_at=_utcnow())
+
+
+def apply_job_updates(db: Session, updates: dict[str, dict]) -> None:
+    # Many jobs per commit: one executemany UPDATE per distinct column set.
+    if not updates:
         return
+    table = JobRecord.__table__
+    persisted_at = _utcnow()
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for job_id, values in updates.items():
+        if values.get("status") in TERMINAL_STATUSES:
+            values = {**values, "persisted_at": persisted_at}
+        columns = tuple(sorted(values))
+        params = {"b_job_id": job_id, **{f"b_{column}": value for column, value in values.items()}}
+        groups.setdefault(columns, []).append(params)
 
-    record.status = "succeeded"
-    record.result_label = label
-    record.result_score = score
-    record.error = None
+    for columns, rows in groups.items():
+        # Nothing overwrites a terminal state written elsewhere.
+        stmt = (
+            update(table)
+            .where(table.c.job_id == bindparam("b_job_id"), _unfinished())
+            .values({column: bindparam(f"b_{column}") for column in columns})
+        )
+        db.execute(stmt, rows)
     db.commit()
 
 
-def update_job_failed(db: Session, job_id: str, error: str, retry_count: int) -> None:
-    record = get_job(db, job_id)
-    if not record:
+def update_jobs_started(db: Session, jobs: list[tuple[str, int, datetime | None]]) -> None:
+    # (job_id, retry_count, enqueued_at) per job; all share one pickup time.
+    if not jobs:
         return
+    table = JobRecord.__table__
+    stmt = (
+        update(table)
+        .where(table.c.job_id == bindparam("b_job_id"), _unfinished())
+        .values(
+            status="started",
+            retry_count=bindparam("b_retry_count"),
+            enqueued_at=bindparam("b_enqueued_at"),
+            started_at=_utcnow(),
+        )
+    )
+    db.execute(
+        stmt,
+        [
+            {"b_job_id": job_id, "b_retry_count": retry_count, "b_enqueued_at": enqueued_at}
+            for job_id, retry_count, enqueued_at in jobs
+        ],
+    )
+    db.commit()
 
-    record.status = "failed"
-    record.error = error
-    record.retry_count = retry_count
+
+def update_jobs_succeeded(
+    db: Session,
+    results: list[tuple[str, str, float]],
+    *,
+    inference_started_at: datetime | None = None,
+    inference_finished_at: datetime | None = None,
+) -> set[str]:
+    # Returns the job ids whose rows were written.
+    if not results:
+        return set()
+    table = JobRecord.__table__
+    persisted_at = _utcnow()
+    # Skip rows a timed-out task has already marked failed.
+    stmt = (
+        update(table)
+        .where(table.c.job_id == bindparam("b_job_id"), table.c.status == "started")
+        .values(
+            status="succeeded",
+            result_label=bindparam("b_label"),
+            result_score=bindparam("b_score"),
+            error=None,
+            inference_started_at=inference_started_at,
+            inference_finished_at=inference_finished_at,
+            persisted_at=persisted_at,
+        )
+    )
+    db.execute(
+        stmt,
+        [{"b_job_id": job_id, "b_label": label, "b_score": score} for job_id, label, score in results],
+    )
+    # executemany has no per-row counts; the rows this call wrote carry its persisted_at.
+    written = select(table.c.job_id).where(
+        table.c.job_id.in_([job_id for job_id, _, _ in results]), table.c.persisted_at == persisted_at
+    )
+    stored = set(db.execute(written).scalars())
     db.commit()
+    return stored
+
+
+def claim_expired_jobs(db: Session, created_before: datetime, limit: int) -> list[dict]:
+    # Oldest terminal rows first via the created_at index; on Postgres, rows another
+    # purger holds are skipped instead of waited on.
+    table = JobRecord.__table__
+    stmt = (
+        select(table)
+        .where(table.c.created_at < created_before, table.c.status.in_(TERMINAL_STATUSES))
+        .order_by(table.c.created_at)
+        .limit(limit)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+def delete_jobs(db: Session, job_ids: list[str]) -> int:
+    if not job_ids:
+        return 0
+    return db.execute(delete(JobRecord.__table__).where(JobRecord.__table__.c.job_id.in_(job_ids))).rowcount
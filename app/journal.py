@@ -0,0 +1,213 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import ResponseError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.job_store import insert_missing_jobs
+from app.metrics import metrics
+from app.redis_pool import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+_STREAM = "inferflow:journal"
+_JOBS = "inferflow:journal:jobs"
+_GROUP = "flushers"
+
+
+def consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _decode(raw: bytes) -> dict:
+    job = json.loads(raw)
+    job["created_at"] = datetime.fromisoformat(job["created_at"])
+    if job.get("deadline"):
+        job["deadline"] = datetime.fromisoformat(job["deadline"])
+    return job
+
+
+# Accepted jobs are written to Redis instead of the database: the record into a hash
+# (read by status lookups and workers until flushed) and its id onto a stream, in one
+# MULTI. Flushers in a consumer group move stream entries into `jobs`, one commit per
+# batch of whatever arrived during the previous commit. An entry is acked and deleted
+# only after its batch commits, so a crashed flusher's entries stay pending until another
+# claims and replays them; inserts skip existing job ids, so replays are harmless.
+# Acceptance is as durable as Redis, i.e. run it with appendonly and appendfsync.
+class SubmissionJournal:
+    def __init__(
+        self,
+        client: Redis,
+        session_factory: Callable[[], Session],
+        *,
+        async_client: Callable[[], AsyncRedis] = get_async_redis,
+        batch_size: int = 500,
+        flush_interval_ms: int = 50,
+        claim_idle_ms: int = 30_000,
+    ) -> None:
+        self._client = client
+        self._async_client = async_client
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._flush_interval_ms = flush_interval_ms
+        self._claim_idle_ms = claim_idle_ms
+        self._group_ready = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    async def append(self, jobs: list[dict]) -> None:
+        now = datetime.now(timezone.utc)
+        records = {
+            job["job_id"]: json.dumps({**job, "created_at": job.get("created_at", now)}, default=datetime.isoformat)
+            for job in jobs
+        }
+        if not records:
+            return
+        pipe = self._async_client().pipeline(transaction=True)
+        pipe.hset(_JOBS, mapping=records)
+        for job_id in records:
+            pipe.xadd(_STREAM, {"job_id": job_id})
+        await pipe.execute()
+
+    async def aget_many(self, job_ids: list[str]) -> dict[str, dict]:
+        raws = await self._async_client().hmget(_JOBS, job_ids)
+        return {job_id: _decode(raw) for job_id, raw in zip(job_ids, raws) if raw is not None}
+
+    def get(self, job_id: str) -> dict | None:
+        raw = self._client.hget(_JOBS, job_id)
+        return _decode(raw) if raw is not None else None
+
+    def materialize(self, db: Session, job_id: str) -> bool:
+        # Stores a job that is still only journaled, so its row can be updated now.
+        job = self.get(job_id)
+        if job is None:
+            return False
+        insert_missing_jobs(db, [job])
+        return True
+
+    def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            self._client.xgroup_create(_STREAM, _GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        self._group_ready = True
+
+    def _next_entries(self, consumer: str, claim_idle_ms: int, block_ms: int | None) -> list[tuple[bytes, dict]]:
+        # Entries left pending by a flusher that died mid-batch come first.
+        _, claimed, *_ = self._client.xautoclaim(
+            _STREAM, _GROUP, consumer, min_idle_time=claim_idle_ms, start_id="0-0", count=self._batch_size
+        )
+        if claimed:
+            return claimed
+        read = self._client.xreadgroup(_GROUP, consumer, {_STREAM: ">"}, count=self._batch_size, block=block_ms)
+        return read[0][1] if read else []
+
+    def flush(self, consumer: str, *, claim_idle_ms: int | None = None, block_ms: int | None = None) -> int:
+        self._ensure_group()
+        idle = self._claim_idle_ms if claim_idle_ms is None else claim_idle_ms
+        entries = self._next_entries(consumer, idle, block_ms)
+        if not entries:
+            return 0
+        entry_ids = [entry_id for entry_id, _ in entries]
+        # Redis 6.2 still hands out claimed entries that were deleted, without fields.
+        job_ids = [fields[b"job_id"].decode() for _, fields in entries if fields]
+        raws = self._client.hmget(_JOBS, job_ids) if job_ids else []
+        jobs = [_decode(raw) for raw in raws if raw is not None]
+
+        db = self._session_factory()
+        try:
+            insert_missing_jobs(db, jobs)
+        finally:
+            db.close()
+
+        pipe = self._client.pipeline(transaction=True)
+        pipe.xack(_STREAM, _GROUP, *entry_ids)
+        pipe.xdel(_STREAM, *entry_ids)
+        if job_ids:
+            pipe.hdel(_JOBS, *job_ids)
+        pipe.execute()
+        metrics.inc_journal_flushed(len(jobs))
+        return len(entries)
+
+    def drain(self, consumer: str, claim_idle_ms: int | None = None) -> int:
+        # Flushes until nothing is pending; claim_idle_ms=0 also takes over every other
+        # consumer's unacknowledged entries, which is how a crash is recovered by hand.
+        total = 0
+        while count := self.flush(consumer, claim_idle_ms=claim_idle_ms):
+            total += count
+        return total
+
+    def _run(self, consumer: str) -> None:
+        while not self._stop.is_set():
+            try:
+                self.flush(consumer, block_ms=self._flush_interval_ms)
+            except Exception:
+                logger.exception("journal_flush_failed")
+                self._stop.wait(self._flush_interval_ms / 1000)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(consumer_name(),), name="journal-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            self.drain(consumer_name())
+        except Exception:
+            # Whatever is left stays pending and is replayed by another flusher.
+            logger.exception("journal_flush_failed")
+
+
+submission_journal = (
+    SubmissionJournal(
+        Redis.from_url(settings.redis_url),
+        SessionLocal,
+        batch_size=settings.journal_flush_batch_size,
+        flush_interval_ms=settings.journal_flush_interval_ms,
+        claim_idle_ms=settings.journal_claim_idle_ms,
+    )
+    if settings.journal_enabled
+    else None
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flush journaled submissions into the jobs table")
+    parser.add_argument("--drain", action="store_true", help="flush everything pending, then exit")
+    parser.add_argument(
+        "--claim-idle-ms", type=int, default=None, help="take over entries pending this long (default from settings)"
+    )
+    args = parser.parse_args()
+    journal = submission_journal or SubmissionJournal(Redis.from_url(settings.redis_url), SessionLocal)
+    if args.drain:
+        print(json.dumps({"flushed": journal.drain(consumer_name(), claim_idle_ms=args.claim_idle_ms)}))
+        return
+    journal.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        journal.stop()
+
+
+if __name__ == "__main__":
+    main()
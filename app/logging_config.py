@@ -1,32 +1,139 @@
-import json
+import atexit
 import logging
+import os
+import queue
+import random
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
 
 from app.config import settings
+from app.metrics import metrics
+
+_EXTRAS = ("job_id", "status", "priority", "model_version")
 
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
+        # The timestamp comes from the record, so formatting later on another thread
+        # still reports when the event happened.
         payload = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
-        if hasattr(record, "job_id"):
-            payload["job_id"] = record.job_id
-        if hasattr(record, "status"):
-            payload["status"] = record.status
+        for name in _EXTRAS:
+            if name in record.__dict__:
+                payload[name] = record.__dict__[name]
         if record.exc_info:
             payload["exception"] = self.formatException(record.exc_info)
-        return json.dumps(payload)
+        return orjson.dumps(payload, default=str).decode()
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    # "inference_succeeded=0.01,job_queued=0.1": keep that fraction of each message.
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        message, _, rate = entry.partition("=")
+        value = float(rate)
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"sample rate for {message!r} must be between 0 and 1")
+        rates[message.strip()] = value
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    # Matches on the unformatted message, which is the event name at every call site.
+    # Warnings and errors are always kept.
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.msg) if record.levelno < logging.WARNING else None
+        return rate is None or random.random() < rate
+
+
+class BoundedQueueHandler(QueueHandler):
+    # Hands records to a background thread. A SimpleQueue put is a single C call, unlike
+    # queue.Queue's lock and condition; past `max_size` queued records (checked without
+    # a lock, so approximate) new ones are dropped and counted rather than buffered.
+    def __init__(self, max_size: int) -> None:
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only render %-args now, as they may be mutated later; JSON encoding and
+        # traceback formatting happen on the listener thread.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() < self.max_size:
+            self.queue.put(record)
+        else:
+            metrics.inc_log_dropped()
 
 
-def configure_logging() -> None:
+_listener: QueueListener | None = None
+_queue_handler: BoundedQueueHandler | None = None
+
+
+def _start_listener(handler: BoundedQueueHandler, target: logging.Handler) -> None:
+    global _listener, _queue_handler
+    _listener = QueueListener(handler.queue, target, respect_handler_level=True)
+    _queue_handler = handler
+    _listener.start()
+
+
+def stop_logging() -> None:
+    # Flushes everything queued so far; safe to call more than once.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(
+    queue_size: int = settings.log_queue_size,
+    sample_rates: str = settings.log_sample_rates,
+) -> None:
+    stop_logging()
     root = logging.getLogger()
     root.handlers.clear()
     root.setLevel(getattr(logging, settings.log_level.upper(), logging.INFO))
+    # The JSON lines carry none of these, so skip collecting them for every record
+    # (the caller lookup walks the stack).
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
-    handler = logging.StreamHandler()
-    handler.setFormatter(JsonFormatter())
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter())
+    if queue_size <= 0:
+        handler: logging.Handler = stream
+    else:
+        handler = BoundedQueueHandler(queue_size)
+        _start_listener(handler, stream)
+    rates = parse_sample_rates(sample_rates)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
     root.addHandler(handler)
+
+
+def _restart_in_child() -> None:
+    # The listener thread does not survive fork, and its queue's lock may have been
+    # held at that moment, so a forked child (e.g. a prefork worker) gets fresh ones.
+    if _listener is None or _queue_handler is None:
+        return
+    _queue_handler.queue = queue.SimpleQueue()
+    _start_listener(_queue_handler, _listener.handlers[0])
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(stop_logging)
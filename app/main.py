@@ -1,117 +1,811 @@
+import asyncio
+import base64
+import hmac
+import json
 import logging
-from collections.abc import AsyncIterator
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Literal
 from uuid import uuid4
 
 from celery.result import AsyncResult
-from fastapi import Depends, FastAPI, Header
-from redis import Redis
-from sqlalchemy import text
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from sqlalchemy import Row, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.admission import broker_queues, client_buckets, load_monitor
+from app.cache import StatusCache, idempotency_cache, result_cache, status_cache
 from app.celery_app import celery
 from app.config import settings
-from app.database import get_db, init_db
+from app.database import AsyncSessionLocal, async_engine, get_async_db, init_db
+from app.db_models import JobRecord
+from app.inline import inline_inference
+from app.journal import submission_journal
 from app.job_store import (
+    TERMINAL_STATUSES,
+    count_in_flight_jobs,
     create_job,
-    get_job,
-    get_job_by_idempotency_key,
+    create_jobs,
+    get_job_status_row,
+    get_job_status_rows,
+    insert_missing_jobs,
+    list_jobs,
     update_job_failed,
 )
 from app.logging_config import configure_logging
-from app.metrics import metrics
-from app.schemas import InferenceAcceptedResponse, InferenceRequest, JobStatusResponse
-from app.tasks import run_inference
+from app.metrics import metrics, render_queue_depths
+from app.notifications import job_notifier
+from app.profiling import sample_stacks
+from app.redis_pool import close_async_redis, get_async_redis
+from app.registry import model_registry
+from app.schemas import (
+    PRIORITIES,
+    BatchInferenceAcceptedResponse,
+    BatchInferenceItem,
+    BatchInferenceRequest,
+    InferenceAcceptedResponse,
+    InferenceRequest,
+    JobListResponse,
+    JobStatusResponse,
+    JobSummary,
+)
+from app.tasks import deadline_options, run_inference, task_payload
 
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
+_KEEPALIVE_SECONDS = 15.0
+# Celery has no asyncio API; broker publishes get their own small pool instead of
+# competing with the request threadpool.
+_enqueue_executor = ThreadPoolExecutor(max_workers=settings.enqueue_max_workers, thread_name_prefix="enqueue")
+
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     init_db()
+    if settings.sync_max_concurrency > 0 and settings.model_preload:
+        # Sync-mode requests run the model in this process.
+        await run_in_threadpool(model_registry.preload)
+    if submission_journal:
+        submission_journal.start()
     yield
+    if submission_journal:
+        await run_in_threadpool(submission_journal.stop)
+    await close_async_redis()
+    await async_engine.dispose()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 
+async def _run_enqueue(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(_enqueue_executor, partial(fn, *args, **kwargs))
+
+
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
     return {"status": "ok", "service": settings.app_name}
 
 
 @app.get("/ready")
-def ready(db: Session = Depends(get_db)) -> dict:
-    db.execute(text("SELECT 1"))
-    redis_client = Redis.from_url(settings.redis_url)
-    redis_client.ping()
+async def ready(db: AsyncSession = Depends(get_async_db)) -> dict:
+    await db.execute(text("SELECT 1"))
+    await get_async_redis().ping()
     return {"status": "ready", "service": settings.app_name}
 
 
-@app.get("/metrics")
-def get_metrics() -> dict[str, int]:
-    return metrics.snapshot()
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    # Reads every process's snapshot file; keep the filesystem off the event loop.
+    body = await run_in_threadpool(metrics.render_prometheus)
+    depths = await broker_queues.depths(PRIORITIES)
+    if depths is not None:
+        body += render_queue_depths(depths)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=5, gt=0, le=settings.profile_max_seconds),
+    target: Literal["api", "worker"] = "api",
+    admin_token: str | None = Header(default=None, alias="X-Admin-Token"),
+) -> PlainTextResponse:
+    # Disabled (404) unless ADMIN_TOKEN is set; sampling only runs for the requested window.
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+    if target == "api":
+        body = await run_in_threadpool(sample_stacks, seconds, settings.profile_interval_ms / 1000)
+    else:
+        replies = await run_in_threadpool(
+            celery.control.broadcast, "profile", arguments={"seconds": seconds}, reply=True, timeout=seconds + 5
+        )
+        # Workers whose pool runs tasks outside the sampled process refuse (see profile_worker).
+        refused = [
+            f"{worker}: {reply['error']}" for item in replies for worker, reply in item.items() if "error" in reply
+        ]
+        if refused:
+            raise HTTPException(status_code=400, detail="; ".join(refused))
+        # One flamegraph across workers, rooted at each worker's hostname.
+        body = "".join(
+            f"{worker};{line}\n"
+            for reply in replies
+            for worker, folded in reply.items()
+            for line in folded.get("ok", "").splitlines()
+        )
+    return PlainTextResponse(body)
+
+
+def _job_result(record: JobRecord | Row) -> dict | None:
+    if record.result_label is None or record.result_score is None:
+        return None
+    return {
+        "label": record.result_label,
+        "score": record.result_score,
+        "model_version": record.model_version,
+    }
+
+
+def _accepted(record: JobRecord | Row, idempotency_key: str | None) -> InferenceAcceptedResponse:
+    return InferenceAcceptedResponse(
+        job_id=record.job_id, status=record.status, idempotency_key=idempotency_key, result=_job_result(record)
+    )
+
+
+async def _seen_job(db: AsyncSession, job_id: str, idempotency_key: str) -> InferenceAcceptedResponse | None:
+    # A recently seen key answers with the job's current state, as the insert path does. A
+    # finished job comes from the status cache without touching the database; only jobs
+    # still running (or not cached) cost a primary-key read.
+    cached = await status_cache.aget(job_id) if status_cache else None
+    if cached:
+        status = json.loads(cached[0])
+        return InferenceAcceptedResponse(
+            job_id=job_id, status=status["status"], idempotency_key=idempotency_key, result=status["result"]
+        )
+    row = await db.run_sync(get_job_status_row, job_id)
+    return _accepted(row, idempotency_key) if row else None
+
+
+def _record_finished_job(
+    db: Session,
+    *,
+    text: str,
+    model_version: str,
+    idempotency_key: str | None,
+    priority: str,
+    label: str,
+    score: float,
+) -> InferenceAcceptedResponse:
+    job_id = str(uuid4())
+    record = create_job(
+        db,
+        job_id=job_id,
+        input_text=text,
+        model_version=model_version,
+        idempotency_key=idempotency_key,
+        priority=priority,
+        status="succeeded",
+        result_label=label,
+        result_score=score,
+    )
+    if record.job_id == job_id:
+        metrics.inc_submitted()
+        metrics.inc_succeeded()
+    return _accepted(record, idempotency_key)
+
+
+def _journaled(idempotency_key: str | None) -> bool:
+    # Keyed submissions keep the direct insert, which is what enforces key uniqueness.
+    return submission_journal is not None and not idempotency_key
+
+
+async def _store_finished_job(
+    db: AsyncSession,
+    *,
+    text: str,
+    model_version: str,
+    idempotency_key: str | None,
+    priority: str,
+    label: str,
+    score: float,
+) -> InferenceAcceptedResponse:
+    if not _journaled(idempotency_key):
+        return await db.run_sync(
+            _record_finished_job,
+            text=text,
+            model_version=model_version,
+            idempotency_key=idempotency_key,
+            priority=priority,
+            label=label,
+            score=score,
+        )
+    job_id = str(uuid4())
+    await submission_journal.append(
+        [
+            {
+                "job_id": job_id,
+                "input_text": text,
+                "model_version": model_version,
+                "priority": priority,
+                "status": "succeeded",
+                "result_label": label,
+                "result_score": score,
+            }
+        ]
+    )
+    metrics.inc_submitted()
+    metrics.inc_succeeded()
+    result = {"label": label, "score": score, "model_version": model_version}
+    return InferenceAcceptedResponse(job_id=job_id, status="succeeded", result=result)
+
+
+async def _remember_key(idempotency_key: str | None, response: InferenceAcceptedResponse) -> None:
+    if idempotency_key and idempotency_cache:
+        await idempotency_cache.aset(idempotency_key, response.job_id, response.status)
+
+
+def _shed(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=429, detail="Too many requests, retry later", headers={"Retry-After": str(retry_after)}
+    )
+
+
+def _check_client_rate(request: Request, cost: int) -> None:
+    if not client_buckets:
+        return
+    client = request.headers.get(settings.admission_client_header) or (request.client.host if request.client else "")
+    wait = client_buckets.take(client, cost)
+    if wait:
+        metrics.inc_shed_rate_limited()
+        raise _shed(max(1, math.ceil(wait)))
+
+
+def _deadline(deadline: datetime | None, max_age_seconds: float | None) -> datetime | None:
+    # The earlier of the client's deadline and max age; the default max age only applies
+    # when the client sent neither, so it never tightens an explicit deadline.
+    now = datetime.now(timezone.utc)
+    max_age = max_age_seconds
+    if deadline is None and max_age_seconds is None:
+        max_age = settings.job_max_age_seconds
+    bounds = [now + timedelta(seconds=max_age)] if max_age else []
+    if deadline is not None:
+        # A deadline without an offset is taken as UTC.
+        bounds.append(deadline if deadline.tzinfo else deadline.replace(tzinfo=timezone.utc))
+    if not bounds:
+        return None
+    if min(bounds) <= now:
+        raise HTTPException(status_code=422, detail="deadline has already passed")
+    return min(bounds)
+
+
+def _task_kwargs(submitted_at: float, deadline: datetime | None) -> dict:
+    kwargs: dict = {"submitted_at": submitted_at}
+    if deadline is not None:
+        kwargs["deadline"] = deadline.timestamp()
+    return kwargs
+
+
+async def _check_capacity(db: AsyncSession, priority: str, count: int) -> None:
+    # Shed before the insert so an overloaded queue does not also grow the jobs table.
+    if not load_monitor:
+        return
+    await load_monitor.refresh(partial(db.run_sync, count_in_flight_jobs))
+    retry_after = load_monitor.retry_after(priority)
+    if retry_after is not None:
+        metrics.inc_shed_overloaded()
+        raise _shed(retry_after)
+    load_monitor.note_admitted(priority, count)
+    metrics.inc_admitted(count)
 
 
 @app.post("/v1/inference", response_model=InferenceAcceptedResponse)
-def create_inference_job(
+async def create_inference_job(
     payload: InferenceRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
 ) -> InferenceAcceptedResponse:
     model_version = payload.model_version or settings.model_version
+    _check_client_rate(request, 1)
+    deadline = _deadline(payload.deadline, payload.max_age_seconds)
+
+    if idempotency_key and idempotency_cache:
+        seen = await idempotency_cache.aget(idempotency_key)
+        response = await _seen_job(db, seen["job_id"], idempotency_key) if seen else None
+        if response:
+            return response
 
-    if idempotency_key:
-        # Reuse prior job when client retries the same request.
-        existing = get_job_by_idempotency_key(db, idempotency_key)
-        if existing:
-            return InferenceAcceptedResponse(
-                job_id=existing.job_id, status=existing.status, idempotency_key=idempotency_key
+    cached = await result_cache.aget(payload.text, model_version) if result_cache else None
+    if cached:
+        # Known text: record a finished job without touching the queue.
+        response = await _store_finished_job(
+            db,
+            text=payload.text,
+            model_version=model_version,
+            idempotency_key=idempotency_key,
+            priority=payload.priority,
+            label=cached["label"],
+            score=cached["score"],
+        )
+        await _remember_key(idempotency_key, response)
+        logger.info("job_cached", extra={"job_id": response.job_id, "status": response.status})
+        return response
+
+    if payload.mode == "sync":
+        timeout_ms = min(payload.sync_timeout_ms or settings.sync_default_timeout_ms, settings.sync_max_timeout_ms)
+        prediction = await inline_inference.predict(payload.text, model_version, timeout_ms / 1000)
+        if prediction:
+            score = round(prediction.score, 4)
+            if result_cache:
+                await result_cache.aset(payload.text, model_version, prediction.label, score)
+            response = await _store_finished_job(
+                db,
+                text=payload.text,
+                model_version=model_version,
+                idempotency_key=idempotency_key,
+                priority=payload.priority,
+                label=prediction.label,
+                score=score,
             )
+            metrics.inc_sync_completed()
+            await _remember_key(idempotency_key, response)
+            logger.info("inference_inline", extra={"job_id": response.job_id, "status": response.status})
+            return response
+        # Over the deadline or concurrency cap: take the queued path.
+        metrics.inc_sync_fallback()
 
+    await _check_capacity(db, payload.priority, 1)
     job_id = str(uuid4())
-    create_job(
-        db,
-        job_id=job_id,
-        input_text=payload.text,
-        model_version=model_version,
-        idempotency_key=idempotency_key,
-    )
+    journaled = _journaled(idempotency_key)
+    if journaled:
+        await submission_journal.append(
+            [
+                {
+                    "job_id": job_id,
+                    "input_text": payload.text,
+                    "model_version": model_version,
+                    "priority": payload.priority,
+                    "deadline": deadline,
+                }
+            ]
+        )
+    else:
+        # The insert doubles as the idempotency check: a retried key hands back the existing job.
+        record = await db.run_sync(
+            create_job,
+            job_id=job_id,
+            input_text=payload.text,
+            model_version=model_version,
+            idempotency_key=idempotency_key,
+            priority=payload.priority,
+            deadline=deadline,
+        )
+        if record.job_id != job_id:
+            response = _accepted(record, idempotency_key)
+            await _remember_key(idempotency_key, response)
+            return response
+
+    args, options = task_payload(payload.text, model_version)
     try:
-        run_inference.apply_async(args=(payload.text, model_version), task_id=job_id)
+        await _run_enqueue(
+            run_inference.apply_async,
+            args=args,
+            kwargs=_task_kwargs(time.time(), deadline),
+            task_id=job_id,
+            queue=payload.priority,
+            **options,
+            **deadline_options(deadline),
+        )
     except Exception as exc:
-        update_job_failed(db, job_id, f"enqueue failed: {exc}", 0)
+        await _fail_unqueued(db, [job_id], f"enqueue failed: {exc}", journaled)
         raise
 
     metrics.inc_submitted()
-    logger.info("job_queued", extra={"job_id": job_id, "status": "queued"})
+    logger.info("job_queued", extra={"job_id": job_id, "status": "queued", "priority": payload.priority})
 
-    return InferenceAcceptedResponse(job_id=job_id, status="queued", idempotency_key=idempotency_key)
+    response = InferenceAcceptedResponse(job_id=job_id, status="queued", idempotency_key=idempotency_key)
+    await _remember_key(idempotency_key, response)
+    return response
 
 
-@app.get("/v1/jobs/{job_id}", response_model=JobStatusResponse)
-def get_job_status(job_id: str, db: Session = Depends(get_db)) -> JobStatusResponse:
-    record = get_job(db, job_id)
-    if record:
-        result = None
-        if record.result_label is not None and record.result_score is not None:
-            result = {
-                "label": record.result_label,
-                "score": record.result_score,
-                "model_version": record.model_version,
-            }
-        return JobStatusResponse(
-            job_id=job_id,
-            status=record.status,
-            result=result,
-            error=record.error,
-            retry_count=record.retry_count,
-            created_at=record.created_at,
-            updated_at=record.updated_at,
+async def _fail_unqueued(db: AsyncSession, job_ids: list[str], error: str, journaled: bool) -> None:
+    if journaled:
+        # Store the rows now rather than leave a failure to the flusher's next batch. The
+        # journal is read with the async client; only the insert runs in the sync session.
+        jobs = await submission_journal.aget_many(job_ids)
+        await db.run_sync(insert_missing_jobs, list(jobs.values()))
+    for job_id in job_ids:
+        await db.run_sync(update_job_failed, job_id, error, 0)
+
+
+def _batch_jobs(
+    items: list[BatchInferenceItem],
+    model_version: str,
+    priority: str,
+    cached: list[dict | None],
+    deadline: datetime | None,
+) -> tuple[list[InferenceAcceptedResponse], list[dict], list[InferenceAcceptedResponse]]:
+    accepted: list[InferenceAcceptedResponse] = []
+    new_jobs: list[dict] = []
+    responses: list[InferenceAcceptedResponse] = []
+    claimed: dict[str, InferenceAcceptedResponse] = {}
+    for item, cached_result in zip(items, cached):
+        key = item.idempotency_key
+        if key and key in claimed:
+            # Same key repeated inside one batch maps to a single job.
+            accepted.append(claimed[key])
+            continue
+
+        job = {
+            "job_id": str(uuid4()),
+            "input_text": item.text,
+            "model_version": model_version,
+            "idempotency_key": key,
+            "priority": priority,
+            "deadline": deadline,
+        }
+        if cached_result:
+            job.update(status="succeeded", result_label=cached_result["label"], result_score=cached_result["score"])
+        response = InferenceAcceptedResponse(
+            job_id=job["job_id"], status=job.get("status", "queued"), idempotency_key=key
         )
+        if key:
+            claimed[key] = response
+        new_jobs.append(job)
+        responses.append(response)
+        accepted.append(response)
+    return accepted, new_jobs, responses
+
+
+def _store_batch(
+    db: Session,
+    items: list[BatchInferenceItem],
+    model_version: str,
+    priority: str,
+    cached: list[dict | None],
+    deadline: datetime | None,
+) -> tuple[list[InferenceAcceptedResponse], list[dict], int]:
+    accepted, new_jobs, responses = _batch_jobs(items, model_version, priority, cached, deadline)
+    # Keys already taken come back pointing at the existing job; no pre-check query.
+    stored = create_jobs(db, new_jobs)
+    to_enqueue = []
+    cached_count = 0
+    for job, response, (stored_id, status) in zip(new_jobs, responses, stored):
+        if stored_id != job["job_id"]:
+            response.job_id = stored_id
+            response.status = status
+        elif "status" in job:
+            cached_count += 1
+        else:
+            to_enqueue.append(job)
+    return accepted, to_enqueue, cached_count
+
+
+def _enqueue_batch(
+    jobs: list[dict], model_version: str, priority: str, deadline: datetime | None, pending: set[str]
+) -> None:
+    # Reuse one producer connection for the whole batch.
+    kwargs = _task_kwargs(time.time(), deadline)
+    publish_options = deadline_options(deadline)
+    with celery.producer_or_acquire() as producer:
+        for job in jobs:
+            args, options = task_payload(job["input_text"], model_version)
+            run_inference.apply_async(
+                args=args,
+                kwargs=kwargs,
+                task_id=job["job_id"],
+                queue=priority,
+                producer=producer,
+                **options,
+                **publish_options,
+            )
+            pending.discard(job["job_id"])
+
+
+@app.post("/v1/inference:batch", response_model=BatchInferenceAcceptedResponse)
+async def create_inference_batch(
+    payload: BatchInferenceRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> BatchInferenceAcceptedResponse:
+    model_version = payload.model_version or settings.model_version
+    _check_client_rate(request, len(payload.items))
+    deadline = _deadline(payload.deadline, payload.max_age_seconds)
+    cached: list[dict | None] = (
+        await result_cache.aget_many([item.text for item in payload.items], model_version)
+        if result_cache
+        else [None] * len(payload.items)
+    )
+    if not all(cached):
+        await _check_capacity(db, payload.priority, sum(1 for result in cached if not result))
+    journaled = all(_journaled(item.idempotency_key) for item in payload.items)
+    if journaled:
+        accepted, new_jobs, _ = _batch_jobs(payload.items, model_version, payload.priority, cached, deadline)
+        await submission_journal.append(new_jobs)
+        to_enqueue = [job for job in new_jobs if "status" not in job]
+        cached_count = len(new_jobs) - len(to_enqueue)
+    else:
+        accepted, to_enqueue, cached_count = await db.run_sync(
+            _store_batch, payload.items, model_version, payload.priority, cached, deadline
+        )
+
+    pending = {job["job_id"] for job in to_enqueue}
+    try:
+        await _run_enqueue(_enqueue_batch, to_enqueue, model_version, payload.priority, deadline, pending)
+    except Exception as exc:
+        await _fail_unqueued(db, list(pending), f"enqueue failed: {exc}", journaled)
+        raise
+
+    metrics.inc_submitted(len(to_enqueue) + cached_count)
+    metrics.inc_succeeded(cached_count)
+    logger.info("batch_queued", extra={"status": "queued", "priority": payload.priority})
+
+    return BatchInferenceAcceptedResponse(jobs=accepted)
+
+
+def _status_response(record: JobRecord | Row) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=record.job_id,
+        status=record.status,
+        priority=record.priority,
+        result=_job_result(record),
+        error=record.error,
+        retry_count=record.retry_count,
+        deadline=record.deadline,
+        created_at=record.created_at,
+        updated_at=record.updated_at,
+        enqueued_at=record.enqueued_at,
+        started_at=record.started_at,
+        inference_started_at=record.inference_started_at,
+        inference_finished_at=record.inference_finished_at,
+        persisted_at=record.persisted_at,
+    )
+
+
+def _journaled_status(job: dict) -> JobStatusResponse:
+    result = None
+    if job.get("result_label") is not None:
+        result = {"label": job["result_label"], "score": job["result_score"], "model_version": job["model_version"]}
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job.get("status", "queued"),
+        priority=job["priority"],
+        result=result,
+        retry_count=0,
+        deadline=job.get("deadline"),
+        created_at=job["created_at"],
+        updated_at=job["created_at"],
+    )
+
+
+async def _job_statuses(db: AsyncSession, job_ids: list[str]) -> list[JobStatusResponse]:
+    # Stored rows, then jobs still only in the submission journal. A job flushed between
+    # the two reads is read from the table once more.
+    responses = [_status_response(row) for row in await db.run_sync(get_job_status_rows, job_ids)]
+    missing = [job_id for job_id in job_ids if job_id not in {response.job_id for response in responses}]
+    if missing and submission_journal:
+        journaled = await submission_journal.aget_many(missing)
+        responses += [_journaled_status(job) for job in journaled.values()]
+        flushed = [job_id for job_id in missing if job_id not in journaled]
+        if flushed:
+            responses += [_status_response(row) for row in await db.run_sync(get_job_status_rows, flushed)]
+    return responses
+
+
+def _event_json(event: dict) -> str:
+    return JobStatusResponse(**event).model_dump_json()
+
+
+def _encode_cursor(created_at: datetime, job_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), job_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), str(job_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="invalid cursor") from exc
+
+
+def _job_summary(row: dict) -> JobSummary:
+    result = None
+    if row["result_label"] is not None and row["result_score"] is not None:
+        result = {"label": row["result_label"], "score": row["result_score"], "model_version": row["model_version"]}
+    return JobSummary(**row, result=result)
+
+
+@app.get("/v1/jobs", response_model=JobListResponse)
+async def list_job_summaries(
+    status: str | None = None,
+    model_version: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=settings.job_list_max_limit),
+    include_input: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+) -> JobListResponse:
+    rows = await db.run_sync(
+        list_jobs,
+        limit=limit + 1,
+        status=status,
+        model_version=model_version,
+        created_after=created_after,
+        created_before=created_before,
+        after=_decode_cursor(cursor) if cursor else None,
+        include_input=include_input,
+    )
+    # One extra row tells whether another page exists without a COUNT query.
+    page = rows[:limit]
+    next_cursor = _encode_cursor(page[-1]["created_at"], page[-1]["job_id"]) if len(rows) > limit else None
+    return JobListResponse(jobs=[_job_summary(row) for row in page], next_cursor=next_cursor)
+
+
+@app.get("/v1/jobs:stream")
+async def stream_job_events(
+    job_ids: list[str] = Query(min_length=1, max_length=settings.batch_max_items),
+    timeout: float = Query(default=settings.job_stream_max_seconds, gt=0, le=settings.job_stream_max_seconds),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    job_ids = list(dict.fromkeys(job_ids))
+    # Subscribe before reading so a completion between the two is not missed.
+    subscription = await job_notifier.subscribe(job_ids) if job_notifier else None
+    try:
+        initial = await _job_statuses(db, job_ids)
+    except Exception:
+        if subscription is not None:
+            await subscription.close()
+        raise
+    pending = set(job_ids) - {response.job_id for response in initial if response.status in TERMINAL_STATUSES}
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            for response in initial:
+                yield f"event: job\ndata: {response.model_dump_json()}\n\n"
+            deadline = time.monotonic() + timeout
+            while pending and subscription is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                event = await subscription.get(min(remaining, _KEEPALIVE_SECONDS))
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif event["job_id"] in pending:
+                    pending.discard(event["job_id"])
+                    yield f"event: job\ndata: {_event_json(event)}\n\n"
+        finally:
+            if subscription is not None:
+                await subscription.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.websocket("/v1/jobs/ws")
+async def job_events_websocket(websocket: WebSocket) -> None:
+    await websocket.accept()
+    try:
+        message = await websocket.receive_json()
+    except WebSocketDisconnect:
+        return
+    except (ValueError, KeyError):
+        # Not JSON, or a binary frame.
+        message = None
+    job_ids = message.get("job_ids") if isinstance(message, dict) else None
+    if not isinstance(job_ids, list) or not all(isinstance(job_id, str) for job_id in job_ids):
+        await websocket.close(code=1008)
+        return
+    job_ids = list(dict.fromkeys(job_ids))
+    if not job_ids or len(job_ids) > settings.batch_max_items or job_notifier is None:
+        await websocket.close(code=1008)
+        return
+
+    subscription = await job_notifier.subscribe(job_ids)
+    try:
+        async with AsyncSessionLocal() as db:
+            initial = await _job_statuses(db, job_ids)
+        pending = set(job_ids)
+        for response in initial:
+            await websocket.send_text(response.model_dump_json())
+            if response.status in TERMINAL_STATUSES:
+                pending.discard(response.job_id)
+
+        deadline = time.monotonic() + settings.job_stream_max_seconds
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event = await subscription.get(min(remaining, _KEEPALIVE_SECONDS))
+            if event is not None and event["job_id"] in pending:
+                pending.discard(event["job_id"])
+                await websocket.send_text(_event_json(event))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await subscription.close()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+
+def _status_body(body: str, etag: str, if_none_match: str | None) -> Response:
+    # Pollers that send back the ETag they saw get an empty 304 until the job changes.
+    if _etag_matches(if_none_match, etag):
+        metrics.inc_status_not_modified()
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=settings.job_wait_max_seconds),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Response:
+    cached = await status_cache.aget(job_id) if status_cache else None
+    if cached:
+        return _status_body(*cached, if_none_match)
+
+    subscription = await job_notifier.subscribe([job_id]) if wait and job_notifier else None
+    try:
+        status, body = await _job_status_body(job_id)
+        if subscription is not None and status not in TERMINAL_STATUSES:
+            # Long-poll: hold the request until the worker publishes a terminal state, then
+            # answer with the stored status, so body and ETag match a plain GET.
+            if await subscription.get(wait) is not None:
+                status, body = await _job_status_body(job_id)
+        return _status_body(body, StatusCache.etag(body), if_none_match)
+    finally:
+        if subscription is not None:
+            await subscription.close()
+
+
+async def _job_status_body(job_id: str) -> tuple[str, str]:
+    # A session of its own, closed before any long-poll wait, so waiters hold no pooled connection.
+    async with AsyncSessionLocal() as db:
+        response, cacheable = await _read_job_status(db, job_id)
+    body = response.model_dump_json()
+    if cacheable and status_cache and response.status in TERMINAL_STATUSES:
+        await status_cache.aset(job_id, body, response.created_at)
+    return response.status, body
+
+
+async def _read_job_status(db: AsyncSession, job_id: str) -> tuple[JobStatusResponse, bool]:
+    # The flag marks a complete response read from the table, the only kind worth caching.
+    row = await db.run_sync(get_job_status_row, job_id)
+    if row:
+        return _status_response(row), True
+    if submission_journal:
+        # Accepted but not flushed yet, or flushed since the read above.
+        journaled = await submission_journal.aget_many([job_id])
+        if journaled:
+            return _journaled_status(journaled[job_id]), False
+        row = await db.run_sync(get_job_status_row, job_id)
+        if row:
+            return _status_response(row), True
+    if settings.celery_result_backend is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    # The result backend client is blocking; keep it off the event loop.
+    return await run_in_threadpool(_broker_job_status, job_id), False
+
 
+def _broker_job_status(job_id: str) -> JobStatusResponse:
     # Fallback to broker state while migration data is absent.
     task = AsyncResult(job_id, app=celery)
 
@@ -1,32 +1,301 @@
-from threading import Lock
+import atexit
+import json
+import os
+import socket
+import tempfile
+import threading
+from bisect import bisect_left
+from pathlib import Path
 
+from app.config import settings
 
-class Metrics:
+
+COUNTERS = (
+    "jobs_submitted",
+    "jobs_succeeded",
+    "jobs_failed",
+    "jobs_expired",
+    "cache_hits",
+    "cache_misses",
+    "cache_evictions",
+    "idempotency_cache_hits",
+    "sync_completed",
+    "sync_fallbacks",
+    "admission_admitted",
+    "admission_shed_rate_limited",
+    "admission_shed_overloaded",
+    "model_evictions",
+    "log_records_dropped",
+    "journal_flushed",
+    "status_cache_hits",
+    "status_not_modified",
+)
+
+HISTOGRAMS = {
+    "queue_wait_seconds": "Time from submission until a worker first picked the job up.",
+    "inference_seconds": "Model time per job attempt.",
+    "db_write_seconds": "Time spent persisting a job attempt's state transitions.",
+    "end_to_end_seconds": "Time from submission to the job's final outcome.",
+    "model_load_seconds": "Time to load a model version into a process.",
+}
+
+GAUGES = {
+    "model_memory_bytes": "Memory held by each loaded model version, summed over processes.",
+}
+
+# Upper bounds in seconds, shared by every histogram.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_PREFIX = "inferflow_"
+
+
+class _Shard:
+    # Written only by its owning thread, so recording needs no lock; readers sum all
+    # shards and may see a value one increment stale.
     def __init__(self) -> None:
-        self._lock = Lock()
-        self.jobs_submitted = 0
-        self.jobs_succeeded = 0
-        self.jobs_failed = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # (name, model_version, outcome) -> [per-bucket counts incl. +Inf, sum]
+        self.histograms: dict[tuple[str, str, str], list] = {}
+
+
+def _empty_state() -> dict:
+    return {"counters": dict.fromkeys(COUNTERS, 0), "histograms": {}, "gauges": {}}
+
+
+def _merge(into: dict, state: dict) -> None:
+    for name, value in state["counters"].items():
+        into["counters"][name] = into["counters"].get(name, 0) + value
+    for key, (counts, total) in state["histograms"].items():
+        entry = into["histograms"].setdefault(key, [[0] * len(counts), 0.0])
+        entry[0] = [a + b for a, b in zip(entry[0], counts)]
+        entry[1] += total
+    for key, value in state.get("gauges", {}).items():
+        into["gauges"][key] = into["gauges"].get(key, 0) + value
+
 
-    def inc_submitted(self) -> None:
-        with self._lock:
-            self.jobs_submitted += 1
+def _process_gone(path: Path) -> bool:
+    # Snapshot files are named metrics-<host>-<pid>.json. Only pids of this host can be
+    # checked; files from other hosts (or containers) are assumed live.
+    host, _, pid = path.stem.removeprefix("metrics-").rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
 
-    def inc_succeeded(self) -> None:
-        with self._lock:
-            self.jobs_succeeded += 1
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Per-thread shards keep the hot path lock-free. With METRICS_DIR set, every process
+# (API workers, Celery children) periodically writes its totals to its own file there
+# and /metrics sums all files, so any process can serve the cluster-wide view.
+class Metrics:
+    def __init__(self, directory: str | None = None, flush_interval_seconds: float = 5.0) -> None:
+        self._directory = Path(directory) if directory else None
+        self._flush_interval_seconds = flush_interval_seconds
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # A forked child starts from zero; the parent's totals stay in the parent's file.
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        # Gauges change rarely (e.g. on model load), so they live outside the shards.
+        self._gauges: dict[str, float] = {}
+        self._registry_lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            # Taken once per thread, never while recording.
+            with self._registry_lock:
+                self._shards.append(shard)
+                if self._directory is not None and self._flusher is None:
+                    self._start_flusher()
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name: str, count: int = 1) -> None:
+        self._shard().counters[name] += count
+
+    def observe(self, name: str, seconds: float, model_version: str, outcome: str) -> None:
+        histograms = self._shard().histograms
+        key = (name, model_version, outcome)
+        entry = histograms.get(key)
+        if entry is None:
+            entry = histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+        entry[0][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        entry[1] += seconds
+
+    def set_gauge(self, name: str, model_version: str, value: float) -> None:
+        with self._registry_lock:
+            if value:
+                self._gauges[f"{name}|{model_version}"] = value
+            else:
+                self._gauges.pop(f"{name}|{model_version}", None)
+
+    def inc_submitted(self, count: int = 1) -> None:
+        self.inc("jobs_submitted", count)
+
+    def inc_succeeded(self, count: int = 1) -> None:
+        self.inc("jobs_succeeded", count)
 
     def inc_failed(self) -> None:
-        with self._lock:
-            self.jobs_failed += 1
+        self.inc("jobs_failed")
+
+    def inc_expired(self) -> None:
+        self.inc("jobs_expired")
+
+    def inc_cache_hit(self) -> None:
+        self.inc("cache_hits")
+
+    def inc_cache_miss(self) -> None:
+        self.inc("cache_misses")
+
+    def inc_cache_eviction(self) -> None:
+        self.inc("cache_evictions")
+
+    def inc_idempotency_hit(self) -> None:
+        self.inc("idempotency_cache_hits")
+
+    def inc_sync_completed(self) -> None:
+        self.inc("sync_completed")
+
+    def inc_sync_fallback(self) -> None:
+        self.inc("sync_fallbacks")
+
+    def inc_admitted(self, count: int = 1) -> None:
+        self.inc("admission_admitted", count)
+
+    def inc_shed_rate_limited(self) -> None:
+        self.inc("admission_shed_rate_limited")
+
+    def inc_shed_overloaded(self) -> None:
+        self.inc("admission_shed_overloaded")
+
+    def inc_model_eviction(self) -> None:
+        self.inc("model_evictions")
+
+    def inc_log_dropped(self) -> None:
+        self.inc("log_records_dropped")
+
+    def inc_journal_flushed(self, count: int) -> None:
+        self.inc("journal_flushed", count)
+
+    def inc_status_cache_hit(self) -> None:
+        self.inc("status_cache_hits")
+
+    def inc_status_not_modified(self) -> None:
+        self.inc("status_not_modified")
+
+    def _local_state(self) -> dict:
+        state = _empty_state()
+        with self._registry_lock:
+            shards = list(self._shards)
+            state["gauges"] = dict(self._gauges)
+        for shard in shards:
+            # Copies are single C-level calls, so they are safe against the owner's writes.
+            entries = list(shard.histograms.items())
+            histograms = {"|".join(key): [list(counts), total] for key, (counts, total) in entries}
+            _merge(state, {"counters": dict(shard.counters), "histograms": histograms})
+        return state
+
+    def _path(self) -> Path:
+        return self._directory / f"metrics-{socket.gethostname()}-{os.getpid()}.json"
+
+    def write_snapshot(self) -> None:
+        if self._directory is None:
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never see a partial file.
+        fd, tmp = tempfile.mkstemp(dir=self._directory, prefix=".metrics-", suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(self._local_state(), handle)
+        os.replace(tmp, self._path())
+
+    def _start_flusher(self) -> None:
+        def run() -> None:
+            while not self._stop.wait(self._flush_interval_seconds):
+                self.write_snapshot()
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def collect(self) -> dict:
+        state = self._local_state()
+        if self._directory is not None and self._directory.is_dir():
+            own = self._path()
+            for path in self._directory.glob("metrics-*.json"):
+                if path == own:
+                    continue
+                try:
+                    other = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                if _process_gone(path):
+                    # Counters and histograms are totals and still count; a dead process's
+                    # gauges describe state it no longer holds.
+                    other["gauges"] = {}
+                _merge(state, other)
+        return state
 
     def snapshot(self) -> dict[str, int]:
-        with self._lock:
-            return {
-                "jobs_submitted": self.jobs_submitted,
-                "jobs_succeeded": self.jobs_succeeded,
-                "jobs_failed": self.jobs_failed,
-            }
+        return self.collect()["counters"]
+
+    def render_prometheus(self) -> str:
+        state = self.collect()
+        lines = []
+        for name in COUNTERS:
+            lines.append(f"# TYPE {_PREFIX}{name}_total counter")
+            lines.append(f"{_PREFIX}{name}_total {state['counters'].get(name, 0)}")
+
+        by_name: dict[str, list[tuple[str, str, list, float]]] = {}
+        for key, (counts, total) in state["histograms"].items():
+            name, rest = key.split("|", 1)
+            model_version, outcome = rest.rsplit("|", 1)
+            by_name.setdefault(name, []).append((model_version, outcome, counts, total))
+        for name, help_text in HISTOGRAMS.items():
+            metric = f"{_PREFIX}{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for model_version, outcome, counts, total in sorted(by_name.get(name, [])):
+                labels = f'model_version="{_label_value(model_version)}",outcome="{_label_value(outcome)}"'
+                cumulative = 0
+                for bound, count in zip([*map(str, LATENCY_BUCKETS), "+Inf"], counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {total}")
+                lines.append(f"{metric}_count{{{labels}}} {cumulative}")
+
+        by_gauge: dict[str, list[tuple[str, float]]] = {}
+        for key, value in state["gauges"].items():
+            name, model_version = key.split("|", 1)
+            by_gauge.setdefault(name, []).append((model_version, value))
+        for name, help_text in GAUGES.items():
+            metric = f"{_PREFIX}{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for model_version, value in sorted(by_gauge.get(name, [])):
+                lines.append(f'{metric}{{model_version="{_label_value(model_version)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def render_queue_depths(depths: dict[str, int]) -> str:
+    # Read from the broker at scrape time rather than recorded, so it is a gauge.
+    metric = f"{_PREFIX}queue_depth"
+    lines = [f"# HELP {metric} Messages waiting in each priority lane's broker queue", f"# TYPE {metric} gauge"]
+    lines.extend(f'{metric}{{queue="{_label_value(queue)}"}} {depth}' for queue, depth in sorted(depths.items()))
+    return "\n".join(lines) + "\n"
 
 
-metrics = Metrics()
+metrics = Metrics(settings.metrics_dir, settings.metrics_flush_interval_seconds)
+atexit.register(metrics.write_snapshot)
@@ -1,4 +1,9 @@
+import re
+import sys
+from bisect import bisect_right
+from collections.abc import Iterable
 from dataclasses import dataclass
+from itertools import accumulate
 
 
 @dataclass
@@ -17,12 +22,108 @@ SPAM_KEYWORDS = {
     "prize",
 }
 
+_SEPARATOR = "\0"
+# Below this size a plain `in` scan per keyword beats the regex pass.
+_REGEX_MIN_KEYWORDS = 200
 
-def predict_text(text: str) -> Prediction:
-    lowered = text.lower()
-    hits = sum(1 for kw in SPAM_KEYWORDS if kw in lowered)
 
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: the longest keyword at a position wins.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# Counts distinct keywords occurring as substrings. Large keyword sets compile to one
+# trie-shaped regex that reports the longest keyword starting at each position; any
+# other keyword starting there is a prefix of it and is recovered from `_prefixes`.
+class KeywordMatcher:
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords = frozenset(kw for kw in keywords if kw)
+        if any(_SEPARATOR in kw for kw in self.keywords):
+            raise ValueError("keywords must not contain NUL characters")
+        self._prefixes = {
+            kw: frozenset(kw[:end] for end in range(1, len(kw) + 1) if kw[:end] in self.keywords)
+            for kw in self.keywords
+        }
+        self._pattern = (
+            re.compile(f"(?=({_trie_pattern(self.keywords)}))")
+            if len(self.keywords) >= _REGEX_MIN_KEYWORDS
+            else None
+        )
+        self.memory_bytes = (
+            sys.getsizeof(self.keywords)
+            + sum(sys.getsizeof(kw) for kw in self.keywords)
+            + sys.getsizeof(self._prefixes)
+            + sum(sys.getsizeof(prefixes) for prefixes in self._prefixes.values())
+            + (sys.getsizeof(self._pattern) if self._pattern is not None else 0)
+        )
+
+    def count(self, text: str) -> int:
+        if self._pattern is None:
+            return sum(1 for kw in self.keywords if kw in text)
+        found: set[str] = set()
+        for longest in set(self._pattern.findall(text)):
+            found |= self._prefixes[longest]
+        return len(found)
+
+    def count_many(self, texts: list[str]) -> list[int]:
+        if self._pattern is None or not texts:
+            return [self.count(text) for text in texts]
+        # Scan all texts as one NUL-separated string; no keyword can span a separator.
+        offsets = list(accumulate(len(text) + 1 for text in texts[:-1]))
+        found: list[set[str]] = [set() for _ in texts]
+        for match in self._pattern.finditer(_SEPARATOR.join(texts)):
+            found[bisect_right(offsets, match.start())] |= self._prefixes[match.group(1)]
+        return [len(keywords) for keywords in found]
+
+
+def _prediction_from_hits(hits: int) -> Prediction:
     if hits >= 2:
         return Prediction(label="spam", score=min(0.99, 0.55 + hits * 0.1))
 
     return Prediction(label="ham", score=max(0.51, 0.9 - hits * 0.05))
+
+
+class KeywordModel:
+    def __init__(self, keywords: Iterable[str] = SPAM_KEYWORDS) -> None:
+        self._matcher = KeywordMatcher(keywords)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._matcher.memory_bytes
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordModel":
+        # One keyword per line; blank lines are ignored.
+        with open(path, encoding="utf-8") as handle:
+            return cls(line.strip().lower() for line in handle if line.strip())
+
+    def predict(self, text: str) -> Prediction:
+        return _prediction_from_hits(self._matcher.count(text.lower()))
+
+    def predict_batch(self, texts: list[str]) -> list[Prediction]:
+        return [_prediction_from_hits(hits) for hits in self._matcher.count_many([text.lower() for text in texts])]
+
+
+_default_model = KeywordModel()
+
+
+def predict_text(text: str) -> Prediction:
+    return _default_model.predict(text)
+
+
+def predict_batch(texts: list[str]) -> list[Prediction]:
+    return _default_model.predict_batch(texts)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+import time
+from threading import Lock
+
+from redis import Redis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.redis_pool import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSubscription:
+    def __init__(self, notifier: "LocalJobNotifier", job_ids: list[str]) -> None:
+        self._notifier = notifier
+        self._loop = asyncio.get_running_loop()
+        self._events: asyncio.Queue[dict] = asyncio.Queue()
+        self.job_ids = job_ids
+
+    def deliver(self, event: dict) -> None:
+        # Publishers run on worker threads; hand the event to the subscriber's loop.
+        try:
+            self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+        except RuntimeError:
+            pass
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self._events.get(), timeout=max(timeout, 0))
+        except TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        self._notifier._unsubscribe(self)
+
+
+# In-process fan-out; only useful when API and worker share a process (eager mode, tests).
+class LocalJobNotifier:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._subscribers: dict[str, set[LocalSubscription]] = {}
+
+    def publish(self, job_id: str, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    async def subscribe(self, job_ids: list[str]) -> LocalSubscription:
+        subscription = LocalSubscription(self, job_ids)
+        with self._lock:
+            for job_id in job_ids:
+                self._subscribers.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: LocalSubscription) -> None:
+        with self._lock:
+            for job_id in subscription.job_ids:
+                subscribers = self._subscribers.get(job_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub: PubSub) -> None:
+        self._pubsub = pubsub
+
+    async def get(self, timeout: float) -> dict | None:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message and message["type"] == "message":
+                return json.loads(message["data"])
+
+    async def close(self) -> None:
+        await self._pubsub.aclose()
+
+
+class RedisJobNotifier:
+    def __init__(self, redis_url: str) -> None:
+        self._client = Redis.from_url(redis_url)
+
+    @staticmethod
+    def channel(job_id: str) -> str:
+        return f"inferflow:job-events:{job_id}"
+
+    def publish(self, job_id: str, event: dict) -> None:
+        try:
+            self._client.publish(self.channel(job_id), json.dumps(event))
+        except RedisError:
+            # Waiters fall back to their timeout; the job row is already durable.
+            logger.warning("job_event_publish_failed", extra={"job_id": job_id})
+
+    async def subscribe(self, job_ids: list[str]) -> RedisSubscription:
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(*(self.channel(job_id) for job_id in job_ids))
+        return RedisSubscription(pubsub)
+
+
+def _build_notifier() -> LocalJobNotifier | RedisJobNotifier | None:
+    if settings.job_events_backend == "redis":
+        return RedisJobNotifier(settings.redis_url)
+    if settings.job_events_backend == "local":
+        return LocalJobNotifier()
+    return None
+
+
+job_notifier = _build_notifier()
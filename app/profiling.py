@@ -0,0 +1,54 @@
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+from app.config import settings
+
+
+def _folded(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval_seconds: float) -> str:
+    # Samples every other thread's Python stack and returns folded stacks
+    # ("thread;outer;inner count" per line), the input of flamegraph.pl and speedscope.
+    # Nothing runs unless a profile is requested.
+    own = threading.get_ident()
+    counts: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                counts[f"{names.get(ident, ident)};{_folded(frame)}"] += 1
+        time.sleep(interval_seconds)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+# Pools whose tasks run as threads of the worker process, where sys._current_frames sees them.
+_SAMPLEABLE_POOLS = {"thread": "threads", "solo": "solo"}
+
+
+def profile_worker(pool: object, seconds: float) -> dict:
+    # Prefork children are separate processes and green threads do not show up as threads,
+    # so on those pools a profile would hold no task code; refuse instead of misleading.
+    kind = type(pool).__module__.rsplit(".", 1)[-1]
+    if kind not in _SAMPLEABLE_POOLS:
+        return {"error": f"tasks on the {kind} pool cannot be sampled; run the worker with --pool threads or solo"}
+    seconds = min(seconds, settings.profile_max_seconds)
+    return {"ok": sample_stacks(seconds, settings.profile_interval_ms / 1000)}
+
+
+def register_worker_profiler() -> None:
+    from celery.worker.control import control_command
+
+    @control_command(args=[("seconds", float)], signature="[seconds=5]")
+    def profile(state, seconds: float = 5.0) -> dict:
+        return profile_worker(state.consumer.pool, seconds)
@@ -0,0 +1,21 @@
+from redis.asyncio import Redis as AsyncRedis
+
+from app.config import settings
+
+
+_async_redis: AsyncRedis | None = None
+
+
+def get_async_redis() -> AsyncRedis:
+    # One connection pool per API process instead of a client per request.
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = AsyncRedis.from_url(settings.redis_url)
+    return _async_redis
+
+
+async def close_async_redis() -> None:
+    global _async_redis
+    if _async_redis is not None:
+        await _async_redis.aclose()
+        _async_redis = None
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Protocol
+
+from app.config import settings
+from app.metrics import metrics
+from app.model import KeywordModel, Prediction
+
+logger = logging.getLogger(__name__)
+
+
+class Model(Protocol):
+    def predict(self, text: str) -> Prediction: ...
+
+    def predict_batch(self, texts: list[str]) -> list[Prediction]: ...
+
+
+def _self_sizing(loader: Callable[[], Model]) -> Callable[[], Model]:
+    # Marks a loader whose models report `memory_bytes`, so loading needs no tracemalloc.
+    loader.reports_memory_bytes = True
+    return loader
+
+
+def _reports_memory_bytes(loader: Callable[[], Model]) -> bool:
+    # Marked loaders, and model classes used as their own loader that define the property.
+    return getattr(loader, "reports_memory_bytes", False) or isinstance(
+        getattr(loader, "memory_bytes", None), property
+    )
+
+
+def loader_for(spec: str) -> Callable[[], Model]:
+    # keyword | keyword:/path/to/keywords.txt | hashed:/path/to/model.bin
+    kind, _, path = spec.partition(":")
+    if kind == "keyword":
+        return _self_sizing(lambda: KeywordModel.from_file(path)) if path else KeywordModel
+    if kind == "hashed" and path:
+        # NumPy is only imported by processes that serve this model type.
+        def load() -> Model:
+            from app.hashed_model import HashedLinearModel
+
+            return HashedLinearModel.load(path)
+
+        return _self_sizing(load)
+    raise ValueError(f"unknown model kind: {spec!r}")
+
+
+# tracemalloc is process-wide; one measured load at a time, so no load stops tracing
+# while another is still being measured.
+_tracing_lock = threading.Lock()
+
+
+def _traced_load(loader: Callable[[], Model]) -> tuple[Model, int]:
+    # Fallback for loaders of unknown size: count what the loader allocated, including
+    # allocations by other threads meanwhile. Tracing slows every thread while it is on.
+    with _tracing_lock:
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            model = loader()
+            memory_bytes = getattr(model, "memory_bytes", None)
+            if memory_bytes is None:
+                memory_bytes = max(0, tracemalloc.get_traced_memory()[0] - before)
+            return model, memory_bytes
+        finally:
+            if tracing:
+                tracemalloc.stop()
+
+
+def parse_model_versions(spec: str) -> dict[str, Callable[[], Model]]:
+    # "v1=keyword,v2=hashed:/models/v2.bin"
+    loaders = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        version, separator, model_spec = entry.partition("=")
+        if not separator or not version:
+            raise ValueError(f"expected VERSION=KIND in MODEL_VERSIONS, got {entry!r}")
+        loaders[version.strip()] = loader_for(model_spec.strip())
+    return loaders
+
+
+@dataclass
+class _Loaded:
+    model: Model
+    memory_bytes: int
+
+
+# Resolves a model version to a model object loaded at most once per process. Loaded
+# versions are kept in LRU order and the least recently used ones are evicted once
+# their combined size exceeds the memory budget; the version just used is never evicted.
+class ModelRegistry:
+    def __init__(
+        self,
+        loaders: dict[str, Callable[[], Model]],
+        default_version: str,
+        memory_budget_bytes: int = 0,
+    ) -> None:
+        if default_version not in loaders:
+            raise ValueError(f"default model version {default_version!r} has no loader")
+        self._loaders = dict(loaders)
+        self._default_version = default_version
+        self._memory_budget_bytes = memory_budget_bytes
+        self._models: OrderedDict[str, _Loaded] = OrderedDict()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, version: str) -> str:
+        # Unconfigured versions are served by the default model, as before the registry.
+        return version if version in self._loaders else self._default_version
+
+    def register(self, version: str, loader: Callable[[], Model]) -> None:
+        with self._lock:
+            self._loaders[version] = loader
+            dropped = self._models.pop(version, None)
+        if dropped:
+            metrics.set_gauge("model_memory_bytes", version, 0)
+
+    def get(self, version: str) -> Model:
+        version = self.resolve(version)
+        with self._lock:
+            loaded = self._models.get(version)
+            if loaded is not None:
+                self._models.move_to_end(version)
+                return loaded.model
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+
+        # Only callers of this version wait for its load; other versions keep serving.
+        with load_lock:
+            with self._lock:
+                loaded = self._models.get(version)
+            if loaded is None:
+                loaded = self._load(version)
+                with self._lock:
+                    self._models[version] = loaded
+                    self._evict(keep=version)
+            return loaded.model
+
+    def preload(self, versions: Iterable[str] | None = None) -> None:
+        for version in self._loaders if versions is None else versions:
+            try:
+                self.get(version)
+            except Exception:
+                # A broken model must not keep the worker from serving the others.
+                logger.exception("model_preload_failed", extra={"model_version": version})
+
+    def loaded(self) -> dict[str, int]:
+        with self._lock:
+            return {version: loaded.memory_bytes for version, loaded in self._models.items()}
+
+    def _load(self, version: str) -> _Loaded:
+        started = time.perf_counter()
+        loader = self._loaders[version]
+        try:
+            if _reports_memory_bytes(loader):
+                model = loader()
+                memory_bytes = model.memory_bytes
+            else:
+                model, memory_bytes = _traced_load(loader)
+        except Exception:
+            metrics.observe("model_load_seconds", time.perf_counter() - started, version, "failed")
+            raise
+
+        metrics.observe("model_load_seconds", time.perf_counter() - started, version, "loaded")
+        metrics.set_gauge("model_memory_bytes", version, memory_bytes)
+        logger.info("model_loaded", extra={"model_version": version})
+        return _Loaded(model, memory_bytes)
+
+    def _evict(self, keep: str) -> None:
+        if not self._memory_budget_bytes:
+            return
+        total = sum(loaded.memory_bytes for loaded in self._models.values())
+        for version in list(self._models):
+            if total <= self._memory_budget_bytes:
+                break
+            if version == keep:
+                continue
+            total -= self._models.pop(version).memory_bytes
+            metrics.inc_model_eviction()
+            metrics.set_gauge("model_memory_bytes", version, 0)
+            logger.info("model_evicted", extra={"model_version": version})
+
+
+model_registry = ModelRegistry(
+    {settings.model_version: KeywordModel, **parse_model_versions(settings.model_versions)},
+    default_version=settings.model_version,
+    memory_budget_bytes=settings.model_memory_budget_mb * 1024 * 1024,
+)
@@ -0,0 +1,118 @@
+import argparse
+import gzip
+import json
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO
+
+from sqlalchemy.orm import Session
+
+from app.cache import status_cache
+from app.config import settings
+from app.database import SessionLocal
+from app.job_store import claim_expired_jobs, delete_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+class JobArchive:
+    # One gzipped NDJSON file per purge run, written batch by batch before the delete commits.
+    def __init__(self, directory: str | Path, now: datetime | None = None) -> None:
+        stamp = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        self.path = Path(directory) / f"jobs-{stamp}.ndjson.gz"
+        self._file: IO[str] | None = None
+
+    def write(self, rows: list[dict]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        for row in rows:
+            self._file.write(json.dumps(row, default=_json_default) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "JobArchive":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def purge_expired_jobs(
+    db: Session,
+    *,
+    retention_days: int,
+    batch_size: int,
+    archive: JobArchive | None = None,
+    now: datetime | None = None,
+    on_deleted: Callable[[list[str]], None] | None = None,
+) -> int:
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    purged = 0
+    while True:
+        rows = claim_expired_jobs(db, cutoff, batch_size)
+        if not rows:
+            break
+        if archive is not None:
+            archive.write(rows)
+        job_ids = [row["job_id"] for row in rows]
+        purged += delete_jobs(db, job_ids)
+        # Commit per batch so row locks and WAL growth stay bounded.
+        db.commit()
+        if on_deleted is not None:
+            on_deleted(job_ids)
+        if len(rows) < batch_size:
+            break
+    return purged
+
+
+def run_purge(
+    retention_days: int | None = None,
+    batch_size: int | None = None,
+    archive_dir: str | None = None,
+) -> int:
+    retention_days = settings.job_retention_days if retention_days is None else retention_days
+    if retention_days <= 0:
+        return 0
+    archive_dir = archive_dir or settings.job_archive_dir
+    db = SessionLocal()
+    archive = JobArchive(archive_dir) if archive_dir else None
+    try:
+        purged = purge_expired_jobs(
+            db,
+            retention_days=retention_days,
+            batch_size=batch_size or settings.job_purge_batch_size,
+            archive=archive,
+            on_deleted=status_cache.evict if status_cache else None,
+        )
+    finally:
+        if archive is not None:
+            archive.close()
+        db.close()
+    logger.info("jobs_purged count=%d", purged)
+    return purged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive and delete finished jobs past retention.")
+    parser.add_argument("--retention-days", type=int, default=settings.job_retention_days)
+    parser.add_argument("--batch-size", type=int, default=settings.job_purge_batch_size)
+    parser.add_argument("--archive-dir", default=settings.job_archive_dir)
+    args = parser.parse_args()
+    print(run_purge(args.retention_days, args.batch_size, args.archive_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,82 @@
 from datetime import datetime
+from typing import Literal, get_args
 
 from pydantic import BaseModel, Field
 
+from app.config import settings
+
+# Latency classes; each is routed to the Celery queue of the same name.
+Priority = Literal["realtime", "default", "bulk"]
+PRIORITIES: tuple[str, ...] = get_args(Priority)
+
 
 class InferenceRequest(BaseModel):
     text: str = Field(min_length=1, max_length=5000)
     model_version: str | None = None
+    mode: Literal["async", "sync"] = "async"
+    sync_timeout_ms: int | None = Field(default=None, gt=0)
+    priority: Priority = "default"
+    # Past the earlier of the two, a job still waiting is expired instead of run.
+    deadline: datetime | None = None
+    max_age_seconds: float | None = Field(default=None, gt=0)
 
 
 class InferenceAcceptedResponse(BaseModel):
     job_id: str
     status: str
     idempotency_key: str | None = None
+    result: dict | None = None
+
+
+class BatchInferenceItem(BaseModel):
+    text: str = Field(min_length=1, max_length=5000)
+    idempotency_key: str | None = Field(default=None, max_length=128)
+
+
+class BatchInferenceRequest(BaseModel):
+    items: list[BatchInferenceItem] = Field(min_length=1, max_length=settings.batch_max_items)
+    model_version: str | None = None
+    priority: Priority = "default"
+    deadline: datetime | None = None
+    max_age_seconds: float | None = Field(default=None, gt=0)
+
+
+class BatchInferenceAcceptedResponse(BaseModel):
+    jobs: list[InferenceAcceptedResponse]
 
 
 class JobStatusResponse(BaseModel):
     job_id: str
     status: str
+    priority: str | None = None
     result: dict | None = None
     error: str | None = None
     retry_count: int | None = None
+    deadline: datetime | None = None
     created_at: datetime | None = None
     updated_at: datetime | None = None
+    enqueued_at: datetime | None = None
+    started_at: datetime | None = None
+    inference_started_at: datetime | None = None
+    inference_finished_at: datetime | None = None
+    persisted_at: datetime | None = None
+
+
+class JobSummary(BaseModel):
+    job_id: str
+    status: str
+    model_version: str
+    priority: str
+    idempotency_key: str | None = None
+    result: dict | None = None
+    error: str | None = None
+    retry_count: int
+    deadline: datetime | None = None
+    created_at: datetime
+    updated_at: datetime
+    input_text: str | None = None
+
+
+class JobListResponse(BaseModel):
+    jobs: list[JobSummary]
+    next_cursor: str | None = None
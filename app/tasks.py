@@ -1,61 +1,392 @@
+import atexit
 import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from concurrent.futures import TimeoutError as BatchTimeoutError
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
 from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import setup_logging, task_revoked, worker_init, worker_process_init, worker_process_shutdown
+from celery.utils.time import get_exponential_backoff_interval
+from sqlalchemy.orm import Session
 
-from app.celery_app import celery
+from app.batching import InferenceBatcher
+from app.cache import result_cache
+from app.celery_app import EDF_SLACK_BUCKETS, celery
 from app.config import settings
 from app.database import SessionLocal
-from app.job_store import update_job_failed, update_job_started, update_job_succeeded
+from app.job_store import (
+    get_input_text,
+    update_job_expired,
+    update_job_failed,
+    update_job_started,
+    update_job_succeeded,
+)
+from app.journal import submission_journal
+from app.logging_config import configure_logging, stop_logging
 from app.metrics import metrics
-from app.model import predict_text
+from app.notifications import job_notifier
+from app.registry import model_registry
+from app.retention import run_purge
+from app.write_behind import StatusWriteBuffer
 
 logger = logging.getLogger(__name__)
 
+# Micro-batching needs several tasks in flight per process (e.g. --pool threads). Only
+# jobs for the same model can share a predict_batch call, so there is one batcher per
+# resolved model version.
+_batchers: dict[str, InferenceBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def _batcher_for(model_version: str) -> InferenceBatcher | None:
+    if settings.inference_batch_size <= 1:
+        return None
+    version = model_registry.resolve(model_version)
+    with _batchers_lock:
+        batcher = _batchers.get(version)
+        if batcher is None:
+            batcher = _batchers[version] = InferenceBatcher(
+                lambda texts: model_registry.get(version).predict_batch(texts),
+                SessionLocal,
+                max_batch_size=settings.inference_batch_size,
+                max_wait_ms=settings.inference_batch_wait_ms,
+            )
+    return batcher
+
+
+def _publish(event: dict) -> None:
+    # Wakes long-poll, SSE and WebSocket waiters without a DB read.
+    if job_notifier:
+        job_notifier.publish(event["job_id"], event)
+
+
+write_buffer = (
+    StatusWriteBuffer(
+        SessionLocal,
+        max_delay_ms=settings.write_behind_max_delay_ms,
+        max_pending=settings.write_behind_max_pending,
+        publish=_publish,
+    )
+    if settings.write_behind_enabled
+    else None
+)
+
+
+@worker_process_shutdown.connect
+def _flush_write_buffer(**_) -> None:
+    if write_buffer is not None:
+        write_buffer.flush()
+    # Prefork children exit without running atexit hooks.
+    metrics.write_snapshot()
+    stop_logging()
+
+
+atexit.register(_flush_write_buffer)
+
+
+@setup_logging.connect
+def _configure_worker_logging(**_) -> None:
+    # Replaces Celery's own log setup, so workers log the same queued JSON lines as the API.
+    configure_logging()
+
+
+@worker_process_init.connect
+def _preload_models_in_child(**_) -> None:
+    # Each prefork child loads its own copy before taking tasks.
+    if settings.model_preload:
+        model_registry.preload()
+
+
+@worker_init.connect
+def _preload_models(sender=None, **_) -> None:
+    # Thread/solo pools run tasks in this process; prefork children preload themselves.
+    if settings.model_preload and "prefork" not in str(getattr(sender, "pool_cls", "prefork")):
+        model_registry.preload()
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class _AttemptTimer:
+    # Stage timestamps and latencies of one task attempt; the timestamps are stored on
+    # the job row, the latencies recorded as histograms once the outcome is known.
+    def __init__(self, model_version: str, submitted_at: float | None, first_attempt: bool) -> None:
+        self.model_version = model_version
+        self.submitted_at = submitted_at
+        self.first_attempt = first_attempt
+        self.picked_up_at = time.time()
+        self.inference_started_at: datetime | None = None
+        self.inference_finished_at: datetime | None = None
+        self.inference_seconds: float | None = None
+        self.db_seconds: float | None = None
+
+    @property
+    def enqueued_at(self) -> datetime | None:
+        return _utc(self.submitted_at) if self.submitted_at is not None else None
+
+    @property
+    def started_at(self) -> datetime:
+        return _utc(self.picked_up_at)
+
+    @contextmanager
+    def inference(self) -> Iterator[None]:
+        self.inference_started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inference_seconds = time.perf_counter() - started
+            self.inference_finished_at = datetime.now(timezone.utc)
+
+    @contextmanager
+    def db_write(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.db_seconds = (self.db_seconds or 0.0) + time.perf_counter() - started
+
+    def record(self, outcome: str) -> None:
+        model_version = self.model_version
+        if self.submitted_at is not None:
+            # Retries wait out their backoff on purpose; only the first pickup is queue wait.
+            if self.first_attempt:
+                metrics.observe("queue_wait_seconds", self.picked_up_at - self.submitted_at, model_version, outcome)
+            if outcome != "retry":
+                metrics.observe("end_to_end_seconds", time.time() - self.submitted_at, model_version, outcome)
+        if self.inference_seconds is not None:
+            metrics.observe("inference_seconds", self.inference_seconds, model_version, outcome)
+        if self.db_seconds is not None:
+            metrics.observe("db_write_seconds", self.db_seconds, model_version, outcome)
+
+
+def _mark_started(db: Session, job_id: str, retry_count: int, timer: _AttemptTimer) -> None:
+    stages = {"enqueued_at": timer.enqueued_at, "started_at": timer.started_at}
+    if write_buffer is not None:
+        write_buffer.record(job_id, {"status": "started", "retry_count": retry_count, **stages})
+    else:
+        update_job_started(db, job_id, retry_count, **stages)
+
+
+def _inference_stages(timer: _AttemptTimer) -> dict:
+    return {
+        "inference_started_at": timer.inference_started_at,
+        "inference_finished_at": timer.inference_finished_at,
+    }
+
+
+def _mark_succeeded(db: Session, job_id: str, result: dict, retry_count: int, timer: _AttemptTimer) -> None:
+    event = {"job_id": job_id, "status": "succeeded", "result": result, "retry_count": retry_count}
+    stages = _inference_stages(timer)
+    if write_buffer is not None:
+        values = {"status": "succeeded", "result_label": result["label"], "result_score": result["score"]}
+        write_buffer.record(job_id, {**values, "error": None, **stages}, event)
+    else:
+        if update_job_succeeded(db, job_id, result["label"], result["score"], **stages):
+            _publish(event)
+
+
+def _mark_failed(db: Session, job_id: str, error: str, retry_count: int, timer: _AttemptTimer) -> None:
+    event = {"job_id": job_id, "status": "failed", "error": error, "retry_count": retry_count}
+    stages = _inference_stages(timer)
+    if write_buffer is not None:
+        write_buffer.record(job_id, {"status": "failed", "error": error, "retry_count": retry_count, **stages}, event)
+    else:
+        if update_job_failed(db, job_id, error, retry_count, **stages):
+            _publish(event)
+
+
+def _mark_expired(db: Session, job_id: str, error: str, retry_count: int) -> None:
+    event = {"job_id": job_id, "status": "expired", "error": error, "retry_count": retry_count}
+    if write_buffer is not None:
+        write_buffer.record(job_id, {"status": "expired", "error": error, "retry_count": retry_count}, event)
+    else:
+        if update_job_expired(db, job_id, error, retry_count):
+            _publish(event)
+
+
+def _expire(db: Session, job_id: str, error: str, retry_count: int, timer: _AttemptTimer) -> None:
+    with timer.db_write():
+        _mark_expired(db, job_id, error, retry_count)
+    metrics.inc_expired()
+    timer.record("expired")
+    logger.info("inference_expired", extra={"job_id": job_id, "status": "expired"})
+
+
+def task_payload(
+    text: str,
+    model_version: str,
+    *,
+    mode: str = settings.task_payload_mode,
+    compression: str | None = settings.task_compression,
+    compression_min_chars: int = settings.task_compression_min_chars,
+) -> tuple[tuple, dict]:
+    # Args and publish options for run_inference. In reference mode the message carries no
+    # text and the worker reads it from the jobs table, which already stores it.
+    if mode == "reference":
+        return (None, model_version), {}
+    options = {}
+    if compression and len(text) >= compression_min_chars:
+        options["compression"] = compression
+    return (text, model_version), options
+
+
+def deadline_options(deadline: datetime | None, *, slack_buckets: tuple[float, ...] = EDF_SLACK_BUCKETS) -> dict:
+    # Publish options for a job's deadline. The message expires with it, so a worker drops it
+    # on receipt once late; with slack buckets, the less time is left the higher the priority
+    # step (0 is served first), approximating earliest-deadline-first within each queue.
+    options: dict = {}
+    if deadline is not None:
+        options["expires"] = deadline
+    if slack_buckets:
+        slack = deadline.timestamp() - time.time() if deadline is not None else math.inf
+        options["priority"] = bisect_left(slack_buckets, slack)
+    return options
+
+
+_RETRY_BACKOFF_MAX_SECONDS = 600
+
+
+def _retry_delay(retry_count: int) -> float:
+    # The longest backoff autoretry can pick for the next attempt; jitter only shortens it.
+    return get_exponential_backoff_interval(
+        factor=settings.retry_backoff_seconds,
+        retries=retry_count,
+        maximum=_RETRY_BACKOFF_MAX_SECONDS,
+        full_jitter=False,
+    )
+
 
 @celery.task(
     bind=True,
     name="app.tasks.run_inference",
     autoretry_for=(RuntimeError,),
     retry_backoff=settings.retry_backoff_seconds,
+    retry_backoff_max=_RETRY_BACKOFF_MAX_SECONDS,
     retry_jitter=True,
     retry_kwargs={"max_retries": settings.max_retries},
 )
-def run_inference(self, text: str, model_version: str) -> dict:
+def run_inference(
+    self, text: str | None, model_version: str, submitted_at: float | None = None, deadline: float | None = None
+) -> dict | None:
     db = SessionLocal()
+    if submission_journal is not None:
+        # The API may have accepted the job before a flusher stored its row.
+        submission_journal.materialize(db, self.request.id)
     retry_count = int(self.request.retries or 0)
-    # Persist start state before model work begins.
-    update_job_started(db, self.request.id, retry_count)
+    timer = _AttemptTimer(model_version, submitted_at, first_attempt=retry_count == 0)
+    if deadline is not None and time.time() >= deadline:
+        # Whoever asked has stopped waiting; skip the model (and the text lookup).
+        try:
+            _expire(db, self.request.id, "deadline passed before the job started", retry_count, timer)
+        finally:
+            db.close()
+        return None
+    if text is None:
+        text = get_input_text(db, self.request.id)
+        if text is None:
+            db.close()
+            raise LookupError(f"job {self.request.id} not found")
+    batcher = _batcher_for(model_version)
+    if batcher is None:
+        # Persist start state before model work begins.
+        with timer.db_write():
+            _mark_started(db, self.request.id, retry_count, timer)
     logger.info("inference_started", extra={"job_id": self.request.id, "status": "started"})
 
+    future = None
     try:
-        prediction = predict_text(text)
-        score = round(prediction.score, 4)
-        update_job_succeeded(db, self.request.id, prediction.label, score)
-        metrics.inc_succeeded()
-        logger.info("inference_succeeded", extra={"job_id": self.request.id, "status": "succeeded"})
+        with timer.inference():
+            if batcher is not None:
+                # The batcher persists started/succeeded states for the whole batch.
+                future = batcher.submit(self.request.id, text, retry_count, enqueued_at=timer.enqueued_at)
+                batched = future.result(timeout=settings.inference_timeout_seconds)
+                prediction = batched.prediction
+                score = prediction.score
+            else:
+                prediction = model_registry.get(model_version).predict(text)
+                score = round(prediction.score, 4)
 
-        return {
+        result = {
             "label": prediction.label,
             "score": score,
             "model_version": model_version,
         }
-    except SoftTimeLimitExceeded as exc:
+        if batcher is not None:
+            timer.db_seconds = batched.db_seconds
+            if not batched.stored:
+                # The row finished another way first; announcing success would contradict it.
+                timer.record("discarded")
+                logger.info("inference_discarded", extra={"job_id": self.request.id, "status": "discarded"})
+                return None
+            _publish({"job_id": self.request.id, "status": "succeeded", "result": result, "retry_count": retry_count})
+        else:
+            with timer.db_write():
+                _mark_succeeded(db, self.request.id, result, retry_count, timer)
+        if result_cache:
+            result_cache.set(text, model_version, prediction.label, score)
+        metrics.inc_succeeded()
+        timer.record("succeeded")
+        logger.info("inference_succeeded", extra={"job_id": self.request.id, "status": "succeeded"})
+        return result
+    except (SoftTimeLimitExceeded, BatchTimeoutError) as exc:
+        if future is not None:
+            future.cancel()
         error = f"inference timeout after {settings.inference_timeout_seconds}s"
-        update_job_failed(db, self.request.id, error, retry_count)
+        with timer.db_write():
+            _mark_failed(db, self.request.id, error, retry_count, timer)
         metrics.inc_failed()
+        timer.record("failed")
         logger.exception("inference_timeout", extra={"job_id": self.request.id, "status": "failed"})
         raise exc
     except RuntimeError as exc:
-        # Let Celery retry transient runtime failures.
+        # Let Celery retry transient runtime failures, unless the retry could only start late.
         if retry_count >= settings.max_retries:
-            update_job_failed(db, self.request.id, str(exc), retry_count)
+            with timer.db_write():
+                _mark_failed(db, self.request.id, str(exc), retry_count, timer)
             metrics.inc_failed()
+            timer.record("failed")
             logger.exception("inference_failed", extra={"job_id": self.request.id, "status": "failed"})
+        elif deadline is not None and time.time() + _retry_delay(retry_count) >= deadline:
+            _expire(db, self.request.id, f"deadline would pass before a retry: {exc}", retry_count, timer)
+            return None
+        else:
+            timer.record("retry")
         raise
     except Exception as exc:
-        update_job_failed(db, self.request.id, str(exc), retry_count)
+        with timer.db_write():
+            _mark_failed(db, self.request.id, str(exc), retry_count, timer)
         metrics.inc_failed()
+        timer.record("failed")
         logger.exception("inference_failed", extra={"job_id": self.request.id, "status": "failed"})
         raise
     finally:
         db.close()
+
+
+@task_revoked.connect
+def _expire_dropped_message(sender=None, request=None, expired: bool = False, **_) -> None:
+    # A worker discards a message received past its `expires` without running the task;
+    # record that on the job, which would otherwise stay queued.
+    if not expired or getattr(sender, "name", None) != run_inference.name or request is None:
+        return
+    db = SessionLocal()
+    try:
+        if submission_journal is not None:
+            submission_journal.materialize(db, request.id)
+        _mark_expired(db, request.id, "deadline passed before the job started", int(request.retries or 0))
+        metrics.inc_expired()
+        logger.info("inference_expired", extra={"job_id": request.id, "status": "expired"})
+    finally:
+        db.close()
+
+
+@celery.task(name="app.tasks.purge_expired_jobs")
+def purge_expired_jobs() -> int:
+    return run_purge()
@@ -0,0 +1,75 @@
+import logging
+import threading
+from collections.abc import Callable
+
+from sqlalchemy.orm import Session
+
+from app.job_store import apply_job_updates
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriteBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_delay_ms: int,
+        max_pending: int,
+        publish: Callable[[dict], None] | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_delay = max_delay_ms / 1000
+        self._max_pending = max_pending
+        self._publish = publish
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._updates: dict[str, dict] = {}
+        self._events: list[dict] = []
+        self._thread: threading.Thread | None = None
+
+    def record(self, job_id: str, values: dict, event: dict | None = None) -> None:
+        with self._lock:
+            # Later transitions win, so started -> succeeded collapses into one write.
+            self._updates[job_id] = {**self._updates.get(job_id, {}), **values}
+            if event is not None:
+                self._events.append(event)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="status-write-behind", daemon=True)
+                self._thread.start()
+            full = len(self._updates) >= self._max_pending
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                updates, self._updates = self._updates, {}
+                events, self._events = self._events, []
+            if not updates:
+                return
+
+            db = self._session_factory()
+            try:
+                apply_job_updates(db, updates)
+            except Exception:
+                logger.exception("write_behind_flush_failed")
+                with self._lock:
+                    # Keep anything recorded since the swap on top of the failed batch.
+                    for job_id, values in updates.items():
+                        self._updates[job_id] = {**values, **self._updates.get(job_id, {})}
+                    self._events[:0] = events
+                return
+            finally:
+                db.close()
+
+        # Terminal events go out only once the rows they describe are durable.
+        if self._publish is not None:
+            for event in events:
+                self._publish(event)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self._max_delay)
+            self._wakeup.clear()
+            self.flush()
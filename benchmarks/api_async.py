@@ -0,0 +1,97 @@
+import argparse
+import logging
+import asyncio
+import os
+import statistics
+import time
+from uuid import uuid4
+
+# In-process defaults so the benchmark runs without Redis; export real URLs to override.
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_api.db")
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+os.environ.setdefault("JOB_EVENTS_BACKEND", "none")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import SessionLocal, get_db, init_db  # noqa: E402
+from app.job_store import create_job, get_job  # noqa: E402
+from app.main import _status_response, app  # noqa: E402
+from app.schemas import JobStatusResponse  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _sync_reference_app() -> FastAPI:
+    # The pre-async read path: sync route on the threadpool with a sync session.
+    reference = FastAPI()
+
+    @reference.get("/v1/jobs/{job_id}", response_model=JobStatusResponse)
+    def get_job_status(job_id: str, db: Session = Depends(get_db)) -> JobStatusResponse:
+        return _status_response(get_job(db, job_id))
+
+    return reference
+
+
+def _seed_jobs(count: int) -> list[str]:
+    db = SessionLocal()
+    try:
+        job_ids = [str(uuid4()) for _ in range(count)]
+        for job_id in job_ids:
+            create_job(db, job_id=job_id, input_text="benchmark text", model_version="bench", idempotency_key=None)
+        return job_ids
+    finally:
+        db.close()
+
+
+async def _drive(target: FastAPI, job_ids: list[str], requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    transport = httpx.ASGITransport(app=target)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            for index in counter:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(f"/v1/jobs/{job_ids[index % len(job_ids)]}")
+                    response.raise_for_status()
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GET /v1/jobs/{job_id}: async stack vs sync threadpool path")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    init_db()
+    job_ids = _seed_jobs(args.jobs)
+    for name, target in (("sync", _sync_reference_app()), ("async", app)):
+        result = asyncio.run(_drive(target, job_ids, args.requests, args.concurrency))
+        print(f"{name:>5}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+# In-process defaults (eager Celery, memory broker, SQLite) so the harness runs without
+# Docker, e.g. in CI. Ignored with --base-url, which targets a running deployment.
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_loadgen.db")
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+os.environ.setdefault("JOB_EVENTS_BACKEND", "local")
+
+import httpx  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Kept in step with app.job_store.TERMINAL_STATUSES, which is not imported so that --base-url
+# runs need only httpx.
+_TERMINAL = {"succeeded", "failed", "expired"}
+_MAX_TEXT_LENGTH = 5000
+_VOCABULARY = (
+    "meeting lunch report invoice project update schedule team review coffee tomorrow thanks "
+    "please call today office travel ticket order delivery account weekend family photo "
+    "free win offer click urgent prize limited time"
+).split()
+_PERCENTILES = (("50", 50), ("90", 90), ("99", 99), ("99_9", 99.9))
+
+
+class Histogram:
+    # Log-linear buckets in the style of HdrHistogram: integer microseconds keep their top
+    # `significant_bits` bits, so every recorded value is within ~1% of its bucket whatever
+    # its magnitude, and memory stays bounded.
+    def __init__(self, significant_bits: int = 7) -> None:
+        self._bits = significant_bits
+        self._counts: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _shift(self, value: int) -> int:
+        return max(0, value.bit_length() - self._bits)
+
+    def record(self, seconds: float) -> None:
+        value = max(0, round(seconds * 1_000_000))
+        shift = self._shift(value)
+        self._counts[(value >> shift) << shift] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> float:
+        # Milliseconds; the bucket's highest equivalent value, as HdrHistogram reports it.
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for lower in sorted(self._counts):
+            seen += self._counts[lower]
+            if seen >= rank:
+                return min(lower + (1 << self._shift(lower)) - 1, self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            **{f"p{label}": round(self.percentile(percent), 3) for label, percent in _PERCENTILES},
+            "max": round(self.max / 1000, 3),
+        }
+
+
+def length_sampler(spec: str, rng: random.Random) -> Callable[[], int]:
+    # fixed:N | uniform:MIN:MAX | lognormal:MEDIAN:SIGMA, clamped to the API's 1..5000.
+    kind, *params = spec.split(":")
+    values = [float(param) for param in params]
+    if kind == "fixed" and len(values) == 1:
+        draw = lambda: values[0]  # noqa: E731
+    elif kind == "uniform" and len(values) == 2:
+        draw = lambda: rng.uniform(values[0], values[1])  # noqa: E731
+    elif kind == "lognormal" and len(values) == 2:
+        draw = lambda: rng.lognormvariate(math.log(values[0]), values[1])  # noqa: E731
+    else:
+        raise ValueError(f"unknown text length distribution: {spec!r}")
+    return lambda: min(_MAX_TEXT_LENGTH, max(1, round(draw())))
+
+
+def make_text(rng: random.Random, length: int) -> str:
+    words: list[str] = []
+    size = 0
+    while size < length:
+        word = rng.choice(_VOCABULARY)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length].strip() or "x"
+
+
+@dataclass
+class _Run:
+    submit: Histogram = field(default_factory=Histogram)
+    result: Histogram = field(default_factory=Histogram)
+    completions: list[float] = field(default_factory=list)
+    sent: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    errors: int = 0
+    dropped: int = 0
+
+
+async def _one_job(
+    client: httpx.AsyncClient,
+    run: _Run,
+    text: str,
+    args: argparse.Namespace,
+    intended_start: float,
+) -> None:
+    # Latencies are measured from the intended start: in open-loop mode a request that
+    # went out late because the system was backed up is charged for that delay, which is
+    # what corrects for coordinated omission.
+    run.sent += 1
+    try:
+        payload = {"text": text, "model_version": args.model_version, "priority": args.priority}
+        response = await client.post("/v1/inference", json=payload)
+        response.raise_for_status()
+        run.submit.record(time.perf_counter() - intended_start)
+        body = response.json()
+        job_id, status = body["job_id"], body["status"]
+        deadline = intended_start + args.timeout
+        while status not in _TERMINAL:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(job_id)
+            response = await client.get(f"/v1/jobs/{job_id}", params={"wait": args.wait})
+            response.raise_for_status()
+            status = response.json()["status"]
+    except Exception:
+        run.errors += 1
+        return
+    finished = time.perf_counter()
+    run.result.record(finished - intended_start)
+    run.completions.append(finished)
+    if status == "succeeded":
+        run.succeeded += 1
+    else:
+        run.failed += 1
+
+
+async def _closed_loop(args: argparse.Namespace, client: httpx.AsyncClient, run: _Run, next_text) -> None:
+    # Fixed number of virtual users, each sending its next request when the last finished.
+    remaining = iter(range(args.requests)) if args.requests else None
+    stop_at = time.perf_counter() + args.duration if args.duration else math.inf
+
+    async def user() -> None:
+        while time.perf_counter() < stop_at:
+            if remaining is not None and next(remaining, None) is None:
+                return
+            await _one_job(client, run, next_text(), args, time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(args.concurrency)))
+
+
+async def _open_loop(args: argparse.Namespace, client: httpx.AsyncClient, run: _Run, next_text, rng) -> None:
+    # Arrivals follow a fixed schedule whatever the response times.
+    total = args.requests or math.ceil(args.rate * args.duration)
+    start = time.perf_counter()
+    intended = start
+    tasks: set[asyncio.Task] = set()
+    for _ in range(total):
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= args.max_inflight:
+            run.dropped += 1
+        else:
+            task = asyncio.create_task(_one_job(client, run, next_text(), args, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        interval = rng.expovariate(args.rate) if args.arrivals == "poisson" else 1 / args.rate
+        intended += interval
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _client(base_url: str | None, connections: int) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(60.0)
+    if base_url:
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+
+    from app.database import init_db
+    from app.main import app
+
+    init_db()
+    # Per-job app logs would swamp the report and cost more than the requests themselves.
+    logging.getLogger().setLevel(logging.WARNING)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen", timeout=timeout)
+
+
+def _throughput(run: _Run, start: float, elapsed: float) -> dict:
+    per_second = Counter(int(finished - start) for finished in run.completions)
+    # Only whole seconds; the last partial second would understate the rate.
+    windows = sorted(per_second.get(second, 0) for second in range(int(elapsed)))
+    return {
+        "achieved_rps": round(len(run.completions) / elapsed, 2) if elapsed else 0.0,
+        "per_second_min": windows[0] if windows else None,
+        "per_second_p50": windows[len(windows) // 2] if windows else None,
+        "per_second_max": windows[-1] if windows else None,
+    }
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    sample_length = length_sampler(args.text_length, rng)
+    run = _Run()
+    connections = args.concurrency if args.mode == "closed" else args.max_inflight
+
+    async with _client(args.base_url, connections) as client:
+        start = time.perf_counter()
+        if args.mode == "closed":
+            await _closed_loop(args, client, run, lambda: make_text(rng, sample_length()))
+        else:
+            await _open_loop(args, client, run, lambda: make_text(rng, sample_length()), rng)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "target": args.base_url or "in-process",
+        "config": {
+            "mode": args.mode,
+            "requests": args.requests,
+            "duration": args.duration,
+            "concurrency": args.concurrency if args.mode == "closed" else None,
+            "rate": args.rate if args.mode == "open" else None,
+            "arrivals": args.arrivals if args.mode == "open" else None,
+            "text_length": args.text_length,
+            "model_version": args.model_version,
+            "priority": args.priority,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "sent": run.sent,
+        "succeeded": run.succeeded,
+        "failed": run.failed,
+        "errors": run.errors,
+        "dropped": run.dropped,
+        "submit_latency_ms": run.submit.summary(),
+        "time_to_result_ms": run.result.summary(),
+        "throughput": _throughput(run, start, elapsed),
+    }
+
+
+def compare(report: dict, baseline: dict) -> list[str]:
+    lines = []
+    for section in ("submit_latency_ms", "time_to_result_ms"):
+        for key in ("p50", "p99", "p99_9"):
+            lines.append(_delta_line(f"{section}.{key}", baseline[section][key], report[section][key]))
+    rps = "achieved_rps"
+    lines.append(_delta_line(f"throughput.{rps}", baseline["throughput"][rps], report["throughput"][rps]))
+    return lines
+
+
+def _delta_line(name: str, before: float, after: float) -> str:
+    change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+    return f"{name:<32} {before:>10} -> {after:>10}  {change}"
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Closed- and open-loop load generator for the inference API")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--requests", type=int, default=200, help="total jobs; 0 to run for --duration")
+    parser.add_argument("--duration", type=float, default=0, help="seconds, used when --requests is 0")
+    parser.add_argument("--concurrency", type=int, default=10, help="closed loop: virtual users")
+    parser.add_argument("--rate", type=float, default=50, help="open loop: arrivals per second")
+    parser.add_argument("--arrivals", choices=("uniform", "poisson"), default="uniform")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="open loop: drop arrivals beyond this")
+    parser.add_argument(
+        "--text-length", default="lognormal:200:0.8", help="fixed:N, uniform:A:B or lognormal:MEDIAN:SIGMA"
+    )
+    parser.add_argument("--model-version", default=None)
+    parser.add_argument("--priority", choices=("realtime", "default", "bulk"), default="default")
+    parser.add_argument("--wait", type=float, default=5, help="long-poll seconds per status request")
+    parser.add_argument("--timeout", type=float, default=60, help="give up on a job after this many seconds")
+    parser.add_argument("--base-url", default=None, help="running API; default drives the app in-process")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to diff against")
+    return parser
+
+
+def main() -> None:
+    args = _parser().parse_args()
+    if not args.requests and not args.duration:
+        raise SystemExit("set --requests or --duration")
+    report = asyncio.run(run_load(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    print(text)
+    if args.compare:
+        with open(args.compare) as handle:
+            print("\n".join(compare(report, json.load(handle))))
+
+
+if __name__ == "__main__":
+    main()
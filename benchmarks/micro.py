@@ -0,0 +1,247 @@
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from functools import partial
+from itertools import count
+from logging.handlers import QueueListener
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.db_models import JobRecord
+from app.hashed_model import HashedLinearModel
+from app.job_store import create_job, update_job_failed, update_job_started, update_job_succeeded
+from app.logging_config import BoundedQueueHandler, JsonFormatter
+from app.model import predict_text
+from app.schemas import InferenceRequest, JobStatusResponse
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+TEXT_SIZES = (50, 500, 5000)
+
+_WORDS = "please review the attached invoice before our meeting tomorrow free offer click".split()
+
+
+def _text(length: int) -> str:
+    words = (_WORDS * (length // 10 + 1))[: length // 5 + 1]
+    return " ".join(words)[:length]
+
+
+def _calibration() -> None:
+    # Fixed pure-Python workload; results are stored relative to it so a baseline taken on
+    # one machine still means something on a faster or slower one.
+    total = 0
+    for value in range(2000):
+        total += value * value % 7
+    "".join(str(value) for value in range(200))
+
+
+def _session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True)
+
+
+def _model_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    for size in TEXT_SIZES:
+        text = _text(size)
+        yield f"model.predict_text[{size}]", partial(predict_text, text)
+
+    # Weights are random: scoring cost does not depend on what the model learned.
+    weights = np.random.default_rng(0).standard_normal(1 << 18, dtype=np.float32)
+    hashed = HashedLinearModel(weights, bias=0.0, ngrams=2, labels=("ham", "spam"))
+    texts = [" ".join(random.Random(seed).choices(_WORDS, k=100))[:500] for seed in range(256)]
+    yield "model.hashed.predict[500]", partial(hashed.predict, texts[0])
+    for batch_size in (32, 256):
+        yield f"model.hashed.predict_batch[{batch_size}x500]", partial(hashed.predict_batch, texts[:batch_size])
+
+
+def _job_store_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    db = _session_factory()()
+    ids = count()
+
+    for size in (50, 5000):
+        text = _text(size)
+
+        def insert(text: str = text) -> None:
+            create_job(db, job_id=f"job-{next(ids)}", input_text=text, model_version="v1", idempotency_key=None)
+
+        yield f"job_store.create_job[{size}]", insert
+
+    started = _Transition(db, "queued", lambda job_id: update_job_started(db, job_id, 0))
+    succeeded = _Transition(db, "started", lambda job_id: update_job_succeeded(db, job_id, "ham", 0.9))
+    failed = _Transition(db, "started", lambda job_id: update_job_failed(db, job_id, "boom", 1))
+    yield "job_store.update_job_started", started
+    yield "job_store.update_job_succeeded", succeeded
+    yield "job_store.update_job_failed", failed
+
+
+class _Transition:
+    # Terminal rows are write-once, so every timed call needs its own row in the prior state.
+    # measure() calls prepare() with the round's call count before starting the clock.
+    _ids = count()
+
+    def __init__(self, db: Session, status: str, transition: Callable[[str], bool]) -> None:
+        self._db = db
+        self._status = status
+        self._transition = transition
+        self._pending: deque[str] = deque()
+
+    def prepare(self, calls: int) -> None:
+        job_ids = [f"{self._status}-{next(_Transition._ids)}" for _ in range(calls)]
+        self._db.add_all(
+            JobRecord(job_id=job_id, input_text="x", model_version="v1", status=self._status) for job_id in job_ids
+        )
+        self._db.commit()
+        self._pending = deque(job_ids)
+
+    def __call__(self) -> bool:
+        return self._transition(self._pending.popleft())
+
+
+def _schema_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    for size in TEXT_SIZES:
+        payload = json.dumps({"text": _text(size), "model_version": "v1"})
+        yield f"schemas.InferenceRequest.validate[{size}]", partial(InferenceRequest.model_validate_json, payload)
+
+    now = datetime.now(timezone.utc)
+    response = JobStatusResponse(
+        job_id="0f8fad5b-d9cb-469f-a165-70867728950e",
+        status="succeeded",
+        result={"label": "spam", "score": 0.85, "model_version": "v1"},
+        retry_count=0,
+        created_at=now,
+        updated_at=now,
+        enqueued_at=now,
+        started_at=now,
+        inference_started_at=now,
+        inference_finished_at=now,
+        persisted_at=now,
+    )
+    body = response.model_dump_json()
+    yield "schemas.JobStatusResponse.dump_json", response.model_dump_json
+    yield "schemas.JobStatusResponse.validate", lambda: JobStatusResponse.model_validate_json(body)
+
+
+def _logging_cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    formatter = JsonFormatter()
+    record = logging.LogRecord("app.tasks", logging.INFO, __file__, 1, "inference_succeeded", None, None)
+    record.job_id = "0f8fad5b-d9cb-469f-a165-70867728950e"
+    record.status = "succeeded"
+    yield "logging.JsonFormatter.format", lambda: formatter.format(record)
+
+    # What a request thread pays per line once formatting moved to the listener thread.
+    handler = BoundedQueueHandler(10_000)
+    QueueListener(handler.queue, logging.NullHandler()).start()
+    yield "logging.BoundedQueueHandler.handle", lambda: handler.handle(record)
+
+
+def cases() -> Iterator[tuple[str, Callable[[], object]]]:
+    yield from _model_cases()
+    yield from _job_store_cases()
+    yield from _schema_cases()
+    yield from _logging_cases()
+
+
+def measure(fn: Callable[[], object], min_time: float, repeat: int) -> float:
+    # Best-of-`repeat` seconds per call; each round loops long enough to last `min_time`.
+    prepare = getattr(fn, "prepare", None)
+    loops = 1
+    while True:
+        if prepare:
+            prepare(loops)
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        if prepare:
+            prepare(loops)
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def run(selected: str | None, min_time: float, repeat: int) -> dict:
+    results = {}
+    for name, fn in cases():
+        if selected and selected not in name:
+            continue
+        # Calibrate next to each case so CPU frequency drift hits both sides equally.
+        calibration = measure(_calibration, min_time, repeat)
+        seconds = measure(fn, min_time, repeat)
+        results[name] = {"ns": round(seconds * 1e9, 1), "relative": round(seconds / calibration, 6)}
+    return {"python": platform.python_version(), "results": results}
+
+
+def regressions(report: dict, baseline: dict, max_regression_percent: float) -> dict[str, str]:
+    failures = {}
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = (result["relative"] - before["relative"]) / before["relative"] * 100
+        if change > max_regression_percent:
+            failures[name] = f"{name}: {change:+.1f}% ({before['ns']}ns -> {result['ns']}ns)"
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for per-job hot paths")
+    parser.add_argument("--filter", default=None, help="only cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a case regressed past --max-regression")
+    parser.add_argument("--max-regression", type=float, default=25.0, help="percent, calibration-relative")
+    parser.add_argument("--confirm", type=int, default=2, help="re-runs a regressed case must also fail")
+    args = parser.parse_args()
+
+    report = run(args.filter, args.min_time, args.repeat)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    for name, result in report["results"].items():
+        line = f"{name:<45} {result['ns']:>12.1f} ns"
+        before = (baseline or {}).get("results", {}).get(name)
+        if before:
+            line += f"  {(result['relative'] - before['relative']) / before['relative'] * 100:+7.1f}%"
+        print(line)
+
+    if args.save:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+    if args.check:
+        if baseline is None:
+            sys.exit(f"no baseline at {args.baseline}; run with --save first")
+        failures = regressions(report, baseline, args.max_regression)
+        # A case only fails if it is slow on every re-run; one noisy round is not a regression.
+        for _ in range(args.confirm):
+            if not failures:
+                break
+            rerun = {"results": {}}
+            for name in failures:
+                rerun["results"].update(run(name, args.min_time, args.repeat)["results"])
+            still = regressions(rerun, baseline, args.max_regression)
+            failures = {name: line for name, line in still.items() if name in failures}
+        if failures:
+            print(f"regressed more than {args.max_regression}%:", *failures.values(), sep="\n  ")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import random
+import string
+import time
+
+from app.model import KeywordMatcher
+
+
+def _naive_count(keywords: set[str], text: str) -> int:
+    return sum(1 for kw in keywords if kw in text)
+
+
+def _random_words(rng: random.Random, count: int) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(count)]
+
+
+def _timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keyword matcher scaling benchmark")
+    parser.add_argument("--keyword-counts", default="7,100,1000,5000")
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--text-length", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = _random_words(rng, 20000)
+    texts = []
+    for _ in range(args.texts):
+        words: list[str] = []
+        while sum(len(word) + 1 for word in words) < args.text_length:
+            words.append(rng.choice(vocabulary))
+        texts.append(" ".join(words)[: args.text_length])
+
+    print(f"{'keywords':>9} {'naive ms/text':>14} {'count ms/text':>14} {'count_many ms/text':>19}")
+    for keyword_count in (int(value) for value in args.keyword_counts.split(",")):
+        keywords = set(rng.sample(vocabulary, keyword_count))
+        matcher = KeywordMatcher(keywords)
+        assert matcher.count_many(texts) == [_naive_count(keywords, text) for text in texts]
+
+        naive = _timed(lambda: [_naive_count(keywords, text) for text in texts], args.repeat)
+        single = _timed(lambda: [matcher.count(text) for text in texts], args.repeat)
+        batch = _timed(lambda: matcher.count_many(texts), args.repeat)
+        per_text = 1000 / len(texts)
+        print(f"{keyword_count:>9} {naive * per_text:>14.3f} {single * per_text:>14.3f} {batch * per_text:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
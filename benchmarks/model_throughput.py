@@ -0,0 +1,68 @@
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.hashed_model import HashedLinearModel, train
+from app.model import KeywordModel
+
+_VOCABULARY = (
+    "meeting lunch report invoice project update schedule team review coffee tomorrow thanks "
+    "please call today office travel ticket order delivery account weekend family photo "
+    "free win offer click urgent prize limited time"
+).split()
+
+
+def _texts(rng: random.Random, count: int, length: int) -> list[str]:
+    texts = []
+    for _ in range(count):
+        words: list[str] = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(_VOCABULARY))
+        texts.append(" ".join(words)[:length])
+    return texts
+
+
+def _throughput(predict_batch, texts: list[str], batch_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for offset in range(0, len(texts), batch_size):
+            predict_batch(texts[offset : offset + batch_size])
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Texts/sec by batch size: keyword vs hashed linear model")
+    parser.add_argument("--weights", type=Path, default=None, help="hashed model file; default trains a throwaway")
+    parser.add_argument("--bits", type=int, default=20, help="weights for the throwaway model")
+    parser.add_argument("--batch-sizes", default="1,8,32,128,512")
+    parser.add_argument("--texts", type=int, default=2048)
+    parser.add_argument("--text-length", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = _texts(rng, args.texts, args.text_length)
+    keyword = KeywordModel()
+    with tempfile.TemporaryDirectory() as directory:
+        weights = args.weights
+        if weights is None:
+            # Labelled by the keyword model; only the speed is of interest here.
+            training = _texts(rng, 2000, args.text_length)
+            targets = [int(prediction.label == "spam") for prediction in keyword.predict_batch(training)]
+            weights = Path(directory) / "bench-model.bin"
+            train(training, targets, bits=args.bits, epochs=1).save(weights)
+        hashed = HashedLinearModel.load(weights)
+
+        print(f"{'batch':>6} {'keyword texts/s':>16} {'hashed texts/s':>15}")
+        for batch_size in (int(value) for value in args.batch_sizes.split(",")):
+            keyword_rate = _throughput(keyword.predict_batch, texts, batch_size, args.repeat)
+            hashed_rate = _throughput(hashed.predict_batch, texts, batch_size, args.repeat)
+            print(f"{batch_size:>6} {keyword_rate:>16,.0f} {hashed_rate:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timezone
+
+# Publish into kombu's in-memory transport and measure what a Redis broker would store:
+# the transport envelope, JSON-encoded, with the (possibly compressed) body in base64.
+os.environ["CELERY_BROKER_URL"] = "memory://"
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "false"
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_payload.db")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
+from kombu.serialization import dumps  # noqa: E402
+from kombu.transport.memory import Channel  # noqa: E402
+
+from app.tasks import run_inference, task_payload  # noqa: E402
+
+_VOCABULARY = "please review the attached invoice before our meeting tomorrow free offer click".split()
+
+CONFIGS = (
+    ("inline", "json", None),
+    ("inline", "json", "zlib"),
+    ("inline", "msgpack", None),
+    ("inline", "msgpack", "zlib"),
+    ("reference", "json", None),
+    ("reference", "msgpack", None),
+)
+
+
+def _text(rng: random.Random, length: int) -> str:
+    words: list[str] = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(_VOCABULARY))
+    return " ".join(words)[:length]
+
+
+def message_bytes(text: str, mode: str, serializer: str, compression: str | None) -> int:
+    # Compression applies from the first character here, so the table shows its effect.
+    args, options = task_payload(text, "v1", mode=mode, compression=compression, compression_min_chars=0)
+    run_inference.apply_async(
+        args=args,
+        kwargs={"submitted_at": 1.7e9},
+        task_id="0f8fad5b-d9cb-469f-a165-70867728950e",
+        queue="default",
+        serializer=serializer,
+        **options,
+    )
+    message = Channel.queues["default"].get_nowait()
+    return len(json.dumps(message).encode())
+
+
+def result_bytes(serializer: str) -> int:
+    meta = {
+        "status": "SUCCESS",
+        "result": {"label": "spam", "score": 0.8523, "model_version": "v1"},
+        "traceback": None,
+        "children": [],
+        "date_done": datetime.now(timezone.utc).isoformat(),
+        "task_id": "0f8fad5b-d9cb-469f-a165-70867728950e",
+    }
+    return len(dumps(meta, serializer=serializer)[2])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Broker bytes per job by payload mode, serializer and compression")
+    parser.add_argument("--text-lengths", default="50,500,5000")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    lengths = [int(value) for value in args.text_lengths.split(",")]
+    texts = {length: _text(rng, length) for length in lengths}
+    print(f"{'mode':<10} {'serializer':<10} {'compression':<12}" + "".join(f"{n:>9}ch" for n in lengths))
+    for mode, serializer, compression in CONFIGS:
+        sizes = [message_bytes(texts[length], mode, serializer, compression) for length in lengths]
+        print(f"{mode:<10} {serializer:<10} {compression or '-':<12}" + "".join(f"{size:>10}" for size in sizes))
+    print(f"result meta: json {result_bytes('json')} bytes, msgpack {result_bytes('msgpack')} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import os
+from collections import OrderedDict
+from collections.abc import Callable
 from pathlib import Path
+from uuid import uuid4
 
 import pytest
 
@@ -10,6 +13,7 @@ os.environ["CELERY_TASK_EAGER_PROPAGATES"] = "false"
 os.environ["CELERY_BROKER_URL"] = "memory://"
 os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
 os.environ["REDIS_URL"] = "redis://localhost:6379/0"
+os.environ["JOB_EVENTS_BACKEND"] = "local"
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -18,3 +22,46 @@ def setup_test_db() -> None:
 
     Base.metadata.drop_all(bind=engine)
     init_db()
+
+
+@pytest.fixture
+def queued_job() -> Callable[..., str]:
+    # Stores a queued job without enqueueing it; returns a factory for the job id.
+    from app.database import SessionLocal
+    from app.job_store import create_job
+
+    def create(model_version: str = "v-test", input_text: str = "text") -> str:
+        job_id = str(uuid4())
+        db = SessionLocal()
+        try:
+            create_job(db, job_id=job_id, input_text=input_text, model_version=model_version, idempotency_key=None)
+        finally:
+            db.close()
+        return job_id
+
+    return create
+
+
+@pytest.fixture
+def stored() -> Callable:
+    # Reads a job row in a fresh session, as the next request would see it.
+    from app.database import SessionLocal
+    from app.job_store import get_job
+
+    def read(job_id: str):
+        db = SessionLocal()
+        try:
+            return get_job(db, job_id)
+        finally:
+            db.close()
+
+    return read
+
+
+@pytest.fixture
+def restore_model_registry(monkeypatch) -> None:
+    # Versions a test registers (and models it loads) are dropped when it ends.
+    from app.registry import model_registry
+
+    monkeypatch.setattr(model_registry, "_loaders", dict(model_registry._loaders))
+    monkeypatch.setattr(model_registry, "_models", OrderedDict(model_registry._models))
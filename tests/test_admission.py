@@ -0,0 +1,97 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.admission import LoadMonitor, TokenBuckets
+from app.main import app
+from app.metrics import metrics
+
+
+client = TestClient(app)
+
+
+def _monitor(queue_depths: dict[str, int] | None, max_queue_depth: int = 10) -> LoadMonitor:
+    async def read_queue_depths() -> dict[str, int] | None:
+        return queue_depths
+
+    return LoadMonitor(
+        max_queue_depth=max_queue_depth,
+        max_in_flight=1_000_000,
+        refresh_seconds=0,
+        max_retry_after_seconds=30,
+        read_queue_depths=read_queue_depths,
+    )
+
+
+def test_token_bucket_limits_each_client_separately() -> None:
+    buckets = TokenBuckets(rate=1, burst=2)
+    assert buckets.take("a") == 0
+    assert buckets.take("a") == 0
+    assert 0 < buckets.take("a") <= 1
+    assert buckets.take("b") == 0
+
+
+def test_token_bucket_forgets_least_recent_clients() -> None:
+    buckets = TokenBuckets(rate=1, burst=1, max_clients=2)
+    for client_id in ("a", "b", "c"):
+        buckets.take(client_id)
+    # "a" was evicted, so it starts again with a full bucket.
+    assert buckets.take("a") == 0
+    assert buckets.take("c") > 0
+
+
+def test_retry_after_follows_the_drain_rate() -> None:
+    monitor = _monitor(queue_depths={})
+    in_flight = iter([{"default": 100}, {"default": 40}])
+
+    async def read_in_flight() -> dict[str, int]:
+        return next(in_flight)
+
+    asyncio.run(monitor.refresh(read_in_flight))
+    assert monitor.retry_after("default") is None
+    monitor.note_admitted("default", 10)
+    monitor._sampled_at -= 2.0
+    asyncio.run(monitor.refresh(read_in_flight))
+    # 100 + 10 admitted - 40 left = 70 jobs drained in ~2s.
+    assert 30 <= monitor.drain_rates["default"] <= 35
+
+    monitor.queue_depths = {"default": 95}
+    assert monitor.retry_after("default") == 3
+
+
+def test_unknown_queue_depth_fails_open() -> None:
+    monitor = _monitor(queue_depths=None, max_queue_depth=0)
+
+    async def read_in_flight() -> dict[str, int]:
+        return {}
+
+    asyncio.run(monitor.refresh(read_in_flight))
+    assert monitor.retry_after("default") is None
+
+
+def test_overloaded_queue_sheds_with_retry_after(monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "load_monitor", _monitor(queue_depths={"default": 50, "realtime": 0}))
+    shed_before = metrics.snapshot()["admission_shed_overloaded"]
+
+    response = client.post("/v1/inference", json={"text": "hello there"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    batch = client.post("/v1/inference:batch", json={"items": [{"text": "a"}, {"text": "b"}]})
+    assert batch.status_code == 429
+    assert metrics.snapshot()["admission_shed_overloaded"] == shed_before + 2
+
+    # Only the backed-up lane sheds.
+    realtime = client.post("/v1/inference", json={"text": "hello there", "priority": "realtime"})
+    assert realtime.status_code == 200
+
+
+def test_client_rate_limit_uses_api_key_header(monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "client_buckets", TokenBuckets(rate=0.01, burst=2))
+
+    batch = client.post("/v1/inference:batch", headers={"X-API-Key": "k1"}, json={"items": [{"text": "a"}] * 2})
+    assert batch.status_code == 200
+    limited = client.post("/v1/inference", headers={"X-API-Key": "k1"}, json={"text": "hi"})
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert client.post("/v1/inference", headers={"X-API-Key": "k2"}, json={"text": "hi"}).status_code == 200
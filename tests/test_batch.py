@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_batch_returns_job_ids_in_order() -> None:
+    response = client.post(
+        "/v1/inference:batch",
+        json={
+            "items": [
+                {"text": "Limited time offer, click now to win"},
+                {"text": "Let's meet tomorrow for coffee"},
+            ],
+            "model_version": "v-batch",
+        },
+    )
+    assert response.status_code == 200
+    jobs = response.json()["jobs"]
+    assert len(jobs) == 2
+    assert len({job["job_id"] for job in jobs}) == 2
+
+    labels = []
+    for job in jobs:
+        body = client.get(f"/v1/jobs/{job['job_id']}").json()
+        assert body["status"] == "succeeded"
+        assert body["result"]["model_version"] == "v-batch"
+        labels.append(body["result"]["label"])
+    assert labels == ["spam", "ham"]
+
+
+def test_batch_reuses_idempotency_keys() -> None:
+    single = client.post("/v1/inference", headers={"Idempotency-Key": "batch-key-1"}, json={"text": "hello"})
+    assert single.status_code == 200
+
+    response = client.post(
+        "/v1/inference:batch",
+        json={
+            "items": [
+                {"text": "hello", "idempotency_key": "batch-key-1"},
+                {"text": "new message", "idempotency_key": "batch-key-2"},
+                {"text": "new message", "idempotency_key": "batch-key-2"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    jobs = response.json()["jobs"]
+    assert jobs[0]["job_id"] == single.json()["job_id"]
+    assert jobs[1]["job_id"] == jobs[2]["job_id"]
+    assert jobs[1]["job_id"] != jobs[0]["job_id"]
+
+
+def test_batch_rejects_empty_and_oversized() -> None:
+    assert client.post("/v1/inference:batch", json={"items": []}).status_code == 422
+
+    items = [{"text": "x"}] * (settings.batch_max_items + 1)
+    assert client.post("/v1/inference:batch", json={"items": items}).status_code == 422
@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import Future
+from uuid import uuid4
+
+import pytest
+
+import app.tasks as tasks_module
+from app.batching import BatchResult, InferenceBatcher
+from app.database import SessionLocal
+from app.job_store import create_job, get_job, update_job_expired
+from app.metrics import metrics
+from app.model import Prediction, predict_batch
+from app.tasks import run_inference
+
+
+def _create_jobs(texts: list[str]) -> list[str]:
+    db = SessionLocal()
+    try:
+        job_ids = []
+        for text in texts:
+            job_id = str(uuid4())
+            create_job(db, job_id=job_id, input_text=text, model_version="v-test", idempotency_key=None)
+            job_ids.append(job_id)
+        return job_ids
+    finally:
+        db.close()
+
+
+def test_batcher_runs_one_predict_call_per_batch() -> None:
+    texts = ["Limited time offer, click now to win", "Let's meet tomorrow for coffee", "hello"]
+    job_ids = _create_jobs(texts)
+    calls: list[list[str]] = []
+
+    def recording_predict(batch: list[str]) -> list[Prediction]:
+        calls.append(batch)
+        return predict_batch(batch)
+
+    batcher = InferenceBatcher(recording_predict, SessionLocal, max_batch_size=3, max_wait_ms=1000)
+    futures = [batcher.submit(job_id, text, 0) for job_id, text in zip(job_ids, texts)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert calls == [texts]
+    assert [result.prediction.label for result in results] == ["spam", "ham", "ham"]
+    assert all(result.stored and result.db_seconds > 0 for result in results)
+
+    db = SessionLocal()
+    try:
+        for job_id, result in zip(job_ids, results):
+            record = get_job(db, job_id)
+            assert record.status == "succeeded"
+            assert record.result_label == result.prediction.label
+    finally:
+        db.close()
+
+
+def test_batcher_isolates_failures_per_job() -> None:
+    texts = ["good text", "bad text"]
+    job_ids = _create_jobs(texts)
+
+    def flaky_predict(batch: list[str]) -> list[Prediction]:
+        if "bad text" in batch:
+            raise RuntimeError("simulated model failure")
+        return predict_batch(batch)
+
+    batcher = InferenceBatcher(flaky_predict, SessionLocal, max_batch_size=2, max_wait_ms=1000)
+    good, bad = [batcher.submit(job_id, text, 0) for job_id, text in zip(job_ids, texts)]
+
+    assert good.result(timeout=5).prediction.label == "ham"
+    with pytest.raises(RuntimeError, match="simulated model failure"):
+        bad.result(timeout=5)
+
+    db = SessionLocal()
+    try:
+        assert get_job(db, job_ids[0]).status == "succeeded"
+        assert get_job(db, job_ids[1]).status == "started"
+    finally:
+        db.close()
+
+
+def test_rows_finished_elsewhere_are_reported_as_not_stored() -> None:
+    job_ids = _create_jobs(["hello", "see you at lunch"])
+    db = SessionLocal()
+    try:
+        # A worker that picked the job up and then gave up on it after the deadline.
+        update_job_expired(db, job_ids[1], "deadline passed before the job started", 0)
+    finally:
+        db.close()
+
+    batcher = InferenceBatcher(predict_batch, SessionLocal, max_batch_size=2, max_wait_ms=1000)
+    futures = [batcher.submit(job_id, "hello", 0) for job_id in job_ids]
+    fresh, expired = [future.result(timeout=5) for future in futures]
+
+    assert fresh.stored and not expired.stored
+    db = SessionLocal()
+    try:
+        assert get_job(db, job_ids[1]).status == "expired"
+    finally:
+        db.close()
+
+
+def test_batched_task_only_announces_stored_results(monkeypatch, queued_job) -> None:
+    published: list[dict] = []
+    outcomes = iter([False, True])
+
+    class _Batcher:
+        def submit(self, job_id, text, retry_count, enqueued_at=None) -> Future:
+            future = Future()
+            future.set_result(BatchResult(Prediction(label="ham", score=0.9), next(outcomes), 0.004))
+            return future
+
+    monkeypatch.setattr(tasks_module, "_batcher_for", lambda model_version: _Batcher())
+    monkeypatch.setattr(tasks_module, "_publish", published.append)
+    before = metrics.snapshot()["jobs_succeeded"]
+
+    discarded, stored = queued_job("v-batched"), queued_job("v-batched")
+    run_inference.apply(args=("hello", "v-batched"), kwargs={"submitted_at": time.time()}, task_id=discarded)
+    run_inference.apply(args=("hello", "v-batched"), kwargs={"submitted_at": time.time()}, task_id=stored)
+
+    assert [event["job_id"] for event in published] == [stored]
+    assert metrics.snapshot()["jobs_succeeded"] == before + 1
+    # Both attempts record the batch's write time.
+    histograms = metrics.collect()["histograms"]
+    for outcome in ("succeeded", "discarded"):
+        counts, total = histograms[f"db_write_seconds|v-batched|{outcome}"]
+        assert sum(counts) == 1 and total == pytest.approx(0.004)
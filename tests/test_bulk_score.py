@@ -0,0 +1,45 @@
+import io
+import json
+
+from app.bulk_score import score_stream
+from app.database import SessionLocal
+from app.job_store import get_job
+
+
+def _ndjson(records: list) -> io.BytesIO:
+    lines = [record if isinstance(record, str) else json.dumps(record) for record in records]
+    return io.BytesIO("\n".join(lines).encode() + b"\n")
+
+
+def test_results_come_back_in_input_order() -> None:
+    texts = [f"free prize {i}" if i % 3 == 0 else f"see you at lunch {i}" for i in range(25)]
+    records = [{"request_id": f"r{i}", "body": text} for i, text in enumerate(texts)]
+    source = _ndjson([*records[:10], "not json", "", {"title": "no body"}, *records[10:]])
+    sink = io.BytesIO()
+
+    report = score_stream(source, sink, workers=2, chunk_size=4, text_field="body", id_field="request_id")
+
+    results = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert report["texts"] == 25 and report["errors"] == 2
+    scored = [result for result in results if "error" not in result]
+    assert [result["id"] for result in scored] == [f"r{i}" for i in range(25)]
+    assert [result["label"] for result in scored] == ["spam" if i % 3 == 0 else "ham" for i in range(25)]
+    # Failed lines report their line number in the input (the blank line is skipped).
+    assert [result["id"] for result in results if "error" in result] == [11, 13]
+
+
+def test_persisted_results_are_stored_as_finished_bulk_jobs() -> None:
+    sink = io.BytesIO()
+    score_stream(_ndjson([{"text": "win a free prize"}, {"text": "lunch?"}]), sink, workers=1, persist=True)
+
+    results = [json.loads(line) for line in sink.getvalue().splitlines()]
+    db = SessionLocal()
+    try:
+        stored = [get_job(db, result["job_id"]) for result in results]
+    finally:
+        db.close()
+    assert [(job.status, job.priority, job.result_label) for job in stored] == [
+        ("succeeded", "bulk", "spam"),
+        ("succeeded", "bulk", "ham"),
+    ]
+    assert stored[1].input_text == "lunch?"
@@ -0,0 +1,64 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app import tasks
+from app.cache import ResultCache, TTLCache
+from app.main import app
+from app.metrics import metrics
+
+
+client = TestClient(app)
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    evictions = []
+    cache = TTLCache(max_entries=2, ttl_seconds=60, on_evict=lambda: evictions.append(1))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(evictions) == 1
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_result_cache_key_ignores_case_but_not_version() -> None:
+    assert ResultCache.key("Free Prize ", "v1") == ResultCache.key("free prize", "v1")
+    assert ResultCache.key("free prize", "v1") != ResultCache.key("free prize", "v2")
+
+
+def test_repeated_text_is_served_from_cache(monkeypatch) -> None:
+    cache = ResultCache(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(main_module, "result_cache", cache)
+    monkeypatch.setattr(tasks, "result_cache", cache)
+
+    payload = {"text": "Win a free prize today", "model_version": "v-cache"}
+    first = client.post("/v1/inference", json=payload)
+    assert first.json()["status"] == "queued"
+
+    hits_before = metrics.snapshot()["cache_hits"]
+    second = client.post("/v1/inference", json=payload)
+    assert second.status_code == 200
+    assert second.json()["status"] == "succeeded"
+    assert second.json()["job_id"] != first.json()["job_id"]
+    assert metrics.snapshot()["cache_hits"] == hits_before + 1
+
+    first_body = client.get(f"/v1/jobs/{first.json()['job_id']}").json()
+    second_body = client.get(f"/v1/jobs/{second.json()['job_id']}").json()
+    assert second_body["status"] == "succeeded"
+    assert second_body["result"] == first_body["result"]
+
+    batch = client.post("/v1/inference:batch", json={"items": [{"text": payload["text"]}], "model_version": "v-cache"})
+    assert batch.json()["jobs"][0]["status"] == "succeeded"
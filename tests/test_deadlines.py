@@ -0,0 +1,111 @@
+import dataclasses
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from celery.app.task import Context
+from celery.signals import task_revoked
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.celery_app import parse_slack_buckets
+from app.main import app
+from app.metrics import metrics
+from app.model import Prediction
+from app.registry import model_registry
+from app.tasks import deadline_options, run_inference
+
+client = TestClient(app)
+
+
+def _never_called(_: str) -> Prediction:
+    raise AssertionError("the model ran for an expired job")
+
+
+def test_deadline_is_stored_and_the_earlier_bound_wins() -> None:
+    deadline = datetime.now(timezone.utc) + timedelta(hours=1)
+    job_id = client.post(
+        "/v1/inference", json={"text": "win a free prize", "deadline": deadline.isoformat(), "max_age_seconds": 60}
+    ).json()["job_id"]
+
+    status = client.get(f"/v1/jobs/{job_id}").json()
+    assert status["status"] == "succeeded"
+    stored = datetime.fromisoformat(status["deadline"]).replace(tzinfo=timezone.utc)
+    assert stored < deadline - timedelta(minutes=50)
+
+
+def test_default_max_age_applies_only_without_a_client_bound(monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "settings", dataclasses.replace(main_module.settings, job_max_age_seconds=60))
+    now = datetime.now(timezone.utc)
+    later = now + timedelta(hours=1)
+
+    assert main_module._deadline(later, None) == later
+    assert main_module._deadline(None, 600) > now + timedelta(minutes=9)
+    assert main_module._deadline(None, None) < now + timedelta(minutes=2)
+
+
+def test_past_deadline_is_rejected() -> None:
+    past = (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat()
+    assert client.post("/v1/inference", json={"text": "late", "deadline": past}).status_code == 422
+    batch = {"items": [{"text": "late"}], "deadline": past}
+    assert client.post("/v1/inference:batch", json=batch).status_code == 422
+
+
+@pytest.mark.usefixtures("restore_model_registry")
+def test_expired_job_is_skipped_without_running_the_model(queued_job, stored) -> None:
+    model_registry.register("v-expired", lambda: SimpleNamespace(predict=_never_called))
+    job_id = queued_job("v-expired")
+    before = metrics.snapshot()["jobs_expired"]
+
+    run_inference.apply(args=(None, "v-expired"), kwargs={"deadline": time.time() - 1}, task_id=job_id)
+
+    job = stored(job_id)
+    assert job.status == "expired" and "deadline" in job.error
+    assert metrics.snapshot()["jobs_expired"] == before + 1
+
+
+@pytest.mark.usefixtures("restore_model_registry")
+def test_retry_that_would_start_after_the_deadline_is_not_scheduled() -> None:
+    attempts = {"count": 0}
+
+    def flaky_predict(_: str) -> Prediction:
+        attempts["count"] += 1
+        raise RuntimeError("simulated transient failure")
+
+    model_registry.register("v-flaky-deadline", lambda: SimpleNamespace(predict=flaky_predict))
+    # The first backoff is RETRY_BACKOFF_SECONDS (2s), past a one-second deadline.
+    job_id = client.post(
+        "/v1/inference", json={"text": "retry me", "model_version": "v-flaky-deadline", "max_age_seconds": 1}
+    ).json()["job_id"]
+
+    assert attempts["count"] == 1
+    status = client.get(f"/v1/jobs/{job_id}").json()
+    assert status["status"] == "expired"
+    assert "simulated transient failure" in status["error"]
+
+
+def test_message_dropped_by_the_worker_marks_the_job_expired(queued_job, stored) -> None:
+    job_id = queued_job()
+    task_revoked.send(sender=run_inference, request=Context(id=job_id, retries=0), expired=True)
+    assert stored(job_id).status == "expired"
+
+    other = queued_job()
+    task_revoked.send(sender=run_inference, request=Context(id=other, retries=0), expired=False)
+    assert stored(other).status == "queued"
+
+
+def test_tighter_deadlines_get_higher_priority_steps() -> None:
+    now = datetime.now(timezone.utc)
+    buckets = parse_slack_buckets("30, 5,300")
+    assert buckets == (5.0, 30.0, 300.0)
+
+    def step(deadline):
+        return deadline_options(deadline, slack_buckets=buckets)["priority"]
+
+    assert [step(now + timedelta(seconds=s)) for s in (2, 20, 200, 2000)] == [0, 1, 2, 3]
+    assert step(None) == 3
+    assert deadline_options(now + timedelta(seconds=2), slack_buckets=()) == {"expires": now + timedelta(seconds=2)}
+    assert deadline_options(None, slack_buckets=()) == {}
+    with pytest.raises(ValueError):
+        parse_slack_buckets("0,5")
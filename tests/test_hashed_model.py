@@ -0,0 +1,89 @@
+import json
+import random
+import sys
+
+import numpy as np
+import pytest
+
+from app import hashed_model
+from app.hashed_model import HashedLinearModel, train
+from app.registry import ModelRegistry, loader_for
+
+_HAM = "meeting lunch report invoice coffee tomorrow thanks team".split()
+_SPAM = "free win offer click urgent prize now cash".split()
+
+
+def _corpus(count: int, seed: int = 3) -> tuple[list[str], list[int]]:
+    # Mostly words of the text's own class, plus some from the other.
+    rng = random.Random(seed)
+    texts, targets = [], []
+    for _ in range(count):
+        target = rng.random() < 0.5
+        own, other = (_SPAM, _HAM) if target else (_HAM, _SPAM)
+        words = rng.choices(own, k=rng.randint(3, 10)) + rng.choices(other, k=rng.randint(0, 2))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+        targets.append(int(target))
+    return texts, targets
+
+
+def test_trained_model_learns_the_labels() -> None:
+    texts, targets = _corpus(2000)
+    model = train(texts, targets, bits=16, epochs=5)
+    predictions = model.predict_batch(texts)
+
+    accuracy = sum((p.label == "spam") == bool(t) for p, t in zip(predictions, targets)) / len(targets)
+    assert accuracy > 0.95
+    assert all(0.5 <= p.score <= 1.0 for p in predictions)
+    assert model.predict(texts[0]) == predictions[0]
+    assert model.predict_batch([]) == []
+    assert model.predict("").label in {"ham", "spam"}
+
+
+def test_saved_weights_are_memory_mapped_read_only(tmp_path) -> None:
+    texts, targets = _corpus(300)
+    model = train(texts, targets, bits=12, epochs=2)
+    path = tmp_path / "model.bin"
+    model.save(path)
+
+    loaded = HashedLinearModel.load(path)
+    assert isinstance(loaded.weights, np.memmap)
+    assert not loaded.weights.flags.writeable
+    assert loaded.memory_bytes == 4 << 12
+    assert loaded.predict_batch(texts) == model.predict_batch(texts)
+
+    (tmp_path / "bad.bin").write_bytes(b"not a model")
+    with pytest.raises(ValueError):
+        HashedLinearModel.load(tmp_path / "bad.bin")
+
+
+def test_n_grams_do_not_span_texts() -> None:
+    rows, columns, _ = hashed_model._featurize(["a b", "c"], bits=20, ngrams=2)
+    # "a", "b", "a b" for the first text; only "c" for the second.
+    assert sorted(rows.tolist()) == [0, 0, 0, 1]
+    assert len(set(columns.tolist())) == 4
+
+
+def test_registry_loads_hashed_models(tmp_path) -> None:
+    texts, targets = _corpus(300)
+    path = tmp_path / "model.bin"
+    train(texts, targets, bits=12, epochs=2).save(path)
+
+    registry = ModelRegistry({"v1": loader_for(f"hashed:{path}")}, default_version="v1")
+    assert isinstance(registry.get("v1"), HashedLinearModel)
+    assert registry.loaded() == {"v1": 4 << 12}
+
+
+def test_train_command_exports_a_model(tmp_path, monkeypatch, capsys) -> None:
+    texts, targets = _corpus(300)
+    examples = tmp_path / "train.jsonl"
+    lines = [json.dumps({"text": text, "label": "spam" if target else "ham"}) for text, target in zip(texts, targets)]
+    examples.write_text("\n".join(lines))
+    output = tmp_path / "model.bin"
+    monkeypatch.setattr(sys, "argv", ["hashed_model", str(examples), str(output), "--bits", "12", "--epochs", "3"])
+    hashed_model.main()
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["examples"] == 300
+    assert report["train_accuracy"] > 0.9
+    assert HashedLinearModel.load(output).bits == 12
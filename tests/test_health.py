@@ -16,18 +16,18 @@ def test_health() -> None:
 
 
 def test_ready_checks_dependencies(monkeypatch) -> None:
+    pings = []
+
     class FakeRedisClient:
-        def ping(self) -> bool:
+        async def ping(self) -> bool:
+            pings.append(True)
             return True
 
-    class FakeRedis:
-        @staticmethod
-        def from_url(_: str) -> FakeRedisClient:
-            return FakeRedisClient()
-
-    monkeypatch.setattr(main_module, "Redis", FakeRedis)
+    client_instance = FakeRedisClient()
+    monkeypatch.setattr(main_module, "get_async_redis", lambda: client_instance)
 
     response = client.get("/ready")
     assert response.status_code == 200
     body = response.json()
     assert body["status"] == "ready"
+    assert pings == [True]
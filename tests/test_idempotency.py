@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import app.main as main_module
+from app.cache import IdempotencyKeyCache, StatusCache
+from app.database import SessionLocal, async_engine
+from app.job_store import create_job, create_jobs
+from app.main import app
+from app.metrics import metrics
+
+
+client = TestClient(app)
+
+
+@contextmanager
+def _statements():
+    seen: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        seen.append(statement.split()[0].upper())
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_new_job_is_a_single_insert() -> None:
+    with _statements() as seen:
+        response = client.post("/v1/inference", headers={"Idempotency-Key": "atomic-new"}, json={"text": "hi"})
+    assert response.status_code == 200
+    # The insert is the first statement of the request: no SELECT pre-check.
+    assert seen[0] == "INSERT"
+
+
+def test_duplicate_key_returns_existing_job_without_enqueue(monkeypatch) -> None:
+    first = client.post("/v1/inference", headers={"Idempotency-Key": "atomic-dup"}, json={"text": "hi"})
+
+    def fail_enqueue(*args, **kwargs):
+        raise AssertionError("duplicate submission must not be enqueued")
+
+    monkeypatch.setattr(main_module.run_inference, "apply_async", fail_enqueue)
+    with _statements() as seen:
+        second = client.post("/v1/inference", headers={"Idempotency-Key": "atomic-dup"}, json={"text": "hi"})
+
+    assert second.status_code == 200
+    assert second.json()["job_id"] == first.json()["job_id"]
+    assert second.json()["status"] == "succeeded"
+    assert second.json()["result"] is not None
+    assert seen[:2] == ["INSERT", "SELECT"]
+
+
+def test_create_job_conflict_returns_winner() -> None:
+    db = SessionLocal()
+    try:
+        winner = create_job(db, job_id="race-a", input_text="x", model_version="v1", idempotency_key="race-key")
+        loser = create_job(db, job_id="race-b", input_text="x", model_version="v1", idempotency_key="race-key")
+        stored = create_jobs(
+            db,
+            [
+                {"job_id": "race-c", "input_text": "x", "model_version": "v1", "idempotency_key": "race-key"},
+                {"job_id": "race-d", "input_text": "y", "model_version": "v1", "idempotency_key": None},
+            ],
+        )
+    finally:
+        db.close()
+
+    assert winner.job_id == "race-a"
+    assert loser.job_id == "race-a"
+    assert stored == [("race-a", "queued"), ("race-d", "queued")]
+
+
+def test_key_cache_short_circuits_duplicates(monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "idempotency_cache", IdempotencyKeyCache(100, 60))
+    monkeypatch.setattr(main_module, "status_cache", StatusCache(100, 60))
+    first = client.post("/v1/inference", headers={"Idempotency-Key": "cached-key"}, json={"text": "hi"})
+
+    # Not in the status cache yet: one primary-key read of the live state.
+    with _statements() as seen:
+        second = client.post("/v1/inference", headers={"Idempotency-Key": "cached-key"}, json={"text": "hi"})
+    assert seen == ["SELECT"]
+    assert second.json()["job_id"] == first.json()["job_id"]
+    assert second.json()["status"] == "succeeded" and second.json()["result"]["label"] == "ham"
+
+    # Once a status read has cached the finished job, duplicates never reach the database.
+    client.get(f"/v1/jobs/{first.json()['job_id']}")
+    with _statements() as seen:
+        third = client.post("/v1/inference", headers={"Idempotency-Key": "cached-key"}, json={"text": "hi"})
+    assert seen == []
+    assert third.json() == second.json()
+
+    monkeypatch.setattr(main_module, "idempotency_cache", None)
+    uncached = client.post("/v1/inference", headers={"Idempotency-Key": "cached-key"}, json={"text": "hi"})
+    assert uncached.json() == second.json()
+    assert metrics.snapshot()["idempotency_cache_hits"] >= 2
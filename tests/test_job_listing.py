@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.job_store import create_jobs
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _seed(model_version: str, count: int) -> list[str]:
+    jobs = [
+        {"job_id": f"{model_version}-{index:02d}", "input_text": f"text {index}", "model_version": model_version}
+        for index in range(count)
+    ]
+    db = SessionLocal()
+    try:
+        create_jobs(db, jobs)
+    finally:
+        db.close()
+    return [job["job_id"] for job in jobs]
+
+
+def test_keyset_pages_cover_every_job_once_newest_first() -> None:
+    job_ids = _seed("v-list", 7)
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"model_version": "v-list", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/v1/jobs", params=params).json()
+        seen.extend(job["job_id"] for job in body["jobs"])
+        assert all(job["input_text"] is None for job in body["jobs"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    # Rows from one multi-row insert may share a timestamp; job_id breaks the tie.
+    assert sorted(seen) == job_ids
+    assert len(seen) == len(set(seen))
+
+
+def test_listing_filters_and_optional_input_text() -> None:
+    _seed("v-filter", 2)
+    now = datetime.now(timezone.utc)
+
+    body = client.get(
+        "/v1/jobs",
+        params={
+            "model_version": "v-filter",
+            "status": "queued",
+            "created_after": (now - timedelta(minutes=1)).isoformat(),
+            "include_input": "true",
+        },
+    ).json()
+    assert {job["job_id"] for job in body["jobs"]} == {"v-filter-00", "v-filter-01"}
+    assert all(job["input_text"].startswith("text ") for job in body["jobs"])
+
+    later = client.get(
+        "/v1/jobs", params={"model_version": "v-filter", "created_after": (now + timedelta(minutes=1)).isoformat()}
+    )
+    assert later.json() == {"jobs": [], "next_cursor": None}
+    assert client.get("/v1/jobs", params={"model_version": "v-filter", "status": "failed"}).json()["jobs"] == []
+
+
+def test_invalid_cursor_and_limit_are_rejected() -> None:
+    assert client.get("/v1/jobs", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/v1/jobs", params={"limit": 0}).status_code == 422
+
+
+def test_filtered_page_is_an_index_range_scan() -> None:
+    db = SessionLocal()
+    try:
+        plan = db.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT job_id FROM jobs WHERE model_version = 'v-list' "
+                "AND (created_at, job_id) < ('9999-01-01', 'z') ORDER BY created_at DESC, job_id DESC LIMIT 2"
+            )
+        ).all()
+    finally:
+        db.close()
+    details = [row[-1] for row in plan]
+    assert any("ix_jobs_model_version_created_at_job_id" in detail for detail in details)
+    # No sort step: rows come back in index order.
+    assert not any("TEMP B-TREE" in detail for detail in details)
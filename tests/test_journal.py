@@ -0,0 +1,127 @@
+import asyncio
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+import app.tasks as tasks_module
+from app.database import SessionLocal
+from app.job_store import insert_missing_jobs
+from app.journal import SubmissionJournal
+from app.main import app
+
+client = TestClient(app)
+
+
+def _journal(server: fakeredis.FakeServer, session_factory=SessionLocal, **kwargs) -> SubmissionJournal:
+    return SubmissionJournal(
+        fakeredis.FakeRedis(server=server),
+        session_factory,
+        async_client=lambda: fakeredis.FakeAsyncRedis(server=server),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def journal(monkeypatch) -> SubmissionJournal:
+    journal = _journal(fakeredis.FakeServer())
+    monkeypatch.setattr(main_module, "submission_journal", journal)
+    monkeypatch.setattr(tasks_module, "submission_journal", journal)
+    return journal
+
+
+async def _noop() -> None:
+    return None
+
+
+def test_unflushed_jobs_are_readable_and_flushed_in_one_batch(journal, monkeypatch, stored) -> None:
+    # Accept without running the task, so nothing but the journal knows the jobs.
+    monkeypatch.setattr(main_module, "_run_enqueue", lambda *args, **kwargs: _noop())
+    single = client.post("/v1/inference", json={"text": "hello there", "priority": "bulk"}).json()
+    batch = client.post("/v1/inference:batch", json={"items": [{"text": "one"}, {"text": "two"}]}).json()
+    job_ids = [single["job_id"], *(job["job_id"] for job in batch["jobs"])]
+    assert stored(job_ids[0]) is None
+
+    status = client.get(f"/v1/jobs/{job_ids[0]}").json()
+    assert status["status"] == "queued" and status["priority"] == "bulk"
+
+    assert journal.flush("test") == 3
+    assert journal.flush("test") == 0
+    assert [stored(job_id).status for job_id in job_ids] == ["queued"] * 3
+    assert journal.get(job_ids[0]) is None
+    assert client.get(f"/v1/jobs/{job_ids[0]}").json()["status"] == "queued"
+
+
+def test_worker_stores_the_row_before_the_flusher(journal, stored) -> None:
+    # Eager mode runs the task before any flush; the later flush must not reset it.
+    job_id = client.post("/v1/inference", json={"text": "win a free prize now"}).json()["job_id"]
+    assert stored(job_id).status == "succeeded"
+
+    assert journal.flush("test") == 1
+    assert stored(job_id).status == "succeeded"
+    assert client.get(f"/v1/jobs/{job_id}").json()["result"]["label"] == "spam"
+
+
+def test_failed_enqueue_stores_journaled_jobs_as_failed(journal, monkeypatch, stored) -> None:
+    failed: list[str] = []
+
+    async def broker_down(_, jobs, *args, **kwargs):
+        failed.extend(job["job_id"] for job in jobs)
+        raise ConnectionError("broker unavailable")
+
+    def blocking_read(*args, **kwargs):
+        raise AssertionError("the journal was read with the blocking client on the event loop")
+
+    monkeypatch.setattr(main_module, "_run_enqueue", broker_down)
+    monkeypatch.setattr(journal._client, "hget", blocking_read)
+    with pytest.raises(ConnectionError):
+        client.post("/v1/inference:batch", json={"items": [{"text": "one"}, {"text": "two"}]})
+
+    # The rows are stored straight away; the later flush of their entries changes nothing.
+    assert len(failed) == 2
+    assert all(stored(job_id).status == "failed" for job_id in failed)
+    assert "broker unavailable" in stored(failed[0]).error
+    assert journal.flush("test") == 2
+    assert all(stored(job_id).status == "failed" for job_id in failed)
+
+
+def test_keyed_submissions_bypass_the_journal(journal) -> None:
+    key = f"journal-{uuid4()}"
+    first = client.post("/v1/inference", json={"text": "hi"}, headers={"Idempotency-Key": key}).json()
+    again = client.post("/v1/inference", json={"text": "hi"}, headers={"Idempotency-Key": key}).json()
+    assert first["job_id"] == again["job_id"]
+    assert journal.flush("test") == 0
+
+
+def test_entries_of_a_crashed_flusher_are_replayed(stored) -> None:
+    server = fakeredis.FakeServer()
+
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    crashed = _journal(server, broken_session)
+    job_id = str(uuid4())
+    asyncio.run(crashed.append([{"job_id": job_id, "input_text": "t", "model_version": "v1", "priority": "default"}]))
+    with pytest.raises(RuntimeError):
+        crashed.flush("crashed")
+
+    # Still pending under the dead consumer until it has been idle long enough.
+    survivor = _journal(server, claim_idle_ms=60_000)
+    assert survivor.flush("survivor") == 0
+    assert survivor.drain("survivor", claim_idle_ms=0) == 1
+    assert stored(job_id).status == "queued"
+    assert survivor.get(job_id) is None
+
+
+def test_insert_missing_jobs_skips_existing_rows(stored) -> None:
+    job_id = str(uuid4())
+    job = {"job_id": job_id, "input_text": "t", "model_version": "v1", "status": "succeeded"}
+    db = SessionLocal()
+    try:
+        assert insert_missing_jobs(db, [job]) == 1
+        assert insert_missing_jobs(db, [{**job, "status": "queued"}]) == 0
+    finally:
+        db.close()
+    assert stored(job_id).status == "succeeded"
@@ -1,7 +1,15 @@
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
 from fastapi.testclient import TestClient
 
+import app.main as main_module
+from app.inline import InlineInference
 from app.main import app
-from app.model import Prediction
+from app.model import Prediction, predict_text
+from app.registry import model_registry
 
 
 client = TestClient(app)
@@ -23,6 +31,16 @@ def test_inference_job_lifecycle_success() -> None:
     assert body["result"]["model_version"] == "v-test"
 
 
+def test_job_status_reports_stage_timestamps() -> None:
+    job_id = client.post("/v1/inference", json={"text": "see you at lunch"}).json()["job_id"]
+
+    body = client.get(f"/v1/jobs/{job_id}").json()
+    stages = ["enqueued_at", "started_at", "inference_started_at", "inference_finished_at", "persisted_at"]
+    assert all(body[stage] is not None for stage in stages)
+    times = [datetime.fromisoformat(body[stage]).replace(tzinfo=None) for stage in stages]
+    assert times == sorted(times)
+
+
 def test_idempotency_key_returns_existing_job() -> None:
     headers = {"Idempotency-Key": "abc-123"}
     payload = {"text": "hello world"}
@@ -35,22 +53,16 @@ def test_idempotency_key_returns_existing_job() -> None:
     assert first.json()["job_id"] == second.json()["job_id"]
 
 
+@pytest.mark.usefixtures("restore_model_registry")
 def test_failure_reason_is_stored() -> None:
-    from app import tasks
-
-    original_predict = tasks.predict_text
-
     def fail_predict(_: str) -> Prediction:
         raise ValueError("simulated fatal failure")
 
-    tasks.predict_text = fail_predict
-    try:
-        response = client.post(
-            "/v1/inference",
-            json={"text": "this request should fail in test"},
-        )
-    finally:
-        tasks.predict_text = original_predict
+    model_registry.register("v-fatal", lambda: SimpleNamespace(predict=fail_predict))
+    response = client.post(
+        "/v1/inference",
+        json={"text": "this request should fail in test", "model_version": "v-fatal"},
+    )
     assert response.status_code == 200
     job_id = response.json()["job_id"]
 
@@ -59,3 +71,37 @@ def test_failure_reason_is_stored() -> None:
     body = status_response.json()
     assert body["status"] == "failed"
     assert "simulated fatal failure" in body["error"]
+
+
+def test_sync_mode_returns_result_inline() -> None:
+    response = client.post(
+        "/v1/inference",
+        json={"text": "Urgent: claim your free prize", "mode": "sync", "sync_timeout_ms": 1000},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "succeeded"
+    assert body["result"]["label"] == "spam"
+
+    status = client.get(f"/v1/jobs/{body['job_id']}").json()
+    assert status["status"] == "succeeded"
+    assert status["result"] == body["result"]
+
+
+def test_sync_mode_falls_back_to_queue_past_deadline(monkeypatch) -> None:
+    def slow_predict(text: str, model_version: str) -> Prediction:
+        time.sleep(0.2)
+        return predict_text(text)
+
+    monkeypatch.setattr(main_module, "inline_inference", InlineInference(1, predict=slow_predict))
+    response = client.post(
+        "/v1/inference",
+        json={"text": "slow sync request", "mode": "sync", "sync_timeout_ms": 10},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "queued"
+    assert body["result"] is None
+
+    status = client.get(f"/v1/jobs/{body['job_id']}").json()
+    assert status["status"] == "succeeded"
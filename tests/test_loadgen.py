@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import random
+
+from app.job_store import TERMINAL_STATUSES
+from benchmarks.loadgen import _TERMINAL, Histogram, length_sampler, make_text, run_load
+
+
+def _args(**overrides) -> argparse.Namespace:
+    defaults = dict(
+        mode="closed", requests=6, duration=0, concurrency=2, rate=200, arrivals="uniform", max_inflight=100,
+        text_length="uniform:20:80", model_version="v-loadgen", priority="default", wait=1, timeout=30,
+        base_url=None, seed=1,
+    )
+    return argparse.Namespace(**{**defaults, **overrides})
+
+
+def test_histogram_percentiles_stay_within_bucket_precision() -> None:
+    histogram = Histogram()
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert abs(summary["p50"] - 500) / 500 < 0.02
+    assert abs(summary["p99"] - 990) / 990 < 0.02
+    assert summary["max"] == 1000
+
+
+def test_text_lengths_follow_the_requested_distribution() -> None:
+    rng = random.Random(0)
+    sample = length_sampler("uniform:10:30", rng)
+    lengths = [len(make_text(rng, sample())) for _ in range(200)]
+    assert min(lengths) >= 9 and max(lengths) <= 30
+    assert length_sampler("lognormal:100000:1", rng)() == 5000
+
+
+def test_closed_and_open_loop_runs_in_process() -> None:
+    for mode in ("closed", "open"):
+        report = asyncio.run(run_load(_args(mode=mode)))
+        assert report["sent"] == 6
+        assert report["succeeded"] == 6
+        assert report["errors"] == 0
+        assert report["time_to_result_ms"]["count"] == 6
+        assert report["time_to_result_ms"]["p50"] >= report["submit_latency_ms"]["p50"] > 0
+
+
+def test_terminal_statuses_match_the_job_store() -> None:
+    assert _TERMINAL == TERMINAL_STATUSES
@@ -0,0 +1,115 @@
+import json
+import logging
+import multiprocessing
+import sys
+
+import pytest
+
+from app.logging_config import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    configure_logging,
+    parse_sample_rates,
+    stop_logging,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger("app.tasks")
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    # Returns a function that logs to a file instead of stderr; pytest swaps stderr
+    # between fixture setup and the test, so it must be called from the test itself.
+    path = tmp_path / "log.ndjson"
+    with open(path, "w", buffering=1) as handle:
+
+        def configure(**kwargs) -> None:
+            monkeypatch.setattr(sys, "stderr", handle)
+            configure_logging(**kwargs)
+
+        configure.path = path
+        yield configure
+        stop_logging()
+    monkeypatch.undo()
+    configure_logging()
+
+
+def _lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_json_formatter_uses_the_record_time_and_extras() -> None:
+    record = logging.LogRecord("app.tasks", logging.INFO, __file__, 1, "inference_%s", ("succeeded",), None)
+    record.created = 0.0
+    record.job_id = "job-1"
+    record.priority = "bulk"
+
+    line = json.loads(JsonFormatter().format(record))
+    assert line == {
+        "timestamp": "1970-01-01T00:00:00+00:00",
+        "level": "INFO",
+        "logger": "app.tasks",
+        "message": "inference_succeeded",
+        "job_id": "job-1",
+        "priority": "bulk",
+    }
+
+
+def test_queued_records_are_written_by_the_listener(log_file) -> None:
+    log_file(queue_size=100)
+    logger.info("job_queued", extra={"job_id": "job-1", "status": "queued"})
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("inference_failed", extra={"job_id": "job-1", "status": "failed"})
+    stop_logging()
+
+    queued, failed = _lines(log_file.path)
+    assert queued["message"] == "job_queued" and queued["status"] == "queued"
+    assert failed["status"] == "failed" and "RuntimeError: boom" in failed["exception"]
+
+
+def test_full_queue_drops_and_counts() -> None:
+    handler = BoundedQueueHandler(max_size=2)
+    before = metrics.snapshot()["log_records_dropped"]
+    for _ in range(5):
+        handler.handle(logging.LogRecord("app", logging.INFO, __file__, 1, "job_queued", None, None))
+
+    assert handler.queue.qsize() == 2
+    assert metrics.snapshot()["log_records_dropped"] == before + 3
+
+
+def test_sampling_keeps_a_fraction_of_named_events_and_all_warnings() -> None:
+    assert parse_sample_rates(" inference_succeeded=0.01, job_queued=0 ,") == {
+        "inference_succeeded": 0.01,
+        "job_queued": 0.0,
+    }
+    with pytest.raises(ValueError):
+        parse_sample_rates("job_queued=2")
+
+    sampler = SamplingFilter({"job_queued": 0.0, "inference_succeeded": 1.0})
+
+    def record(level: int, message: str) -> logging.LogRecord:
+        return logging.LogRecord("app", level, __file__, 1, message, None, None)
+
+    assert not sampler.filter(record(logging.INFO, "job_queued"))
+    assert sampler.filter(record(logging.WARNING, "job_queued"))
+    assert sampler.filter(record(logging.INFO, "inference_succeeded"))
+    assert sampler.filter(record(logging.INFO, "job_cached"))
+
+
+def _log_in_child() -> None:
+    logger.info("inference_started", extra={"job_id": "child"})
+    stop_logging()
+
+
+def test_forked_child_gets_its_own_listener(log_file) -> None:
+    log_file(queue_size=100)
+    child = multiprocessing.get_context("fork").Process(target=_log_in_child)
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    assert [line["job_id"] for line in _lines(log_file.path)] == ["child"]
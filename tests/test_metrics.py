@@ -0,0 +1,80 @@
+import json
+import multiprocessing
+import socket
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import Metrics
+
+
+client = TestClient(app)
+
+
+def _record_in_child(registry: Metrics) -> None:
+    registry.inc_submitted(3)
+    registry.observe("inference_seconds", 0.02, "v1", "succeeded")
+    registry.write_snapshot()
+
+
+def test_counters_from_many_threads_are_summed() -> None:
+    registry = Metrics()
+
+    def work() -> None:
+        for _ in range(1000):
+            registry.inc_succeeded()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.snapshot()["jobs_succeeded"] == 4000
+
+
+def test_snapshots_aggregate_across_processes(tmp_path) -> None:
+    registry = Metrics(str(tmp_path), flush_interval_seconds=60)
+    registry.inc_submitted()
+    registry.observe("inference_seconds", 0.2, "v1", "succeeded")
+
+    child = multiprocessing.get_context("fork").Process(target=_record_in_child, args=(registry,))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    # The child started from zero after fork, so nothing is counted twice.
+    assert registry.snapshot()["jobs_submitted"] == 4
+    text = registry.render_prometheus()
+    assert 'inferflow_inference_seconds_count{model_version="v1",outcome="succeeded"} 2' in text
+    assert 'inferflow_inference_seconds_bucket{model_version="v1",outcome="succeeded",le="0.025"} 1' in text
+    assert 'inferflow_inference_seconds_bucket{model_version="v1",outcome="succeeded",le="+Inf"} 2' in text
+
+
+def test_gauges_of_dead_processes_are_not_summed(tmp_path) -> None:
+    registry = Metrics(str(tmp_path), flush_interval_seconds=60)
+    registry.set_gauge("model_memory_bytes", "v1", 100)
+    dead = multiprocessing.get_context("fork").Process(target=lambda: None)
+    dead.start()
+    dead.join()
+    snapshot = {"counters": {"jobs_submitted": 2}, "histograms": {}, "gauges": {"model_memory_bytes|v1": 100}}
+    for pid in (dead.pid, 1):
+        (tmp_path / f"metrics-{socket.gethostname()}-{pid}.json").write_text(json.dumps(snapshot))
+
+    state = registry.collect()
+    # The live pid 1 and this process count; the exited child only keeps its totals.
+    assert state["gauges"] == {"model_memory_bytes|v1": 200}
+    assert state["counters"]["jobs_submitted"] == 4
+
+
+def test_metrics_endpoint_exports_stage_histograms() -> None:
+    response = client.post("/v1/inference", json={"text": "win a free prize", "model_version": "v-metrics"})
+    assert response.status_code == 200
+
+    scrape = client.get("/metrics")
+    assert scrape.status_code == 200
+    assert scrape.headers["content-type"].startswith("text/plain")
+    body = scrape.text
+    assert "# TYPE inferflow_jobs_submitted_total counter" in body
+    for stage in ("queue_wait", "inference", "db_write", "end_to_end"):
+        assert f'inferflow_{stage}_seconds_count{{model_version="v-metrics",outcome="succeeded"}} 1' in body
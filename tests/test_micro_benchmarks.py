@@ -0,0 +1,29 @@
+import json
+
+from benchmarks.micro import BASELINE_PATH, cases, regressions
+
+
+def test_every_case_runs_and_has_a_baseline() -> None:
+    baseline = json.loads(BASELINE_PATH.read_text())
+    names = []
+    for name, fn in cases():
+        if hasattr(fn, "prepare"):
+            # Transition cases must change a row on every call, not time a no-op UPDATE.
+            fn.prepare(2)
+            assert fn() is True and fn() is True
+        else:
+            fn()
+        names.append(name)
+    assert sorted(names) == sorted(baseline["results"])
+
+
+def test_regressions_flag_only_cases_past_the_threshold() -> None:
+    baseline = {"results": {"a": {"ns": 100.0, "relative": 1.0}, "b": {"ns": 100.0, "relative": 1.0}}}
+    report = {
+        "results": {
+            "a": {"ns": 120.0, "relative": 1.2},
+            "b": {"ns": 140.0, "relative": 1.4},
+            "new": {"ns": 999.0, "relative": 9.0},
+        }
+    }
+    assert list(regressions(report, baseline, max_regression_percent=25)) == ["b"]
@@ -1,4 +1,6 @@
-from app.model import predict_text
+import random
+
+from app.model import KeywordMatcher, predict_batch, predict_text
 
 
 def test_predict_spam() -> None:
@@ -9,3 +11,27 @@ def test_predict_spam() -> None:
 def test_predict_ham() -> None:
     pred = predict_text("Let's meet tomorrow for coffee")
     assert pred.label == "ham"
+
+
+def test_keyword_matcher_matches_naive_scan() -> None:
+    rng = random.Random(7)
+    filler = {"".join(rng.choices("qjz", k=8)) for _ in range(300)}
+    keywords = {"win", "winner", "in", "limited time", "time", "e", "free", "freebie"} | filler
+    matcher = KeywordMatcher(keywords)
+    alphabet = ["win", "ner", "limited", " ", "time", "free", "bie", "x", "in", "e"]
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(300)]
+
+    expected = [sum(1 for kw in keywords if kw in text) for text in texts]
+    assert [matcher.count(text) for text in texts] == expected
+    assert matcher.count_many(texts) == expected
+
+
+def test_predict_batch_matches_predict_text() -> None:
+    texts = [
+        "Limited time offer, click now to win",
+        "Let's meet tomorrow for coffee",
+        "FREE PRIZE",
+        "",
+        "urgent",
+    ]
+    assert predict_batch(texts) == [predict_text(text) for text in texts]
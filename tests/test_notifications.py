@@ -0,0 +1,102 @@
+import json
+import threading
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal, async_engine
+from app.job_store import update_job_succeeded
+from app.main import app
+from app.notifications import job_notifier
+
+
+client = TestClient(app)
+
+
+def _complete(job_id: str) -> None:
+    # What a worker does: store the terminal state, then publish it.
+    db = SessionLocal()
+    try:
+        update_job_succeeded(db, job_id, "ham", 0.9)
+    finally:
+        db.close()
+    event = {
+        "job_id": job_id,
+        "status": "succeeded",
+        "result": {"label": "ham", "score": 0.9, "model_version": "v-test"},
+        "retry_count": 0,
+    }
+    job_notifier.publish(job_id, event)
+
+
+def _publish_later(job_id: str, delay: float = 0.1) -> None:
+    threading.Timer(delay, _complete, args=(job_id,)).start()
+
+
+def test_long_poll_returns_on_completion_event(queued_job) -> None:
+    job_id = queued_job()
+    _publish_later(job_id)
+
+    response = client.get(f"/v1/jobs/{job_id}", params={"wait": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "succeeded"
+    assert body["result"]["label"] == "ham"
+
+
+def test_long_poll_times_out_with_current_state(queued_job) -> None:
+    job_id = queued_job()
+    response = client.get(f"/v1/jobs/{job_id}", params={"wait": 0.05})
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+
+
+def test_sse_stream_emits_current_and_terminal_states(queued_job) -> None:
+    done = client.post("/v1/inference", json={"text": "stream me"}).json()["job_id"]
+    pending = queued_job()
+    _publish_later(pending)
+
+    with client.stream("GET", "/v1/jobs:stream", params={"job_ids": [done, pending], "timeout": 5}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+    statuses = {(event["job_id"], event["status"]) for event in events}
+    assert (done, "succeeded") in statuses
+    assert (pending, "queued") in statuses
+    assert (pending, "succeeded") in statuses
+
+
+def test_websocket_pushes_terminal_state(queued_job) -> None:
+    job_id = queued_job()
+    with client.websocket_connect("/v1/jobs/ws") as websocket:
+        websocket.send_json({"job_ids": [job_id]})
+        assert websocket.receive_json()["status"] == "queued"
+        _publish_later(job_id)
+        event = websocket.receive_json()
+    assert event["job_id"] == job_id
+    assert event["status"] == "succeeded"
+
+
+@pytest.mark.parametrize("payload", ["not json", "[]", '"job"', "42", '{"job_ids": "abc"}', '{"job_ids": [1]}'])
+def test_websocket_closes_on_a_malformed_subscription(payload: str) -> None:
+    with client.websocket_connect("/v1/jobs/ws") as websocket:
+        websocket.send_text(payload)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_long_poll_waits_without_a_connection_and_returns_the_stored_status(queued_job) -> None:
+    job_id = queued_job()
+    seen: list[int] = []
+    # Checked while the request below is parked in its wait.
+    threading.Timer(0.2, lambda: seen.append(async_engine.sync_engine.pool.checkedout())).start()
+    _publish_later(job_id, delay=0.4)
+
+    response = client.get(f"/v1/jobs/{job_id}", params={"wait": 5})
+    assert seen == [0]
+    plain = client.get(f"/v1/jobs/{job_id}")
+    assert response.json()["status"] == "succeeded"
+    assert response.content == plain.content
+    assert response.headers["ETag"] == plain.headers["ETag"]
@@ -0,0 +1,48 @@
+import os
+from functools import partial
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.celery_app import celery
+from app.main import app
+from app.tasks import task_payload
+
+
+client = TestClient(app)
+
+
+def test_task_payload_modes() -> None:
+    assert task_payload("hello", "v1", mode="reference") == ((None, "v1"), {})
+    assert task_payload("hello", "v1", mode="inline", compression="zlib") == (("hello", "v1"), {})
+    long_text = "x" * 2000
+    args, options = task_payload(long_text, "v1", mode="inline", compression="zlib", compression_min_chars=1024)
+    assert args == (long_text, "v1")
+    assert options == {"compression": "zlib"}
+
+
+def test_reference_mode_worker_reads_text_from_the_store(monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "task_payload", partial(task_payload, mode="reference"))
+
+    single = client.post("/v1/inference", json={"text": "Urgent: win a free prize now"})
+    batch = client.post("/v1/inference:batch", json={"items": [{"text": "free prize, click"}, {"text": "lunch?"}]})
+
+    job_ids = [single.json()["job_id"], *(job["job_id"] for job in batch.json()["jobs"])]
+    results = [client.get(f"/v1/jobs/{job_id}").json() for job_id in job_ids]
+    assert [result["status"] for result in results] == ["succeeded"] * 3
+    assert [result["result"]["label"] for result in results] == ["spam", "spam", "ham"]
+
+
+def test_reference_messages_do_not_grow_with_the_text(monkeypatch) -> None:
+    # The benchmark module points the environment at an in-memory broker on import.
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    from benchmarks.payload_size import message_bytes
+
+    # Publish for real (to the in-memory broker) instead of running the task.
+    monkeypatch.setattr(celery.conf, "task_always_eager", False)
+    text = "please review the attached invoice " * 150
+
+    inline = message_bytes(text, "inline", "json", None)
+    assert message_bytes(text, "reference", "json", None) < inline - len(text)
+    assert message_bytes(text, "inline", "msgpack", "zlib") < inline / 2
+    assert message_bytes("short", "reference", "msgpack", None) == message_bytes(text, "reference", "msgpack", None)
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.celery_app import celery
+from app.main import app
+from app.metrics import render_queue_depths
+
+
+client = TestClient(app)
+
+
+def _capture_enqueues(monkeypatch) -> list[dict]:
+    sent: list[dict] = []
+    monkeypatch.setattr(main_module.run_inference, "apply_async", lambda *args, **kwargs: sent.append(kwargs))
+    return sent
+
+
+def test_jobs_are_routed_to_their_lane(monkeypatch) -> None:
+    sent = _capture_enqueues(monkeypatch)
+
+    response = client.post("/v1/inference", json={"text": "backfill row", "priority": "bulk"})
+    assert response.status_code == 200
+    batch = client.post("/v1/inference:batch", json={"priority": "realtime", "items": [{"text": "a"}, {"text": "b"}]})
+    assert batch.status_code == 200
+    client.post("/v1/inference", json={"text": "no class given"})
+
+    assert [kwargs["queue"] for kwargs in sent] == ["bulk", "realtime", "realtime", "default"]
+    status = client.get(f"/v1/jobs/{response.json()['job_id']}").json()
+    assert status["priority"] == "bulk"
+
+
+def test_unknown_priority_is_rejected() -> None:
+    response = client.post("/v1/inference", json={"text": "hi", "priority": "urgent"})
+    assert response.status_code == 422
+
+
+def test_celery_declares_one_queue_per_lane() -> None:
+    assert [queue.name for queue in celery.conf.task_queues] == ["realtime", "default", "bulk"]
+    assert celery.conf.task_default_queue == "default"
+    assert celery.conf.task_routes["app.tasks.purge_expired_jobs"] == {"queue": "bulk"}
+
+
+def test_queue_depth_gauge() -> None:
+    text = render_queue_depths({"realtime": 0, "bulk": 1200})
+    assert "# TYPE inferflow_queue_depth gauge" in text
+    assert 'inferflow_queue_depth{queue="bulk"} 1200' in text
+    assert 'inferflow_queue_depth{queue="realtime"} 0' in text
@@ -0,0 +1,70 @@
+import dataclasses
+import threading
+
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.concurrency.thread import TaskPool as ThreadPool
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.main import app
+from app.profiling import profile_worker, sample_stacks
+
+
+client = TestClient(app)
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_returns_folded_stacks() -> None:
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        folded = sample_stacks(0.1, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [line for line in folded.splitlines() if line.startswith("busy;")]
+    assert busy
+    assert all("_busy_loop" in line for line in busy)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in busy)
+
+
+def test_profile_endpoint_is_disabled_without_admin_token() -> None:
+    assert client.post("/admin/profile", params={"seconds": 0.01}).status_code == 404
+
+
+def test_profile_endpoint_requires_token(monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "settings", dataclasses.replace(main_module.settings, admin_token="secret"))
+
+    denied = client.post("/admin/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": "wrong"})
+    assert denied.status_code == 403
+
+    response = client.post("/admin/profile", params={"seconds": 0.05}, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text.strip()
+
+
+def test_worker_profile_refuses_pools_it_cannot_see_tasks_in(monkeypatch) -> None:
+    assert "prefork" in profile_worker(PreforkPool.__new__(PreforkPool), 0.01)["error"]
+    assert profile_worker(ThreadPool.__new__(ThreadPool), 0.01)["ok"]
+
+    monkeypatch.setattr(main_module, "settings", dataclasses.replace(main_module.settings, admin_token="secret"))
+    replies = [{"w1@host": {"ok": "main;loop 3\n"}}, {"w2@host": profile_worker(PreforkPool.__new__(PreforkPool), 1)}]
+    monkeypatch.setattr(main_module.celery.control, "broadcast", lambda *args, **kwargs: replies)
+    response = client.post(
+        "/admin/profile", params={"seconds": 0.05, "target": "worker"}, headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 400
+    assert "w2@host" in response.json()["detail"] and "--pool threads" in response.json()["detail"]
+
+    replies.pop()
+    response = client.post(
+        "/admin/profile", params={"seconds": 0.05, "target": "worker"}, headers={"X-Admin-Token": "secret"}
+    )
+    assert response.text == "w1@host;main;loop 3\n"
@@ -0,0 +1,133 @@
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+from app.metrics import metrics
+from app.model import KeywordModel
+from app.registry import ModelRegistry, loader_for, parse_model_versions
+
+
+def _counting_loader(loads: list[str], name: str, memory_bytes: int | None = None, delay: float = 0.0):
+    def load():
+        time.sleep(delay)
+        loads.append(name)
+        model = SimpleNamespace(predict=lambda text: name)
+        if memory_bytes is not None:
+            model.memory_bytes = memory_bytes
+        return model
+
+    return load
+
+
+def test_versions_load_once_and_unknown_versions_use_the_default() -> None:
+    loads: list[str] = []
+    registry = ModelRegistry(
+        {"v1": _counting_loader(loads, "v1"), "v2": _counting_loader(loads, "v2")}, default_version="v1"
+    )
+
+    assert registry.get("v2").predict("x") == "v2"
+    assert registry.get("v2") is registry.get("v2")
+    assert registry.get("v-unknown").predict("x") == "v1"
+    assert registry.get("v1") is registry.get("v-unknown")
+    assert loads == ["v2", "v1"]
+
+
+def test_concurrent_first_requests_share_one_load() -> None:
+    loads: list[str] = []
+    registry = ModelRegistry({"v1": _counting_loader(loads, "v1", delay=0.05)}, default_version="v1")
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("v1"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["v1"]
+    assert all(model is models[0] for model in models)
+
+
+def test_least_recently_used_version_is_evicted_over_budget() -> None:
+    loads: list[str] = []
+    registry = ModelRegistry(
+        {name: _counting_loader(loads, name, memory_bytes=400) for name in ("v1", "v2", "v3")},
+        default_version="v1",
+        memory_budget_bytes=1000,
+    )
+    evictions_before = metrics.snapshot()["model_evictions"]
+
+    registry.preload(["v1", "v2"])
+    registry.get("v1")
+    registry.get("v3")
+
+    assert registry.loaded() == {"v1": 400, "v3": 400}
+    assert metrics.snapshot()["model_evictions"] == evictions_before + 1
+    registry.get("v2")
+    assert loads == ["v1", "v2", "v3", "v2"]
+
+
+def test_preload_records_load_time_and_memory() -> None:
+    registry = ModelRegistry({"v-preload": KeywordModel}, default_version="v-preload")
+    registry.preload()
+
+    assert registry.loaded()["v-preload"] > 0
+    text = metrics.render_prometheus()
+    assert 'inferflow_model_load_seconds_count{model_version="v-preload",outcome="loaded"} 1' in text
+    assert 'inferflow_model_memory_bytes{model_version="v-preload"}' in text
+
+
+def test_preload_skips_broken_versions() -> None:
+    def broken():
+        raise OSError("weights missing")
+
+    registry = ModelRegistry({"v1": KeywordModel, "v-broken": broken}, default_version="v1")
+    registry.preload()
+    assert list(registry.loaded()) == ["v1"]
+
+
+def test_model_versions_spec(tmp_path) -> None:
+    keywords = tmp_path / "keywords.txt"
+    keywords.write_text("Lottery\njackpot\n\n")
+    loaders = parse_model_versions("v1=keyword, v2=keyword:" + str(keywords))
+
+    assert set(loaders) == {"v1", "v2"}
+    assert loaders["v2"]().predict("lottery jackpot inside").label == "spam"
+    assert loaders["v1"]().predict("lottery jackpot inside").label == "ham"
+    with pytest.raises(ValueError):
+        parse_model_versions("v1=onnx")
+
+
+def test_models_that_report_their_size_load_without_tracing(monkeypatch, tmp_path) -> None:
+    def no_tracing():
+        raise AssertionError("tracemalloc started for a model that reports its size")
+
+    monkeypatch.setattr(tracemalloc, "start", no_tracing)
+    keywords = tmp_path / "keywords.txt"
+    keywords.write_text("lottery\n")
+    registry = ModelRegistry({"v1": KeywordModel, "v2": loader_for(f"keyword:{keywords}")}, default_version="v1")
+    registry.preload()
+    sizes = registry.loaded()
+    assert set(sizes) == {"v1", "v2"} and all(size > 0 for size in sizes.values())
+
+
+def test_concurrent_traced_loads_each_measure_their_own_allocations() -> None:
+    def allocating_loader(delay: float):
+        def load():
+            # v1 finishes while v2 is still allocating; tracing must stay on for v2.
+            time.sleep(delay)
+            payload = [bytearray(64 * 1024) for _ in range(8)]
+            time.sleep(0.05 - delay / 2)
+            return SimpleNamespace(predict=lambda text: "x", payload=payload)
+
+        return load
+
+    registry = ModelRegistry({"v1": allocating_loader(0.0), "v2": allocating_loader(0.08)}, default_version="v1")
+    threads = [threading.Thread(target=registry.get, args=(version,)) for version in ("v1", "v2")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert all(size >= 8 * 64 * 1024 for size in registry.loaded().values())
@@ -0,0 +1,61 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.db_models import JobRecord
+from app.job_store import create_job, get_job
+from app.retention import JobArchive, purge_expired_jobs
+
+
+def _seed(db, job_id: str, status: str, age_days: int) -> None:
+    create_job(
+        db, job_id=job_id, input_text=f"text {job_id}", model_version="v1", idempotency_key=None, status=status
+    )
+    created_at = datetime.now(timezone.utc) - timedelta(days=age_days)
+    db.execute(update(JobRecord).where(JobRecord.job_id == job_id).values(created_at=created_at))
+    db.commit()
+
+
+def test_purge_archives_and_deletes_only_old_terminal_jobs(tmp_path) -> None:
+    db = SessionLocal()
+    try:
+        for index in range(5):
+            _seed(db, f"old-done-{index}", "succeeded", age_days=40)
+        _seed(db, "old-failed", "failed", age_days=40)
+        _seed(db, "old-queued", "queued", age_days=40)
+        _seed(db, "fresh-done", "succeeded", age_days=1)
+
+        deleted: list[str] = []
+        with JobArchive(tmp_path) as archive:
+            purged = purge_expired_jobs(
+                db, retention_days=30, batch_size=2, archive=archive, on_deleted=deleted.extend
+            )
+
+        assert purged == 6
+        assert len(deleted) == 6 and "old-failed" in deleted
+        assert get_job(db, "old-done-0") is None
+        assert get_job(db, "old-failed") is None
+        # Unfinished and recent jobs stay in the hot table.
+        assert get_job(db, "old-queued") is not None
+        assert get_job(db, "fresh-done") is not None
+    finally:
+        db.close()
+
+    with gzip.open(archive.path, "rt", encoding="utf-8") as handle:
+        rows = [json.loads(line) for line in handle]
+    assert sorted(row["job_id"] for row in rows) == [*(f"old-done-{index}" for index in range(5)), "old-failed"]
+    assert rows[0]["input_text"].startswith("text ")
+    assert isinstance(rows[0]["created_at"], str)
+
+
+def test_purge_without_expired_rows_writes_nothing(tmp_path) -> None:
+    db = SessionLocal()
+    try:
+        with JobArchive(tmp_path) as archive:
+            assert purge_expired_jobs(db, retention_days=3650, batch_size=100, archive=archive) == 0
+    finally:
+        db.close()
+    assert not archive.path.exists()
@@ -1,17 +1,19 @@
+from types import SimpleNamespace
+
+import pytest
 from fastapi.testclient import TestClient
 
 from app.config import settings
 from app.main import app
 from app.model import Prediction
+from app.registry import model_registry
 
 
 client = TestClient(app)
 
 
+@pytest.mark.usefixtures("restore_model_registry")
 def test_transient_error_retries_and_succeeds() -> None:
-    from app import tasks
-
-    original_predict = tasks.predict_text
     attempts = {"count": 0}
 
     def flaky_predict(_: str) -> Prediction:
@@ -20,14 +22,11 @@ def test_transient_error_retries_and_succeeds() -> None:
             raise RuntimeError("simulated transient failure")
         return Prediction(label="ham", score=0.9)
 
-    tasks.predict_text = flaky_predict
-    try:
-        response = client.post(
-            "/v1/inference",
-            json={"text": "retry scenario"},
-        )
-    finally:
-        tasks.predict_text = original_predict
+    model_registry.register("v-flaky", lambda: SimpleNamespace(predict=flaky_predict))
+    response = client.post(
+        "/v1/inference",
+        json={"text": "retry scenario", "model_version": "v-flaky"},
+    )
     assert response.status_code == 200
     job_id = response.json()["job_id"]
 
@@ -46,22 +45,16 @@ def test_transient_error_retries_and_succeeds() -> None:
     assert body["result"]["label"] == "ham"
 
 
+@pytest.mark.usefixtures("restore_model_registry")
 def test_transient_error_retry_exhaustion_fails() -> None:
-    from app import tasks
-
-    original_predict = tasks.predict_text
-
     def always_fail_predict(_: str) -> Prediction:
         raise RuntimeError("persistent transient failure")
 
-    tasks.predict_text = always_fail_predict
-    try:
-        response = client.post(
-            "/v1/inference",
-            json={"text": "retry exhaustion scenario"},
-        )
-    finally:
-        tasks.predict_text = original_predict
+    model_registry.register("v-always-fails", lambda: SimpleNamespace(predict=always_fail_predict))
+    response = client.post(
+        "/v1/inference",
+        json={"text": "retry exhaustion scenario", "model_version": "v-always-fails"},
+    )
     assert response.status_code == 200
     job_id = response.json()["job_id"]
 
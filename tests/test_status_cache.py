@@ -0,0 +1,102 @@
+import asyncio
+import dataclasses
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.cache import StatusCache
+from app.database import SessionLocal
+from app.job_store import get_job, get_job_status_row, update_job_started, update_job_succeeded
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def status_cache(monkeypatch) -> StatusCache:
+    cache = StatusCache(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(main_module, "status_cache", cache)
+    return cache
+
+
+def test_matching_etag_gets_an_empty_304(queued_job) -> None:
+    job_id = queued_job()
+    first = client.get(f"/v1/jobs/{job_id}")
+    etag = first.headers["ETag"]
+    assert first.json()["status"] == "queued"
+
+    again = client.get(f"/v1/jobs/{job_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert client.get(f"/v1/jobs/{job_id}", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(f"/v1/jobs/{job_id}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_finished_jobs_are_served_from_the_cache(status_cache, monkeypatch) -> None:
+    job_id = client.post("/v1/inference", json={"text": "win a free prize now"}).json()["job_id"]
+    first = client.get(f"/v1/jobs/{job_id}")
+    assert first.json()["status"] == "succeeded"
+
+    def no_database(*args, **kwargs):
+        raise AssertionError("finished job was read from the database again")
+
+    monkeypatch.setattr(main_module, "get_job_status_row", no_database)
+    again = client.get(f"/v1/jobs/{job_id}")
+    assert again.content == first.content
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert client.get(f"/v1/jobs/{job_id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_unfinished_jobs_are_not_cached(status_cache, queued_job) -> None:
+    job_id = queued_job()
+    assert client.get(f"/v1/jobs/{job_id}").json()["status"] == "queued"
+    assert len(status_cache._local) == 0
+
+
+def test_status_reads_skip_the_input_text(queued_job) -> None:
+    job_id = queued_job(input_text="x" * 10_000)
+    db = SessionLocal()
+    try:
+        row = get_job_status_row(db, job_id)
+    finally:
+        db.close()
+    assert row.status == "queued"
+    assert "input_text" not in row._mapping
+
+
+def test_unknown_job_is_404_without_a_result_backend(monkeypatch) -> None:
+    assert client.get(f"/v1/jobs/{uuid4()}").json()["status"] == "queued"
+
+    settings = dataclasses.replace(main_module.settings, celery_result_backend=None)
+    monkeypatch.setattr(main_module, "settings", settings)
+    assert client.get(f"/v1/jobs/{uuid4()}").status_code == 404
+
+
+def test_finished_rows_are_not_moved_back_by_a_redelivered_task(queued_job) -> None:
+    job_id = queued_job()
+    db = SessionLocal()
+    try:
+        assert update_job_succeeded(db, job_id, "ham", 0.9) is True
+        assert update_job_started(db, job_id, 1) is False
+        assert update_job_succeeded(db, job_id, "spam", 0.1) is False
+        record = get_job(db, job_id)
+    finally:
+        db.close()
+    assert (record.status, record.result_label) == ("succeeded", "ham")
+
+
+def test_jobs_due_for_purge_within_the_ttl_are_not_cached() -> None:
+    cache = StatusCache(max_entries=10, ttl_seconds=3600, retention_days=1)
+    now = datetime.now(timezone.utc)
+    assert cache.admits(now)
+    assert not cache.admits(now - timedelta(hours=23, minutes=30))
+    assert asyncio.run(cache.aset("old", "{}", now - timedelta(hours=23, minutes=30))) is None
+    assert asyncio.run(cache.aget("old")) is None
+
+    asyncio.run(cache.aset("new", "{}", now))
+    cache.evict(["new"])
+    assert asyncio.run(cache.aget("new")) is None
@@ -0,0 +1,77 @@
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.job_store import apply_job_updates, get_job, update_job_started, update_job_succeeded
+from app.write_behind import StatusWriteBuffer
+
+
+class _StatementLog:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def __enter__(self) -> "_StatementLog":
+        event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *_) -> None:
+        event.remove(engine, "before_cursor_execute", self._record)
+
+    def _record(self, _conn, _cursor, statement, *_args) -> None:
+        self.statements.append(statement.split()[0].upper())
+
+
+def test_transitions_are_single_statements(queued_job) -> None:
+    job_id = queued_job()
+    db = SessionLocal()
+    try:
+        with _StatementLog() as log:
+            assert update_job_started(db, job_id, 0) is True
+            assert update_job_succeeded(db, job_id, "ham", 0.9) is True
+        assert log.statements == ["UPDATE", "UPDATE"]
+
+        assert update_job_started(db, "missing-job", 0) is False
+        record = get_job(db, job_id)
+        assert record.status == "succeeded"
+        assert record.result_label == "ham"
+    finally:
+        db.close()
+
+
+def test_buffer_coalesces_transitions_into_one_flush(queued_job) -> None:
+    job_ids = [queued_job() for _ in range(3)]
+    published: list[dict] = []
+    buffer = StatusWriteBuffer(SessionLocal, max_delay_ms=60_000, max_pending=1000, publish=published.append)
+
+    for job_id in job_ids:
+        buffer.record(job_id, {"status": "started", "retry_count": 2})
+        buffer.record(
+            job_id,
+            {"status": "succeeded", "result_label": "spam", "result_score": 0.75, "error": None},
+            {"job_id": job_id, "status": "succeeded"},
+        )
+    assert published == []
+
+    with _StatementLog() as log:
+        buffer.flush()
+    assert log.statements == ["UPDATE"]
+    assert [event["job_id"] for event in published] == job_ids
+
+    db = SessionLocal()
+    try:
+        for job_id in job_ids:
+            record = get_job(db, job_id)
+            assert record.status == "succeeded"
+            assert record.retry_count == 2
+    finally:
+        db.close()
+
+
+def test_late_started_update_does_not_overwrite_terminal_state(queued_job) -> None:
+    job_id = queued_job()
+    db = SessionLocal()
+    try:
+        update_job_succeeded(db, job_id, "ham", 0.9)
+        apply_job_updates(db, {job_id: {"status": "started", "retry_count": 1}})
+        assert get_job(db, job_id).status == "succeeded"
+    finally:
+        db.close()